@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+# Vectorized aggregates behind create_charts.py. Every function takes the preprocessed
+# DataFrame (or one of its columns) from create_charts.load_venues and avoids per-row Python.
+
+PRICE_BINS = [-np.inf, 40, 60, 80, 100, np.inf]
+PRICE_LABELS = ['Budget (≤40)', 'Affordable (41-60)', 'Mid-range (61-80)', 'Premium (81-100)', 'Luxury (>100)']
+
+# Bar colors for the top venues chart: (upper price bound, color)
+PRICE_TIER_COLORS = [(50, '#2ecc71'), (80, '#f39c12'), (np.inf, '#e74c3c')]
+
+VIEWS_BINS = [0, 10000, 25000, 50000, 100000, 200000]
+VIEWS_LABELS = ['<10K', '10K-25K', '25K-50K', '50K-100K', '>100K']
+
+COMPLETENESS_FIELDS = ['name', 'phone', 'email', 'address', 'price_per_person', 'views',
+                       'latitude', 'longitude', 'description', 'hall_names', 'gallery_images']
+
+
+def nonzero_counts(values):
+    """value_counts without the zero rows categoricals report for unused categories"""
+    counts = values.value_counts()
+    return counts[counts > 0]
+
+
+def price_category_counts(prices):
+    """Venues per price category, most common first"""
+    counts = nonzero_counts(pd.cut(prices, bins=PRICE_BINS, labels=PRICE_LABELS))
+    counts.index = counts.index.astype(str)
+    return counts
+
+
+def price_tier_colors(prices):
+    """Bar color per price tier, None where the price is unknown"""
+    prices = np.asarray(prices, dtype=float)
+    conditions = [prices <= bound for bound, _ in PRICE_TIER_COLORS]
+    colors = np.select(conditions, [color for _, color in PRICE_TIER_COLORS], default='')
+    return [color or None for color in colors]
+
+
+def location_counts(df):
+    return nonzero_counts(df['location_short'].dropna())
+
+
+def event_type_counts(df):
+    """How many venues offer each event type; event_types is a list column"""
+    counts = df['event_types'].explode().value_counts()
+    # Strip the few distinct labels rather than every exploded item
+    return counts.groupby(counts.index.str.strip()).sum().sort_values(ascending=False, kind='stable')
+
+
+def completeness(df, fields=COMPLETENESS_FIELDS):
+    """Percentage of venues with each field filled in"""
+    fields = [field for field in fields if field in df.columns]
+    return df[fields].notna().mean() * 100
+
+
+def location_prices(df, min_venues=3, top=8):
+    """[(location, prices)] for the most common locations with at least min_venues priced venues"""
+    priced = df[df['price_numeric'].notna() & df['location_short'].notna()]
+    counts = nonzero_counts(priced['location_short'])
+    top_locations = counts[counts >= min_venues].index[:top]
+    groups = priced[priced['location_short'].isin(top_locations)].groupby(
+        'location_short', observed=True, sort=False)['price_numeric']
+    prices = {location: group for location, group in groups}
+    return [(location, prices[location]) for location in top_locations]
+
+
+def popularity_counts(views):
+    return pd.cut(views, bins=VIEWS_BINS, labels=VIEWS_LABELS).value_counts().sort_index()
+
+
+def venue_aggregates(df):
+    """Every aggregate the charts and the summary report use, computed in one call"""
+    prices = df['price_numeric'].dropna()
+    views = df['views_numeric'].dropna()
+    return {
+        'prices': prices.agg(['count', 'min', 'max', 'mean', 'median']),
+        'views': views.agg(['count', 'min', 'max', 'mean']),
+        'price_categories': price_category_counts(prices),
+        'top_venues': df.nlargest(20, 'views_numeric')[['name', 'views_numeric', 'price_numeric']],
+        'price_views_correlation': df['price_numeric'].corr(df['views_numeric']),
+        'locations': location_counts(df),
+        'priced_locations': location_counts(df[df['price_numeric'].notna()]),
+        'event_types': event_type_counts(df),
+        'completeness': completeness(df),
+        'location_prices': location_prices(df),
+        'popularity': popularity_counts(views),
+    }
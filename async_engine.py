@@ -0,0 +1,253 @@
+import asyncio
+import time
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from transport import RETRY_STATUSES
+from venue import Venue
+
+
+class AsyncCrawlEngine:
+    """asyncio backend for ShadliqScraperFinal that pipelines the listing and detail stages.
+
+    Every venue URL a listing page returns is queued for the detail workers straight
+    away, so detail fetches start as soon as the first listing page comes back. Once the
+    pager reveals the last page the remaining listing pages are fetched concurrently;
+    without a pager they are walked one by one until a page has no new venues.
+    Parsing reuses the scraper's parse_* methods.
+    """
+
+    def __init__(self, scraper, concurrency=None, per_host=None):
+        self.scraper = scraper
+        self.concurrency = concurrency or scraper.workers
+        self.per_host = per_host or self.concurrency
+
+    @staticmethod
+    def trace_config():
+        """aiohttp tracing that stamps DNS, connect and response-header times into trace_request_ctx"""
+        def mark(name):
+            async def callback(session, context, params):
+                if context.trace_request_ctx is not None:
+                    context.trace_request_ctx[name] = time.perf_counter()
+            return callback
+
+        trace = aiohttp.TraceConfig()
+        trace.on_dns_resolvehost_start.append(mark('dns_start'))
+        trace.on_dns_resolvehost_end.append(mark('dns_end'))
+        trace.on_connection_create_start.append(mark('connect_start'))
+        trace.on_connection_create_end.append(mark('connect_end'))
+        trace.on_request_end.append(mark('headers'))  # Sent once the status line and headers are in
+        return trace
+
+    def record_response(self, response, body, start, sent, marks):
+        """Record one response's phases and sizes, like Transport.timed_get"""
+        done = time.perf_counter()
+        phases = {'rate_limit': sent - start}
+        connect = 0.0
+        if 'connect_end' in marks:
+            connect = marks['connect_end'] - marks['connect_start']
+            dns = marks['dns_end'] - marks['dns_start'] if 'dns_end' in marks else 0.0
+            phases['dns'] = dns
+            phases['connect'] = connect - dns
+        first_byte = marks.get('headers', done)
+        phases['ttfb'] = first_byte - sent - connect
+        phases['download'] = done - first_byte
+        wire_bytes = getattr(response.content, 'total_raw_bytes', len(body))
+        self.scraper.metrics.record_response(response.status, phases, wire_bytes, len(body))
+        if self.scraper.transport.scheduler:
+            self.scraper.transport.scheduler.observe(phases['ttfb'], response.status)
+
+    async def get(self, http, url, headers=None):
+        """GET with the scraper transport's retry policy, returning (status, headers, body)"""
+        transport = self.scraper.transport
+        timeout = aiohttp.ClientTimeout(total=30)
+        for attempt in range(transport.retries + 1):
+            start = time.perf_counter()
+            await self.scraper.rate_limiter.acquire_async()
+            transport.stats.record_request()
+            retry_after = None
+            marks = {}
+            sent = time.perf_counter()
+            try:
+                async with http.get(url, timeout=timeout, headers=headers, trace_request_ctx=marks) as response:
+                    body = await response.read()
+                    self.record_response(response, body, start, sent, marks)
+                    if response.status not in RETRY_STATUSES:
+                        if response.status >= 400:
+                            transport.stats.record_failure(url)
+                        response.raise_for_status()
+                        return response.status, response.headers, body
+                    error = aiohttp.ClientResponseError(response.request_info, response.history,
+                                                        status=response.status, message=response.reason)
+                    reason = f"HTTP {response.status}"
+                    retry_after = response.headers.get('Retry-After')
+            except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as e:
+                error, reason = e, type(e).__name__
+                if transport.scheduler:
+                    transport.scheduler.observe()
+
+            if attempt == transport.retries:
+                break
+            delay = transport.retry_delay(attempt, retry_after)
+            transport.stats.record_retry(url)
+            print(f"    {reason} from {url}, retry {attempt + 1}/{transport.retries} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+        transport.stats.record_failure(url)
+        raise error
+
+    async def fetch(self, http, url, kind='detail'):
+        """Async counterpart of ShadliqScraperFinal.fetch, returning (content, unchanged)"""
+        prefetched = self.scraper.prefetched.pop(url, None)
+        if prefetched:
+            return prefetched
+        self.scraper.metrics.record_page(kind)
+        cache = self.scraper.cache
+        if cache:
+            content = cache.fresh_body(url)
+            if content is not None:
+                self.scraper.record(url, kind, content)
+                return content, True
+
+        headers = cache.validators(url) if cache else {}
+        status, response_headers, content = await self.get(http, url, headers)
+        if status == 304 and cache:
+            content = cache.replay(url)
+            if content is not None:
+                self.scraper.record(url, kind, content)
+                return content, True
+            # Entry was evicted after the validators were read; fetch unconditionally
+            status, response_headers, content = await self.get(http, url)
+
+        if cache:
+            cache.store(url, content, response_headers)
+        self.scraper.record(url, kind, content)
+        return content, False
+
+    async def listing_stage(self, http, page_num, queue, page_urls, seen):
+        """Fetch one listing page, queue its new venue URLs for the detail workers and return them"""
+        journal = self.scraper.journal
+        if journal and page_num in journal.pages:
+            venue_links = journal.pages[page_num]
+        else:
+            url = self.scraper.listing_url(page_num)
+            print(f"Scraping listing page {page_num}: {url}")
+
+            try:
+                content, _ = await self.fetch(http, url, kind='listing')
+                venue_links = await asyncio.to_thread(self.scraper.parse_listing_page, content)
+                print(f"  Found {len(venue_links)} venue links on page {page_num}")
+                if journal:
+                    journal.record_listing(page_num, venue_links,
+                                           {url: self.scraper.listing_data[url] for url in venue_links})
+            except Exception as e:
+                print(f"  Error scraping listing page {page_num}: {e}")
+                self.scraper.failed_urls.add(url)
+                venue_links = []
+
+        page_urls[page_num] = venue_links
+        new_links = [venue_url for venue_url in venue_links if venue_url not in seen]
+        seen.update(new_links)
+        for venue_url in new_links:
+            if not (journal and venue_url in journal.completed):
+                await queue.put(venue_url)
+        self.scraper.metrics.set_queue_depth('detail_queue', queue.qsize())
+        return new_links
+
+    async def discover(self, http, queue, page_urls, seen):
+        """Run the listing stage for every page, using the pager to fetch ahead when it can"""
+        scraper = self.scraper
+        page_num = 1
+        new_links = await self.listing_stage(http, page_num, queue, page_urls, seen)
+        while scraper.more_listing_pages(page_num, new_links):
+            if scraper.last_listing_page:
+                last = scraper.last_listing_page
+                if scraper.max_listing_pages:
+                    last = min(last, scraper.max_listing_pages)
+                pages = range(page_num + 1, last + 1)
+                results = await asyncio.gather(*(self.listing_stage(http, n, queue, page_urls, seen)
+                                                 for n in pages))
+                page_num, new_links = last, results[-1]
+            else:
+                page_num += 1
+                new_links = await self.listing_stage(http, page_num, queue, page_urls, seen)
+        print(f"Listing pages done: {page_num}, {len(seen)} unique venues")
+
+    async def scrape_venue_detail(self, http, url):
+        """Async counterpart of ShadliqScraperFinal.scrape_venue_detail"""
+        print(f"  Scraping venue: {url}")
+        try:
+            content, unchanged = await self.fetch(http, url)
+            return await asyncio.to_thread(self.scraper.extract_venue, url, content, unchanged)
+        except Exception as e:
+            print(f"    Error scraping venue {url}: {e}")
+            self.scraper.failed_urls.add(url)
+            return self.scraper.new_venue_record(url)
+
+    async def detail_worker(self, http, queue, results):
+        """Consume venue URLs from the queue until cancelled"""
+        while True:
+            url = await queue.get()
+            self.scraper.metrics.set_queue_depth('detail_queue', queue.qsize())
+            try:
+                venue_data = await self.scrape_venue_detail(http, url)
+                self.scraper.journal_venue(venue_data)
+                if self.scraper.sinks:
+                    self.scraper.keep_venue(venue_data)  # Streamed in the order venues finish
+                else:
+                    results[url] = venue_data
+            except Exception as e:
+                # A journal or sink write failed; the worker stays up for the rest of the queue
+                print(f"    Error saving venue {url}: {e}")
+                self.scraper.failed_urls.add(url)
+            finally:
+                queue.task_done()
+
+    async def crawl(self):
+        """Run both stages and return venue rows in listing order"""
+        if aiohttp is None:
+            raise RuntimeError("The async engine requires aiohttp (pip install aiohttp)")
+
+        queue = asyncio.Queue()
+        page_urls = {}
+        seen = set()
+        results = {}
+
+        # The connector is the connection pool; limit_per_host caps concurrency against shadliq.az
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host)
+        headers = {'User-Agent': self.scraper.session.headers['User-Agent']}
+        async with aiohttp.ClientSession(connector=connector, headers=headers,
+                                         trace_configs=[self.trace_config()]) as http:
+            workers = [asyncio.create_task(self.detail_worker(http, queue, results))
+                       for _ in range(self.concurrency)]
+            await self.discover(http, queue, page_urls, seen)
+            await queue.join()
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        if self.scraper.sinks:
+            return []
+        if self.scraper.journal:
+            return self.scraper.journal.ordered_venues()
+
+        # Order rows by listing page and position, independent of completion order
+        ordered_urls = dict.fromkeys(url for page_num in sorted(page_urls) for url in page_urls[page_num])
+        return [results[url] for url in ordered_urls if url in results]
+
+    def scrape_all(self):
+        """Async counterpart of ShadliqScraperFinal.scrape_all"""
+        print("Starting async scraper with pipelined listing and detail stages...")
+        print("=" * 60)
+        self.scraper.ensure_template()  # Learned with the sync transport before the event loop starts
+
+        self.scraper.stream_journaled_venues()
+        venues = asyncio.run(self.crawl())
+        self.scraper.venues.extend(Venue.from_row(row) for row in venues)
+
+        print("\n" + "=" * 60)
+        print(f"Scraping completed! Total venues scraped: {self.scraper.scraped_count()}")
+        print("=" * 60)
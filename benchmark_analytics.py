@@ -0,0 +1,151 @@
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+import analytics
+from extractors import EVENT_KEYWORDS
+
+
+def synthetic_venues(num_venues, seed=0):
+    """A preprocessed venue DataFrame shaped like create_charts.load_venues output"""
+    rng = np.random.default_rng(seed)
+
+    prices = rng.choice(np.arange(20, 260, 5), num_venues).astype(float)
+    prices[rng.random(num_venues) < 0.35] = np.nan
+    views = rng.lognormal(10.5, 1.0, num_venues).round()
+    views[rng.random(num_venues) < 0.05] = np.nan
+
+    locations = np.array([f"{i} km" for i in range(1, 151)] + [f"{i} mkr" for i in range(1, 51)], dtype=object)
+    location_short = pd.Series(locations[rng.integers(0, len(locations), num_venues)])
+    location_short[rng.random(num_venues) < 0.2] = np.nan
+
+    # Every subset of the event keywords, joined the way the scraper writes the CSV
+    subsets = np.array([', '.join(k for i, k in enumerate(EVENT_KEYWORDS) if mask >> i & 1) or np.nan
+                        for mask in range(2 ** len(EVENT_KEYWORDS))], dtype=object)
+    event_types = pd.Series(subsets[rng.integers(0, len(subsets), num_venues)]).str.split(',')
+
+    df = pd.DataFrame({
+        'name': pd.Series(np.arange(num_venues)).map('Venue {}'.format),
+        'price_numeric': prices,
+        'views_numeric': views,
+        'latitude_numeric': rng.uniform(40.3, 40.5, num_venues),
+        'longitude_numeric': rng.uniform(49.7, 50.0, num_venues),
+        'location_short': location_short,
+        'event_types': event_types,
+    })
+    for field in analytics.COMPLETENESS_FIELDS:
+        if field not in df.columns:
+            df[field] = np.where(rng.random(num_venues) < 0.7, 'x', None)
+    return df
+
+
+# The row-by-row versions create_charts.py used before analytics.py, kept as the baseline
+
+def loop_price_category_counts(prices):
+    price_ranges = []
+    for price in prices:
+        if price <= 40:
+            price_ranges.append('Budget (≤40)')
+        elif price <= 60:
+            price_ranges.append('Affordable (41-60)')
+        elif price <= 80:
+            price_ranges.append('Mid-range (61-80)')
+        elif price <= 100:
+            price_ranges.append('Premium (81-100)')
+        else:
+            price_ranges.append('Luxury (>100)')
+    return pd.Series(price_ranges).value_counts()
+
+
+def loop_price_tier_colors(top_venues):
+    colors = []
+    for idx, row in top_venues.iterrows():
+        if pd.notna(row['price_numeric']):
+            if row['price_numeric'] <= 50:
+                colors.append('#2ecc71')
+            elif row['price_numeric'] <= 80:
+                colors.append('#f39c12')
+            else:
+                colors.append('#e74c3c')
+        else:
+            colors.append(None)
+    return colors
+
+
+def loop_event_type_counts(df):
+    all_events = []
+    for events in df['event_types'].dropna():
+        all_events.extend(e.strip() for e in events)
+    return pd.Series(all_events).value_counts()
+
+
+def loop_location_prices(df):
+    location_price_df = df[df['price_numeric'].notna() & df['location_short'].notna()].copy()
+    location_counts = location_price_df['location_short'].value_counts()
+    top_locations = location_counts[location_counts >= 3].index[:8]
+    filtered_df = location_price_df[location_price_df['location_short'].isin(top_locations)]
+    return [(loc, filtered_df[filtered_df['location_short'] == loc]['price_numeric']) for loc in top_locations]
+
+
+def timed(fn, *args, repeat=1):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def same_result(a, b):
+    if isinstance(a, pd.Series):
+        return a.sort_index().equals(b.sort_index())
+    if a and isinstance(a[0], tuple):
+        return [(loc, list(prices)) for loc, prices in a] == [(loc, list(prices)) for loc, prices in b]
+    return list(a) == list(b)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the chart aggregates on a synthetic venue dataset")
+    parser.add_argument('--venues', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=3, help='Best of N timings per step')
+    parser.add_argument('--json', metavar='PATH', default=None,
+                        help='Write the results as JSON so runs can be compared')
+    args = parser.parse_args()
+
+    print(f"Generating {args.venues:,} synthetic venues...")
+    df, seconds = timed(synthetic_venues, args.venues)
+    print(f"Generated in {seconds:.2f}s")
+
+    top_venues = df.nlargest(20, 'views_numeric')
+    steps = [
+        ('price_categories (chart 2)', loop_price_category_counts, analytics.price_category_counts,
+         (df['price_numeric'].dropna(),)),
+        ('price_tier_colors (chart 3)', loop_price_tier_colors, lambda top: analytics.price_tier_colors(
+            top['price_numeric']), (top_venues,)),
+        ('event_types (chart 7)', loop_event_type_counts, analytics.event_type_counts, (df,)),
+        ('location_prices (chart 9)', loop_location_prices, analytics.location_prices, (df,)),
+    ]
+
+    report = {'venues': args.venues, 'repeat': args.repeat, 'steps': {}}
+    print(f"\n{'step':<30}{'loop ms':>12}{'vectorized ms':>15}{'speedup':>10}  match")
+    print("=" * 74)
+    for name, loop_fn, vector_fn, fn_args in steps:
+        expected, loop_seconds = timed(loop_fn, *fn_args, repeat=args.repeat)
+        result, vector_seconds = timed(vector_fn, *fn_args, repeat=args.repeat)
+        match = same_result(expected, result)
+        report['steps'][name] = {'loop_ms': loop_seconds * 1000, 'vectorized_ms': vector_seconds * 1000,
+                                 'speedup': loop_seconds / vector_seconds, 'match': match}
+        print(f"{name:<30}{loop_seconds * 1000:>12.1f}{vector_seconds * 1000:>15.1f}"
+              f"{loop_seconds / vector_seconds:>9.1f}x  {'yes' if match else 'NO'}")
+
+    _, seconds = timed(analytics.venue_aggregates, df, repeat=args.repeat)
+    report['venue_aggregates_ms'] = seconds * 1000
+    print(f"\nAll chart aggregates (analytics.venue_aggregates): {seconds * 1000:.1f} ms")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.json}")
@@ -0,0 +1,252 @@
+import argparse
+import contextlib
+import gzip
+import hashlib
+import io
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from extractors import CATEGORY_EXTRACTORS, DEFAULT_CATEGORY
+from scraper_final import ShadliqScraperFinal
+
+CATEGORIES = list(CATEGORY_EXTRACTORS)
+
+VENUES_PER_PAGE = 20
+
+
+def listing_html(page_num, num_venues, base_url, category=DEFAULT_CATEGORY):
+    """Render a listing page with the same markup as /az/{category}/{page}/.
+
+    Every category has num_venues venues of its own, numbered after the previous
+    category's; the other verticals also list venue-0 on their first page, like a
+    venue that shows up in several categories.
+    """
+    offset = CATEGORIES.index(category) * num_venues
+    start = (page_num - 1) * VENUES_PER_PAGE
+    venue_ids = [offset + i for i in range(start, min(start + VENUES_PER_PAGE, num_venues))]
+    if offset and page_num == 1:
+        venue_ids.append(0)
+    blocks = []
+    for i in venue_ids:
+        blocks.append(f'''
+        <div class="block_similar">
+          <div class="block_title">
+            <a href="{base_url}/az/venue-{i}">Venue {i}</a>
+            <p class="address-place">{30 + i % 50} AZN</p>
+            <p><i class="fa fa-map-marker"></i>{i % 9 + 1} km</p>
+          </div>
+        </div>''')
+    return f"<html><body>{''.join(blocks)}{pager_html(page_num, num_venues, category)}</body></html>"
+
+
+def pager_html(page_num, num_venues, category=DEFAULT_CATEGORY):
+    """Pager showing the pages around the current one plus the last page, like the real site"""
+    last = max(1, -(-num_venues // VENUES_PER_PAGE))
+    pages = sorted(set(range(max(1, page_num - 2), min(last, page_num + 2) + 1)) | {1, last})
+    links = ''.join(f'<li><a href="/az/{category}/{n}/">{n}</a></li>' for n in pages)
+    return f'<ul class="pagination">{links}</ul>'
+
+
+ROBOTS_TXT = "User-agent: *\nCrawl-delay: 1\nDisallow: /wp-admin/\n"
+
+
+SITE_NAV = '''
+    <header>
+      <!-- main navigation -->
+      <ul class="nav-features">
+        <li><a href="/az/saray-restoranlar/">SARAY / RESTORANLAR</a></li>
+        <li><a href="/az/gelinlikler/">GƏLİNLİKLƏR</a></li>
+        <li><a href="/az/gozellik-salonlari/">GÖZƏLLİK SALONLARI</a></li>
+        <li><a href="/az/toy-masini/">TOY MAŞINI</a></li>
+        <li><a href="/az/dekorasiya-dizayn/">DEKORASİYA &amp; DİZAYN</a></li>
+        <li><a href="/az/reqs-qruplari/">RƏQS QRUPLARI</a></li>
+      </ul>
+      <p class="slogan">Toy, Nişan, Xına və Ad günü üçün ən yaxşı məkanlar</p>
+    </header>'''
+
+
+# Per-venue halls, event types and services, so they differ from page to page like on the site
+HALLS = ['Böyük zal. Kiçik zal..VIP zal', 'Əsas zal (400 nəfər). Kiçik zal', 'Açıq havada. Şüşə zal', 'Tək zal']
+EVENTS = ['Toy, Nişan', 'Toy, Nişan, Xına', 'Ad günü', 'Toy']
+SERVICES = ['Parking', 'Live <b>music</b>', 'Dekor', 'Fotoqraf', 'Şou proqramı']
+
+
+def detail_html(i):
+    """Render a venue detail page with the fields scrape_venue_detail looks for"""
+    similar = ''.join(f'''
+      <div class="block_similar">
+        <div class="block_title"><a href="/az/venue-{j}">Venue {j}</a>
+          <p class="address-place">{30 + j % 50} AZN</p></div>
+        <img src="/uploads/fields/venue-{j}/thumbs/cover-270.jpg" alt="">
+      </div>''' for j in range(i + 1, i + 13))
+    return f'''<!DOCTYPE html>
+<html lang="az"><head>
+    <meta charset="utf-8">
+    <meta name="description" content="Venue {i} is a wedding palace in Baku.">
+    <title>Venue {i} | shadliq.az</title>
+    <style>.block_similar {{ float: left; }}</style>
+    <script>var ae_globals = {{'ajax_url' : '/wp-admin/admin-ajax.php', 'latitude' : '40.{i:04d}', 'longitude' : '49.{i:04d}'}};</script>
+</head><body class="single">
+    {SITE_NAV}
+    <h1>Venue <span>{i}</span></h1>
+    <p><i class="fa fa-phone"></i><a href="tel:055-200-{i % 100:02d}-{i % 97:02d}">055-200-{i % 100:02d}-{i % 97:02d}</a>
+       <a href="tel:+994502{i % 1000:03d}{i % 89:02d}">call</a></p>
+    <a href="mailto:venue{i}@example.az">mail</a>
+    <p><i class="fa fa-map-marker"></i> {i % 9 + 1} km, Test küç. {i} 055-200-{i % 100:02d}-{i % 97:02d}</p>
+    <p class="views">Müştəri Baxış Sayı <strong> {1000 + i * 37} </strong></p>
+    <div class="single-detail entry-content">
+      <p>Venue {i} offers spacious halls for weddings and engagements.</p>
+      <p>Short</p>
+      <p>Contact us: info@example.az for bookings and prices.</p>
+      <p>ZALLAR: {HALLS[i % len(HALLS)]}
+      TƏDBİRLƏR: {EVENTS[i % len(EVENTS)]}</p>
+    </div>
+    <ul class="services list">{''.join(f'<li>{service}</li>' for service in SERVICES[i % 3:i % 3 + 2 + i % 2])}</ul>
+    <section class="gallery-wrap">
+      <img src="/uploads/fields/venue-{i}/thumbs/photo-270.jpg">
+      <img src="/uploads/fields/venue-{i}/thumbs/photo2-270.jpg">
+      <img src="/uploads/fields/shared/thumbs/logo-270.jpg">
+      <img data-src="/lazy.jpg">
+    </section>
+    <div class="similar">{similar}</div>
+    <footer><p>&copy; shadliq.az</p><script>console.log('footer');</script></footer>
+</body></html>'''
+
+
+def image_bytes(path, name):
+    """Fake JPEG of a few tens of KB; every venue's photo2 has the same bytes, like a reused stock photo"""
+    seed = name if name == 'photo2' else path
+    block = hashlib.sha256(seed.encode()).digest()
+    return b'\xff\xd8\xff\xe0' + block * (1000 + len(path) % 500)
+
+
+def make_handler(num_venues, latency, error_rate=0.0):
+    flaky = random.Random(0)  # Same failures on every run
+    flaky_lock = threading.Lock()
+
+    class FakeShadliqHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # Keep connections alive like the real site
+        disable_nagle_algorithm = True  # Headers and body go out in separate writes
+
+        def do_GET(self):
+            time.sleep(latency)  # Simulated network + server time
+            with flaky_lock:
+                overloaded = flaky.random() < error_rate
+            if overloaded:
+                self.send_response(503)
+                self.send_header('Retry-After', '0')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            listing = re.match(r'^/az/([a-z-]+)/(\d+)/$', self.path)
+            detail = re.match(r'^/az/venue-(\d+)$', self.path)
+            image = re.match(r'^/uploads/fields/[a-z0-9-]+/([a-z0-9]+)-1200\.jpg$', self.path)
+            if self.path == '/robots.txt':
+                body = ROBOTS_TXT
+            elif listing and listing.group(1) in CATEGORIES:
+                base_url = f"http://{self.headers['Host']}"
+                body = listing_html(int(listing.group(2)), num_venues, base_url, listing.group(1))
+            elif detail and int(detail.group(1)) < num_venues * len(CATEGORIES):
+                body = detail_html(int(detail.group(1)))
+            elif image:
+                body = image_bytes(self.path, image.group(1))
+            else:
+                self.send_error(404)
+                return
+            data = body if isinstance(body, bytes) else body.encode('utf-8')
+            etag = '"%s"' % hashlib.md5(data).hexdigest()
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Type', 'image/jpeg' if image else 'text/html; charset=utf-8')
+            if 'gzip' in self.headers.get('Accept-Encoding', '') and not image:
+                data = gzip.compress(data, compresslevel=6)
+                self.send_header('Content-Encoding', 'gzip')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FakeShadliqHandler
+
+
+@contextlib.contextmanager
+def fake_server(num_venues=100, latency=0.05, error_rate=0.0):
+    """Serve a fake shadliq.az on localhost and yield its base URL.
+
+    error_rate is the fraction of requests answered with 503 and Retry-After: 0.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(num_venues, latency, error_rate))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def run_async_crawl(base_url, workers, rps, backoff=1.0):
+    """Time a full pipelined crawl with the asyncio engine"""
+    from async_engine import AsyncCrawlEngine
+
+    scraper = ShadliqScraperFinal(workers=workers, requests_per_second=rps, base_url=base_url, backoff=backoff)
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        AsyncCrawlEngine(scraper).scrape_all()
+        elapsed = time.perf_counter() - start
+    return scraper.venues, elapsed, scraper.transport.stats
+
+
+def run_detail_stage(base_url, workers, rps, backoff=1.0):
+    """Crawl every listing page then time only the detail stage"""
+    scraper = ShadliqScraperFinal(workers=workers, requests_per_second=rps, base_url=base_url, backoff=backoff)
+    with contextlib.redirect_stdout(io.StringIO()):
+        urls = scraper.discover_venue_urls()
+        start = time.perf_counter()
+        venues = list(scraper.scrape_details(urls))
+        elapsed = time.perf_counter() - start
+    return venues, elapsed, scraper.transport.stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the detail stage against a local fake server")
+    parser.add_argument('--venues', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help='Simulated server latency per request in seconds (default: 0.05)')
+    parser.add_argument('--rps', type=float, default=0,
+                        help='Rate limit in requests per second, 0 for unlimited (default: 0)')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8, 16])
+    parser.add_argument('--engine', choices=['sync', 'async'], default='sync',
+                        help='sync times the threaded detail stage, async the full pipelined crawl')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Fraction of requests the server answers with 503 (default: 0)')
+    parser.add_argument('--backoff', type=float, default=0.1,
+                        help='Seconds before the first retry (default: 0.1)')
+    args = parser.parse_args()
+    run = run_async_crawl if args.engine == 'async' else run_detail_stage
+
+    print(f"Benchmarking {args.venues} venues ({args.engine}), {args.latency * 1000:.0f} ms latency, "
+          f"rate limit: {args.rps or 'none'}, error rate: {args.error_rate:.0%}")
+    print("=" * 60)
+
+    baseline = None
+    with fake_server(args.venues, args.latency, args.error_rate) as base_url:
+        for workers in args.workers:
+            venues, elapsed, stats = run(base_url, workers, args.rps, args.backoff)
+            if baseline is None:
+                baseline = venues
+            deterministic = 'yes' if venues == baseline else 'NO'
+            print(f"  workers={workers:>2}  {len(venues) / elapsed:8.1f} pages/sec  "
+                  f"({elapsed:.2f}s, same output as first run: {deterministic}, "
+                  f"{stats.retries} retries, {len(stats.failed_urls)} failed)")
@@ -0,0 +1,103 @@
+import argparse
+import json
+import random
+import time
+from dataclasses import replace
+
+from dedup import VenueDeduplicator, jaccard
+from venue import Venue
+
+SYLLABLES = ['al', 'tun', 'sul', 'tan', 'mi', 'lord', 'ro', 'man', 'ce', 'ne', 'olit', 'ar', 'e', 'na',
+             'park', 'me', 'ri', 'di', 'an', 'bak', 'ı', 'xa', 'nov', 'şah', 'də', 'niz', 'gül', 'ay']
+STREETS = ['M. Əliyev', 'B. Çobanzadə', 'Atatürk', 'Babək pr.', 'N. Tusi', 'S.S.Axundov', 'Koroğlu Rəhimov']
+KINDS = ['Restoran', 'Saray', 'Şadlıq Sarayı', 'Hall', 'Palace']
+
+
+def synthetic_venues(num_venues, duplicate_share=0.1, seed=0):
+    """Venues with distinct names, phones and addresses, plus re-listings of some of
+    them under a new URL with the name, address and description lightly edited.
+    Returns (venues, set of (original position, duplicate position))."""
+    rng = random.Random(seed)
+    venues = []
+    for i in range(num_venues):
+        name = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+        phone = f"0{rng.choice([12, 50, 51, 55, 70])}-{rng.randint(200, 999)}-{rng.randint(10, 99)}-{rng.randint(10, 99)}"
+        address = f"{rng.choice(['8 km', '7 mkr', 'Əhmədli', 'Yasamal'])} {rng.choice(STREETS)} {rng.randint(1, 120)}"
+        description = f"☎ BİR KLİKLƏ ƏLAQƏ{phone} | {address} | QİYMƏT{rng.randint(20, 150)} azn"
+        venues.append(Venue(url=f"https://shadliq.az/az/venue-{i}", name=f"{name} {rng.choice(KINDS)}",
+                            phones=(phone,), address=address, description=description))
+
+    duplicates = set()
+    for original in rng.sample(range(num_venues), int(num_venues * duplicate_share)):
+        venue = venues[original]
+        address = venue.address.replace(' ', rng.choice([' ', ', ', '. ']), 1)
+        duplicate = replace(venue, url=f"{venue.url}-sadliq-sarayi", address=address,
+                            name=f"{venue.name.split()[0]} {rng.choice(KINDS)}")
+        if rng.random() < 0.5:
+            duplicate.description = duplicate.address
+        duplicates.add((original, len(venues)))
+        venues.append(duplicate)
+    return venues, duplicates
+
+
+def all_pairs(token_sets, threshold):
+    """Every pair compared by exact Jaccard, the O(n^2) baseline"""
+    found = set()
+    for i in range(len(token_sets)):
+        for j in range(i + 1, len(token_sets)):
+            if jaccard(token_sets[i], token_sets[j]) >= threshold:
+                found.add((i, j))
+    return found
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark MinHash/LSH duplicate detection against all-pairs Jaccard")
+    parser.add_argument('--venues', type=int, nargs='+', default=[500, 1000, 2000])
+    parser.add_argument('--threshold', type=float, default=0.5)
+    parser.add_argument('--json', metavar='PATH', default=None,
+                        help='Write the results as JSON so runs can be compared')
+    args = parser.parse_args()
+
+    report = {'threshold': args.threshold, 'runs': []}
+    print(f"{'venues':>8}{'pairs':>12}{'LSH cand.':>11}{'LSH s':>8}{'all-pairs s':>13}{'speedup':>9}"
+          f"{'recall':>8}{'planted lsh/all':>17}")
+    print("=" * 86)
+    for num_venues in args.venues:
+        venues, truth = synthetic_venues(num_venues)
+        deduplicator = VenueDeduplicator(threshold=args.threshold)
+        start = time.perf_counter()
+        groups = deduplicator.find_groups(venues)
+        lsh_seconds = time.perf_counter() - start
+
+        token_sets = deduplicator.token_sets(venues)
+        start = time.perf_counter()
+        exact = all_pairs(token_sets, args.threshold)
+        brute_seconds = time.perf_counter() - start
+
+        grouped = {}
+        for members in groups:
+            for position, _ in members:
+                grouped[position] = id(members)
+
+        def same_group(i, j):
+            return i in grouped and grouped.get(j) == grouped[i]
+
+        # Share of the pairs all-pairs finds that LSH also groups; planted duplicates found by each
+        recall = sum(same_group(i, j) for i, j in exact) / len(exact) if exact else 1.0
+        planted_lsh = sum(same_group(i, j) for i, j in truth)
+        planted_all = len(truth & exact)
+        total_pairs = len(venues) * (len(venues) - 1) // 2
+        report['runs'].append({
+            'venues': len(venues), 'pairs': total_pairs, 'candidates': deduplicator.candidate_pairs,
+            'lsh_seconds': lsh_seconds, 'all_pairs_seconds': brute_seconds,
+            'recall': recall, 'planted': len(truth), 'planted_found_lsh': planted_lsh,
+            'planted_found_all_pairs': planted_all,
+        })
+        print(f"{len(venues):>8}{total_pairs:>12,}{deduplicator.candidate_pairs:>11,}{lsh_seconds:>8.2f}"
+              f"{brute_seconds:>13.2f}{brute_seconds / lsh_seconds:>8.1f}x{recall:>8.1%}"
+              f"{f'{planted_lsh}/{planted_all}/{len(truth)}':>17}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.json}")
@@ -0,0 +1,93 @@
+import argparse
+import json
+import time
+
+import numpy as np
+
+from geo import BAKU_BOUNDS, GridIndex, haversine_km
+
+
+def synthetic_points(num_points, seed=0):
+    """Venue-like coordinates over Baku: dense clusters around a few districts plus uniform noise"""
+    rng = np.random.default_rng(seed)
+    centres = rng.uniform([40.35, 49.75], [40.50, 50.05], size=(12, 2))
+    clustered = num_points * 3 // 4
+    picks = centres[rng.integers(0, len(centres), clustered)]
+    cluster_points = picks + rng.normal(0, 0.02, size=(clustered, 2))
+    uniform = rng.uniform([BAKU_BOUNDS['lat'][0], BAKU_BOUNDS['lon'][0]],
+                          [BAKU_BOUNDS['lat'][1], BAKU_BOUNDS['lon'][1]], size=(num_points - clustered, 2))
+    points = np.vstack([cluster_points, uniform])
+    return points[:, 0], points[:, 1]
+
+
+def brute_radius(lat, lon, lats, lons, km):
+    distances = haversine_km(lat, lon, lats, lons)
+    found = np.flatnonzero(distances <= km)
+    ranked = np.argsort(distances[found], kind='stable')
+    return found[ranked], distances[found][ranked]
+
+
+def brute_nearest(lat, lon, lats, lons, n):
+    distances = haversine_km(lat, lon, lats, lons)
+    found = np.argsort(distances, kind='stable')[:n]
+    return found, distances[found]
+
+
+def timed_queries(fn, queries):
+    start = time.perf_counter()
+    results = [fn(lat, lon) for lat, lon in queries]
+    return results, time.perf_counter() - start
+
+
+def same_results(expected, results):
+    return all(np.allclose(a[1], b[1]) and set(a[0]) == set(b[0]) for a, b in zip(expected, results))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the geo grid index against brute-force haversine scans")
+    parser.add_argument('--points', type=int, default=100_000)
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--radius', type=float, default=3.0, help='Radius query size in km (default: 3)')
+    parser.add_argument('--nearest', type=int, default=10, help='N for nearest-N queries (default: 10)')
+    parser.add_argument('--cell-km', type=float, nargs='+', default=[0.25, 0.5, 1.0])
+    parser.add_argument('--json', metavar='PATH', default=None,
+                        help='Write the results as JSON so runs can be compared')
+    args = parser.parse_args()
+
+    lats, lons = synthetic_points(args.points)
+    query_lats, query_lons = synthetic_points(args.queries, seed=1)
+    queries = list(zip(query_lats, query_lons))
+    print(f"{args.points:,} points, {args.queries:,} queries: within {args.radius} km and nearest {args.nearest}")
+
+    brute = {
+        'radius': timed_queries(lambda lat, lon: brute_radius(lat, lon, lats, lons, args.radius), queries),
+        'nearest': timed_queries(lambda lat, lon: brute_nearest(lat, lon, lats, lons, args.nearest), queries),
+    }
+    report = {'points': args.points, 'queries': args.queries, 'radius_km': args.radius, 'nearest': args.nearest,
+              'brute_force': {name: args.queries / seconds for name, (_, seconds) in brute.items()}, 'grid': {}}
+
+    print(f"\n{'index':<16}{'build ms':>10}{'radius q/s':>13}{'speedup':>9}{'nearest q/s':>13}{'speedup':>9}  match")
+    print("=" * 80)
+    print(f"{'brute force':<16}{'-':>10}{args.queries / brute['radius'][1]:>13.0f}{'1.0x':>9}"
+          f"{args.queries / brute['nearest'][1]:>13.0f}{'1.0x':>9}")
+    for cell_km in args.cell_km:
+        start = time.perf_counter()
+        index = GridIndex(lats, lons, cell_km)
+        build_seconds = time.perf_counter() - start
+        radius, radius_seconds = timed_queries(lambda lat, lon: index.radius(lat, lon, args.radius), queries)
+        nearest, nearest_seconds = timed_queries(lambda lat, lon: index.nearest(lat, lon, args.nearest), queries)
+        match = same_results(brute['radius'][0], radius) and same_results(brute['nearest'][0], nearest)
+        report['grid'][f"{cell_km} km"] = {
+            'build_ms': build_seconds * 1000,
+            'radius_per_second': args.queries / radius_seconds,
+            'nearest_per_second': args.queries / nearest_seconds,
+            'match': match,
+        }
+        print(f"{f'grid {cell_km} km':<16}{build_seconds * 1000:>10.1f}{args.queries / radius_seconds:>13.0f}"
+              f"{brute['radius'][1] / radius_seconds:>8.1f}x{args.queries / nearest_seconds:>13.0f}"
+              f"{brute['nearest'][1] / nearest_seconds:>8.1f}x  {'yes' if match else 'NO'}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.json}")
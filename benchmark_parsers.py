@@ -0,0 +1,144 @@
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import resource
+import time
+from urllib.parse import urlsplit
+
+from scraper_final import ShadliqScraperFinal
+
+PARSERS = ['bs4', 'lxml']
+
+
+def load_fixtures(source):
+    """Load pages as {'listing': [(url, html), ...], 'detail': [(url, html), ...]}.
+
+    `source` is a corpus recorded with scraper_final.py --record, or a directory
+    where listing-*.html files are listing pages and every other *.html file is a
+    venue detail page. Without a source, pages from the fake server are used.
+    """
+    if source and source.endswith('.zip'):
+        from fixtures import load_corpus
+        return load_corpus(source)
+
+    fixtures = {'listing': [], 'detail': []}
+    if source:
+        for path in sorted(glob.glob(os.path.join(source, '*.html'))):
+            with open(path, 'rb') as f:
+                content = f.read()
+            name = os.path.basename(path)[:-5]
+            kind = 'listing' if name.startswith('listing-') else 'detail'
+            fixtures[kind].append((f"https://shadliq.az/az/{name}", content))
+    else:
+        from benchmark_crawl import detail_html, listing_html
+        for page_num in range(1, 6):
+            fixtures['listing'].append((f"https://shadliq.az/az/saray-restoranlar/{page_num}/",
+                                        listing_html(page_num, 100, 'https://shadliq.az').encode('utf-8')))
+        for i in range(100):
+            fixtures['detail'].append((f"https://shadliq.az/az/venue-{i}", detail_html(i).encode('utf-8')))
+    return fixtures
+
+
+def max_rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def measure(parser, source, repeat, template=False):
+    """Replay the fixtures through one parser; runs in a fresh process so peak RSS is per parser.
+    With template, boilerplate learned from the first detail pages is cut out before extraction."""
+    fixtures = load_fixtures(source)
+    # Listing links are only kept for the crawled host, so replay with the recorded one
+    first_url = (fixtures['listing'] or fixtures['detail'])[0][0]
+    parts = urlsplit(first_url)
+    scraper = ShadliqScraperFinal(parser=parser, base_url=f"{parts.scheme}://{parts.netloc}")
+    baseline_rss = max_rss_kb()
+    result = {}
+
+    listing = fixtures['listing']
+    if listing:
+        start = time.process_time()
+        for _ in range(repeat):
+            for url, content in listing:
+                scraper.parse_listing_page(content)
+        cpu = time.process_time() - start
+        result['listing_cpu_ms_per_page'] = cpu * 1000 / (len(listing) * repeat)
+
+    detail = fixtures['detail']
+    if detail and template:
+        from boilerplate import TEMPLATE_SAMPLE_PAGES, learn_template
+        scraper.template = learn_template([content for _, content in detail[:TEMPLATE_SAMPLE_PAGES]])
+        result['template_blocks'] = len(scraper.template.blocks) if scraper.template else 0
+    if detail:
+        scraper.field_times.clear()
+        start_cpu = time.process_time()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            rows = [scraper.parse_venue_detail(url, content) for url, content in detail]
+        elapsed = time.perf_counter() - start
+        cpu = time.process_time() - start_cpu
+        pages = len(detail) * repeat
+        result['detail_cpu_ms_per_page'] = cpu * 1000 / pages
+        result['detail_pages_per_sec'] = pages / elapsed
+        result['field_ms_per_page'] = {step: seconds * 1000 / pages
+                                       for step, seconds in scraper.field_times.items()}
+        counts = scraper.summary_counts(rows)
+        total = counts.pop('Total venues')
+        result['fill_rates'] = {label: count / total for label, count in counts.items()}
+        result['rows'] = rows
+
+    result['peak_rss_kb'] = max_rss_kb() - baseline_rss
+    result['pages'] = {'listing': len(listing), 'detail': len(detail)}
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded pages through the parsing backends")
+    parser.add_argument('--fixtures', default=None,
+                        help='Corpus zip from scraper_final.py --record, or a directory of *.html pages '
+                             '(default: fake pages)')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--parsers', nargs='+', choices=PARSERS, default=PARSERS)
+    parser.add_argument('--template', action='store_true',
+                        help='Learn the page template from the first detail pages and strip its boilerplate '
+                             'before extraction, as the crawler does')
+    parser.add_argument('--json', metavar='PATH', default=None,
+                        help='Write the results as JSON so runs can be compared')
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context('spawn')
+    report = {'fixtures': args.fixtures or 'fake', 'repeat': args.repeat, 'template': args.template, 'parsers': {}}
+    rows = {}
+    for name in args.parsers:
+        with ctx.Pool(1) as pool:
+            result = pool.apply(measure, (name, args.fixtures, args.repeat, args.template))
+        rows[name] = result.pop('rows', [])
+        report['parsers'][name] = result
+
+    print(f"{'parser':<8}{'listing ms/page':>17}{'detail ms/page':>16}{'pages/sec':>11}{'peak RSS +KB':>14}")
+    print("=" * 66)
+    for name, result in report['parsers'].items():
+        print(f"{name:<8}{result.get('listing_cpu_ms_per_page', 0):>17.2f}"
+              f"{result.get('detail_cpu_ms_per_page', 0):>16.2f}"
+              f"{result.get('detail_pages_per_sec', 0):>11.1f}{result['peak_rss_kb']:>14}")
+
+    for name, result in report['parsers'].items():
+        print(f"\n{name} per-step ms/page:")
+        for step, ms in sorted(result.get('field_ms_per_page', {}).items(), key=lambda item: -item[1]):
+            print(f"  - {step}: {ms:.3f}")
+
+    first = args.parsers[0]
+    print(f"\nFill rates ({first}):")
+    for label, rate in report['parsers'][first].get('fill_rates', {}).items():
+        print(f"  - {label}: {rate:.0%}")
+
+    if len(rows) == 2:
+        a, b = rows.values()
+        report['differing_rows'] = sum(1 for x, y in zip(a, b) if x != y)
+        print(f"\nDetail rows differing between parsers: {report['differing_rows']} of {len(a)}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.json}")
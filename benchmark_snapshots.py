@@ -0,0 +1,190 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from snapshots import SnapshotStore
+from storage import VenueStore
+from venue import Venue
+
+PRICES = [(25.0, 25.0), (30.0, 45.0), (40.0, 60.0), (50.0, 50.0), (60.0, 80.0)]
+
+
+def simulated_year(num_venues, days=365, seed=0):
+    """Yield (crawled_at, [Venue]) for a daily crawl: views grow at a per-venue rate (and
+    not at all some days), prices change a few times a year, and about one venue in
+    twenty is delisted or newly listed each month"""
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1, 6, tzinfo=timezone.utc)
+    state = {}
+
+    def new_venue(i):
+        state[f"https://shadliq.az/az/venue-{i}"] = {
+            'views': rng.randint(100, 20000), 'rate': rng.choice([0, 2, 10, 30, 80]),
+            'price': rng.choice(PRICES), 'listed': True}
+
+    for i in range(num_venues):
+        new_venue(i)
+    next_id = num_venues
+    for day in range(days):
+        for venue in state.values():
+            if venue['rate'] and rng.random() < 0.8:
+                venue['views'] += rng.randint(0, 2 * venue['rate'])
+            if rng.random() < 0.01:
+                venue['price'] = rng.choice(PRICES)
+            if rng.random() < 0.05 / 30:
+                venue['listed'] = not venue['listed']
+        for _ in range(sum(rng.random() < 0.05 / 30 for _ in range(num_venues))):
+            new_venue(next_id)
+            next_id += 1
+        crawled_at = (start + timedelta(days=day)).isoformat(timespec='seconds')
+        yield crawled_at, [Venue(url=url, category='saray-restoranlar', views=venue['views'],
+                                 price_min=venue['price'][0], price_max=venue['price'][1])
+                           for url, venue in state.items() if venue['listed']]
+
+
+def relisted_crawls(days=70):
+    """Crawls that stress lookups before a venue's first record in a segment: venue-0 (the
+    first row of every segment) is delisted on day 6 and relisted on day 40, venue-1 is
+    first listed on day 36, venue-2 is always listed"""
+    start = datetime(2025, 1, 1, 6, tzinfo=timezone.utc)
+    for day in range(1, days + 1):
+        listed = [2] + ([0] if day < 6 or day >= 40 else []) + ([1] if day >= 36 else [])
+        yield ((start + timedelta(days=day - 1)).isoformat(timespec='seconds'),
+               [Venue(url=f"https://shadliq.az/az/venue-{i}", category='saray-restoranlar',
+                      views=1000 * (i + 1) + 10 * day) for i in sorted(listed)])
+
+
+def same_top_growth(snapshots, history, crawled, n, windows):
+    """Whether top_growth agrees with the crawl_history self-join for every (start, end) crawl"""
+    return all([(v['url'], v['growth']) for v in snapshots.top_growth(n, crawled[start - 1], crawled[end - 1])] ==
+               [tuple(row) for row in history_top_growth(history, n, start, end)] for start, end in windows)
+
+
+def file_size(path):
+    return os.path.getsize(path) + (os.path.getsize(path + '-wal') if os.path.exists(path + '-wal') else 0)
+
+
+def history_series(store, url):
+    return store.query('SELECT crawled_at, views, price_min, price_max, status FROM crawl_history '
+                       "WHERE url = ? AND status = 'active' ORDER BY crawl_id", (url,))
+
+
+def history_top_growth(store, n, start_crawl, end_crawl):
+    """Top-N view growth as a self-join of crawl_history, the full-snapshot baseline"""
+    return store.query('''
+        SELECT e.url, e.views - s.views AS growth FROM crawl_history e
+        JOIN crawl_history s ON s.url = e.url AND s.crawl_id = ?
+        WHERE e.crawl_id = ? AND e.views IS NOT NULL AND s.views IS NOT NULL
+            AND e.status = 'active' AND s.status = 'active'
+        ORDER BY growth DESC, e.url LIMIT ?
+    ''', (start_crawl, end_crawl, n))
+
+
+def timed_queries(fn, args_list):
+    start = time.perf_counter()
+    results = [fn(*args) for args in args_list]
+    return results, (time.perf_counter() - start) / len(args_list)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the delta snapshot store against full crawl_history "
+                                                 "rows over a simulated year of daily crawls")
+    parser.add_argument('--venues', type=int, nargs='+', default=[100, 1000])
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--queries', type=int, default=100, help='Venue series queries per store (default: 100)')
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--window', type=int, default=30, help='Growth window in days (default: 30)')
+    parser.add_argument('--json', metavar='PATH', default=None,
+                        help='Write the results as JSON so runs can be compared')
+    args = parser.parse_args()
+
+    report = {'days': args.days, 'window_days': args.window, 'runs': []}
+    print(f"{'venues':>7}{'store':>15}{'MB':>8}{'B/venue/day':>13}{'write ms':>10}{'series ms':>11}"
+          f"{'top-N ms':>10}  same results")
+    print("=" * 86)
+    for num_venues in args.venues:
+        with tempfile.TemporaryDirectory() as tmp:
+            snapshots = SnapshotStore(os.path.join(tmp, 'history.sqlite'))
+            history = VenueStore(os.path.join(tmp, 'venues.sqlite'))
+            write_seconds = {'snapshots': 0.0, 'crawl_history': 0.0}
+            records = 0
+            crawled = []
+            with contextlib.redirect_stdout(io.StringIO()):
+                for crawled_at, venues in simulated_year(num_venues, args.days):
+                    records += len(venues)
+                    crawled.append(crawled_at)
+                    start = time.perf_counter()
+                    snapshots.record(venues, crawled_at)
+                    write_seconds['snapshots'] += time.perf_counter() - start
+                    start = time.perf_counter()
+                    history.save(venues)
+                    write_seconds['crawl_history'] += time.perf_counter() - start
+            for store in (snapshots, history):
+                store.conn.execute('VACUUM')
+            sizes = {'snapshots': file_size(snapshots.path), 'crawl_history': file_size(history.path)}
+            stream_bytes = snapshots.conn.execute(
+                'SELECT SUM(LENGTH(crawls) + LENGTH(views) + LENGTH(price_min) + LENGTH(price_max) '
+                '+ LENGTH(status)) FROM snapshot_segments').fetchone()[0]
+
+            urls = [row[0] for row in snapshots.conn.execute('SELECT url FROM snapshot_venues ORDER BY url')]
+            sample = [(url,) for url in random.Random(1).sample(urls, min(args.queries, len(urls)))]
+            series, series_seconds = timed_queries(snapshots.series, sample)
+            baseline, baseline_series_seconds = timed_queries(lambda url: history_series(history, url), sample)
+            # crawl_history has no rows for the days a venue was delisted
+            same_series = all([(p['views'], p['price_min']) for p in points if p['status'] == 'active'] ==
+                              [(row[1], row[2]) for row in rows] for points, rows in zip(series, baseline))
+
+            end_crawl = args.days
+            start_crawl = max(1, end_crawl - args.window)
+            window = [(args.top, crawled[start_crawl - 1], crawled[end_crawl - 1])]
+            top, top_seconds = timed_queries(snapshots.top_growth, window * 20)
+            baseline_top, baseline_top_seconds = timed_queries(
+                lambda n, *_: history_top_growth(history, n, start_crawl, end_crawl), window * 20)
+            # Plus windows starting at other crawls, some before venues listed late or relisted
+            same_top = same_top_growth(snapshots, history, crawled, args.top, [(start_crawl, end_crawl)] + [
+                (start, end) for start, end in zip(range(1, args.days, 17), range(args.days, 1, -23)) if start < end])
+
+            stats = {
+                'snapshots': (write_seconds['snapshots'], series_seconds, top_seconds),
+                'crawl_history': (write_seconds['crawl_history'], baseline_series_seconds, baseline_top_seconds),
+            }
+            run = {'venues': num_venues, 'venue_days': records, 'stream_bytes': stream_bytes,
+                   'same_series': same_series, 'same_top': same_top, 'stores': {}}
+            for name, (write, series_query, top_query) in stats.items():
+                run['stores'][name] = {'bytes': sizes[name], 'bytes_per_venue_day': sizes[name] / records,
+                                       'write_ms_per_crawl': write / args.days * 1000,
+                                       'series_ms': series_query * 1000, 'top_growth_ms': top_query * 1000}
+                print(f"{num_venues:>7}{name:>15}{sizes[name] / 1e6:>8.2f}{sizes[name] / records:>13.1f}"
+                      f"{write / args.days * 1000:>10.2f}{series_query * 1000:>11.2f}{top_query * 1000:>10.2f}"
+                      f"  {same_series and same_top if name == 'snapshots' else ''}")
+            report['runs'].append(run)
+            print(f"{'':>22}  change streams: {stream_bytes / records:.1f} bytes per venue-day")
+            snapshots.close()
+            history.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshots = SnapshotStore(os.path.join(tmp, 'history.sqlite'))
+        history = VenueStore(os.path.join(tmp, 'venues.sqlite'))
+        crawled = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for crawled_at, venues in relisted_crawls():
+                crawled.append(crawled_at)
+                snapshots.record(venues, crawled_at)
+                history.save(venues)
+        windows = [(start, end) for end in range(1, len(crawled) + 1) for start in range(1, end + 1)]
+        report['relisted_same_results'] = same_top_growth(snapshots, history, crawled, 3, windows)
+        print(f"\nDelisted, relisted and late-listed venues, {len(windows)} windows: "
+              f"same results {report['relisted_same_results']}")
+        snapshots.close()
+        history.close()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.json}")
@@ -0,0 +1,98 @@
+import argparse
+import csv
+import io
+import json
+import time
+import tracemalloc
+
+from columnar import venues_to_table
+from scraper_final import CSV_FIELDS
+from storage import VenueStore
+from venue import LIST_FIELDS, Venue, parse_float, parse_int, parse_price
+
+
+def csv_text(csv_path, num_venues):
+    """The scraper's CSV repeated up to num_venues rows, each with its own URL"""
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=CSV_FIELDS, restval='', extrasaction='ignore')
+    writer.writeheader()
+    for i in range(num_venues):
+        row = dict(rows[i % len(rows)])
+        row['url'] = f"{row['url']}-{i}"
+        writer.writerow(row)
+    return out.getvalue()
+
+
+def read_rows(text):
+    return list(csv.DictReader(io.StringIO(text)))
+
+
+def allocated(build):
+    """(result, bytes still allocated by build); timings are taken separately, without tracemalloc"""
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def parse_row(venue_data):
+    """What each consumer of a raw row had to do before its typed fields existed"""
+    return (parse_price(venue_data.get('price_per_person')), parse_int(venue_data.get('views')),
+            parse_float(venue_data.get('latitude')), parse_float(venue_data.get('longitude')),
+            [[item.strip() for item in (venue_data.get(field) or '').split(separator) if item.strip()]
+             for field, separator in LIST_FIELDS.items()])
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark memory and parse cost of raw venue dicts against Venue records")
+    parser.add_argument('--csv', default='shadliq_venues_complete.csv',
+                        help='Venue CSV whose rows are repeated (default: shadliq_venues_complete.csv)')
+    parser.add_argument('--venues', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--consumers', type=int, default=4,
+                        help='Consumers that re-parsed every raw row: SQLite, Parquet, dedup, gallery (default: 4)')
+    parser.add_argument('--json', metavar='PATH', default=None,
+                        help='Write the results as JSON so runs can be compared')
+    args = parser.parse_args()
+
+    report = {'csv': args.csv, 'consumers': args.consumers, 'runs': []}
+    print(f"{'venues':>8}{'dict B/rec':>12}{'Venue B/rec':>13}{'saved':>8}{'from_row us':>13}{'to_row us':>11}"
+          f"{'re-parse us':>13}{'SQLite+Arrow ms':>17}")
+    print("=" * 95)
+    for num_venues in args.venues:
+        text = csv_text(args.csv, num_venues)
+        rows, dict_bytes = allocated(lambda: read_rows(text))
+        venues, venue_bytes = allocated(lambda: [Venue.from_row(row) for row in read_rows(text)])
+        from_row_seconds = timed(lambda: [Venue.from_row(row) for row in rows])
+        to_row_seconds = timed(lambda: [venue.to_row() for venue in venues])
+        reparse_seconds = timed(lambda: [parse_row(row) for row in rows]) * args.consumers
+        store = VenueStore(':memory:')
+        downstream_seconds = timed(lambda: ([store.typed_row(venue) for venue in venues], venues_to_table(venues)))
+        store.close()
+
+        run = {
+            'venues': num_venues, 'dict_bytes_per_record': dict_bytes / num_venues,
+            'venue_bytes_per_record': venue_bytes / num_venues,
+            'from_row_us': from_row_seconds / num_venues * 1e6, 'to_row_us': to_row_seconds / num_venues * 1e6,
+            'reparse_us': reparse_seconds / num_venues * 1e6, 'downstream_ms': downstream_seconds * 1000,
+        }
+        report['runs'].append(run)
+        print(f"{num_venues:>8}{run['dict_bytes_per_record']:>12,.0f}{run['venue_bytes_per_record']:>13,.0f}"
+              f"{1 - venue_bytes / dict_bytes:>8.1%}{run['from_row_us']:>13.1f}{run['to_row_us']:>11.1f}"
+              f"{run['reparse_us']:>13.1f}{run['downstream_ms']:>17.1f}")
+        del rows, venues
+
+    print(f"\nre-parse: the price, views, coordinate and list parsing {args.consumers} consumers of raw rows "
+          f"each repeated, which from_row now does once")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.json}")
@@ -0,0 +1,242 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+
+import lxml.html
+from lxml import etree
+
+from fast_parser import ELEMENT_TEXT_XPATH, decode_html
+
+# Shared blocks with less text than this are kept, so labels such as "ZALLAR:" that sit
+# next to the venue's own data are never cut out
+MIN_BLOCK_CHARS = 20
+TEMPLATE_SAMPLE_PAGES = 6  # Detail pages fetched to learn a category's template
+TEMPLATE_MIN_PAGES = 3  # Fewer usable samples than this and pages are scanned whole
+TEMPLATE_MIN_SHARE = 0.8  # A block is boilerplate if it is identical on this share of the samples
+TEMPLATE_MAX_AGE = 7 * 24 * 3600  # Seconds a cached template is used before it is learned again
+
+# Elements whose content is not page text; never boilerplate, never descended into
+SKIP_TAGS = {'script', 'style', 'template'}
+
+ELEMENT_TEXT = etree.XPath(ELEMENT_TEXT_XPATH)  # Compiled once rather than on every call
+
+
+class LxmlNodes:
+    """Tree access for lxml.html documents"""
+
+    @staticmethod
+    def body(root):
+        return root.find('body') if root.tag != 'body' else root
+
+    @staticmethod
+    def children(element):
+        return [child for child in element if isinstance(child.tag, str)]
+
+    @staticmethod
+    def name(element):
+        return element.tag
+
+    @staticmethod
+    def classes(element):
+        return element.get('class', '').split()
+
+    @staticmethod
+    def text(element):
+        return ''.join(ELEMENT_TEXT(element))
+
+    @staticmethod
+    def links(element):
+        return [(e.tag, e.get('href'), e.get('src')) for e in element.iter() if isinstance(e.tag, str)]
+
+    @staticmethod
+    def remove(element):
+        element.drop_tree()  # Keeps the tail text, which belongs to the parent
+
+
+class SoupNodes:
+    """Tree access for BeautifulSoup documents, giving the same paths and hashes as LxmlNodes"""
+
+    @staticmethod
+    def body(soup):
+        return soup.body
+
+    @staticmethod
+    def children(element):
+        return element.find_all(True, recursive=False)
+
+    @staticmethod
+    def name(element):
+        return element.name
+
+    @staticmethod
+    def classes(element):
+        return element.get('class') or []
+
+    @staticmethod
+    def text(element):
+        return element.get_text()
+
+    @staticmethod
+    def links(element):
+        return [(e.name, e.get('href'), e.get('src')) for e in [element] + element.find_all(True)]
+
+    @staticmethod
+    def remove(element):
+        element.decompose()
+
+
+def step(nodes, element):
+    """Path component of an element: its tag and sorted classes, e.g. ul.menu.nav-features"""
+    return '.'.join([nodes.name(element)] + sorted(nodes.classes(element)))
+
+
+def block_text(nodes, element):
+    return ' '.join(nodes.text(element).split())
+
+
+def block_hash(nodes, element, text=None):
+    """Fingerprint of a subtree's content: its text plus every tag and link target in it"""
+    text = block_text(nodes, element) if text is None else text
+    return hashlib.sha1(repr((text, nodes.links(element))).encode('utf-8')).hexdigest()[:16]
+
+
+def walk(nodes, root, stop=None):
+    """Yield (element, path) for every element under <body>, parents first, not descending
+    below elements for which stop(element, path) is true"""
+    body = nodes.body(root)
+    if body is None:
+        return
+    stack = [(child, '') for child in reversed(nodes.children(body))]
+    while stack:
+        element, prefix = stack.pop()
+        if nodes.name(element) in SKIP_TAGS:
+            continue
+        path = prefix + step(nodes, element)
+        yield element, path
+        if stop is None or not stop(element, path):
+            stack.extend((child, path + '/') for child in reversed(nodes.children(element)))
+
+
+def page_blocks(root):
+    """(path, hash) of every element of a parsed page with enough text to be a boilerplate block"""
+    blocks = set()
+    for element, path in walk(LxmlNodes, root):
+        text = block_text(LxmlNodes, element)
+        if len(text) >= MIN_BLOCK_CHARS:
+            blocks.add((path, block_hash(LxmlNodes, element, text)))
+    return blocks
+
+
+class PageTemplate:
+    """The boilerplate of a category's detail pages: DOM subtrees, by path and content hash,
+    that are identical across the pages the template was learned from.
+
+    strip_lxml / strip_soup cut those subtrees out of a parsed page, so the site nav, the
+    slogan and the footer never reach the field extractors and the page text they scan
+    is only the venue's own region. Stripping only descends into elements on the way to
+    a template path and only hashes elements at one, so it touches a small part of the tree.
+    """
+
+    def __init__(self, blocks, pages=0, learned_at=None):
+        self.blocks = {path: set(hashes) for path, hashes in blocks.items()}
+        # Paths of the ancestors of every block, the only elements worth descending into
+        self.ancestors = {path.rsplit('/', i)[0] for path in self.blocks for i in range(1, path.count('/') + 1)}
+        self.pages = pages
+        self.learned_at = learned_at if learned_at is not None else time.time()
+
+    @property
+    def version(self):
+        """Short hash of the blocks, stored with cached rows so a new template re-extracts them"""
+        blocks = sorted((path, sorted(hashes)) for path, hashes in self.blocks.items())
+        return hashlib.sha1(json.dumps(blocks).encode('utf-8')).hexdigest()[:12]
+
+    def strip(self, nodes, root):
+        found = []
+
+        def done(element, path):
+            hashes = self.blocks.get(path)
+            if hashes and block_hash(nodes, element) in hashes:
+                found.append(element)
+                return True
+            return path not in self.ancestors
+
+        for _ in walk(nodes, root, stop=done):
+            pass
+        for element in found:
+            nodes.remove(element)
+        return len(found)
+
+    def strip_lxml(self, root):
+        """Remove the template's blocks from an lxml.html document; returns how many were removed"""
+        return self.strip(LxmlNodes, root)
+
+    def strip_soup(self, soup):
+        """Remove the template's blocks from a BeautifulSoup document; returns how many were removed"""
+        return self.strip(SoupNodes, soup)
+
+    def to_dict(self):
+        return {'pages': self.pages, 'learned_at': self.learned_at,
+                'blocks': {path: sorted(hashes) for path, hashes in sorted(self.blocks.items())}}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['blocks'], data['pages'], data['learned_at'])
+
+
+def learn_template(pages, min_share=TEMPLATE_MIN_SHARE):
+    """PageTemplate of the blocks shared by the given detail page bodies, or None if fewer
+    than TEMPLATE_MIN_PAGES of them could be parsed"""
+    counts = Counter()
+    parsed = 0
+    for content in pages:
+        try:
+            root = lxml.html.fromstring(decode_html(content))
+        except Exception as e:
+            print(f"    Could not parse a template sample page: {e}")
+            continue
+        counts.update(page_blocks(root))
+        parsed += 1
+    if parsed < TEMPLATE_MIN_PAGES:
+        return None
+
+    needed = max(2, min_share * parsed)
+    blocks = defaultdict(set)
+    for (path, digest), count in counts.items():
+        if count >= needed:
+            blocks[path].add(digest)
+    return PageTemplate(blocks, parsed)
+
+
+class TemplateCache:
+    """Learned page templates per category, kept in a JSON file between runs.
+
+    A template older than max_age is ignored, so a redesigned site is learned again.
+    """
+
+    def __init__(self, path, max_age=TEMPLATE_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        try:
+            with open(path, encoding='utf-8') as f:
+                self.templates = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.templates = {}
+
+    def get(self, category):
+        with self.lock:
+            data = self.templates.get(category)
+        if data and time.time() - data['learned_at'] < self.max_age:
+            return PageTemplate.from_dict(data)
+        return None
+
+    def put(self, category, template):
+        with self.lock:
+            self.templates[category] = template.to_dict()
+            tmp = f"{self.path}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.templates, f, indent=1, sort_keys=True)
+            os.replace(tmp, self.path)
@@ -0,0 +1,66 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from venue import format_price
+
+# Parquet columns named differently from the Venue attribute they hold
+VENUE_ATTRIBUTES = {'phone': 'phones', 'email': 'emails', 'gallery_images': 'images'}
+
+LOCATION_TYPE = pa.dictionary(pa.int32(), pa.string())
+
+VENUE_SCHEMA = pa.schema([
+    ('url', pa.string()),
+    ('category', pa.dictionary(pa.int8(), pa.string())),
+    ('name', pa.string()),
+    ('phone', pa.list_(pa.string())),
+    ('email', pa.list_(pa.string())),
+    ('address', pa.string()),
+    ('location_short', LOCATION_TYPE),
+    ('latitude', pa.float64()),
+    ('longitude', pa.float64()),
+    ('price_per_person', pa.string()),
+    ('price_min', pa.float64()),
+    ('price_max', pa.float64()),
+    ('views', pa.int64()),
+    ('description', pa.string()),
+    ('hall_names', pa.string()),
+    ('services', pa.list_(pa.string())),
+    ('event_types', pa.list_(pa.string())),
+    ('gallery_images', pa.list_(pa.string())),
+    ('meta_description', pa.string()),
+    ('status', pa.dictionary(pa.int8(), pa.string())),
+])
+
+
+def column_value(value):
+    """Empty strings and tuples are nulls, like the CSV's blanks"""
+    if isinstance(value, tuple):
+        return list(value) or None
+    return None if value == '' else value
+
+
+def venues_to_table(venues):
+    """Build an Arrow table with the typed VENUE_SCHEMA from Venue records"""
+    columns = {}
+    for field in VENUE_SCHEMA:
+        if field.name == 'price_per_person':
+            columns[field.name] = [format_price(venue.price_min, venue.price_max) or None for venue in venues]
+        else:
+            attribute = VENUE_ATTRIBUTES.get(field.name, field.name)
+            columns[field.name] = [column_value(getattr(venue, attribute)) for venue in venues]
+    return pa.table(columns, schema=VENUE_SCHEMA)
+
+
+def write_parquet(venues, filename):
+    pq.write_table(venues_to_table(venues), filename, compression='zstd')
+    print(f"Data saved successfully! {len(venues)} venues written to {filename}")
+
+
+def read_dataframe(filename):
+    """Read a venue Parquet file into pandas backed by the Arrow buffers (no object columns).
+
+    Dictionary columns become pandas categoricals, which keep the same codes/categories layout.
+    """
+    import pandas as pd
+    return pq.read_table(filename).to_pandas(
+        types_mapper=lambda arrow_type: None if pa.types.is_dictionary(arrow_type) else pd.ArrowDtype(arrow_type))
@@ -1,397 +1,588 @@
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # Charts are only saved to files, also from pool workers
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
-from collections import Counter
-import re
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import analytics
+import geo
 
 # Set style
 plt.style.use('seaborn-v0_8-darkgrid')
 sns.set_palette("husl")
 
-# Read the data
-df = pd.read_csv('shadliq_venues_complete.csv')
-
-# Data preprocessing
-df['price_numeric'] = pd.to_numeric(df['price_per_person'], errors='coerce')
-df['views_numeric'] = pd.to_numeric(df['views'], errors='coerce')
-df['latitude_numeric'] = pd.to_numeric(df['latitude'], errors='coerce')
-df['longitude_numeric'] = pd.to_numeric(df['longitude'], errors='coerce')
-
-print("Creating charts...")
-print(f"Total venues: {len(df)}")
-print(f"Venues with price: {df['price_numeric'].notna().sum()}")
-print(f"Venues with views: {df['views_numeric'].notna().sum()}")
-
-# ============================================================================
-# Chart 1: Price Distribution
-# ============================================================================
-print("\n1. Creating price distribution chart...")
-fig, ax = plt.subplots(figsize=(12, 6))
-
-prices = df['price_numeric'].dropna()
-bins = [0, 40, 60, 80, 100, 120, 150]
-ax.hist(prices, bins=bins, edgecolor='black', alpha=0.7, color='#3498db')
-
-ax.set_xlabel('Price per Person (AZN)', fontsize=12, fontweight='bold')
-ax.set_ylabel('Number of Venues', fontsize=12, fontweight='bold')
-ax.set_title('Price Distribution of Wedding Venues in Baku', fontsize=14, fontweight='bold', pad=20)
-ax.grid(axis='y', alpha=0.3)
-
-# Add statistics text
-mean_price = prices.mean()
-median_price = prices.median()
-stats_text = f'Mean: {mean_price:.1f} AZN\nMedian: {median_price:.1f} AZN\nTotal venues: {len(prices)}'
-ax.text(0.98, 0.97, stats_text, transform=ax.transAxes,
-        verticalalignment='top', horizontalalignment='right',
-        bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5),
-        fontsize=10)
-
-plt.tight_layout()
-plt.savefig('charts/01_price_distribution.png', dpi=300, bbox_inches='tight')
-plt.close()
-print(f"   Mean price: {mean_price:.1f} AZN, Median: {median_price:.1f} AZN")
-
-# ============================================================================
-# Chart 2: Price Range Categories
-# ============================================================================
-print("\n2. Creating price range categories chart...")
-fig, ax = plt.subplots(figsize=(10, 6))
-
-price_ranges = []
-for price in prices:
-    if price <= 40:
-        price_ranges.append('Budget (≤40)')
-    elif price <= 60:
-        price_ranges.append('Affordable (41-60)')
-    elif price <= 80:
-        price_ranges.append('Mid-range (61-80)')
-    elif price <= 100:
-        price_ranges.append('Premium (81-100)')
+
+def load_venues(db=None, parquet=None, csv_path='shadliq_venues_complete.csv', category='saray-restoranlar'):
+    """Read and preprocess the venue dataset once; every chart function takes the result"""
+    if db:
+        from storage import VenueStore
+        store = VenueStore(db)
+        df = store.dataframe()  # Active venues only, columns already typed
+        store.close()
+
+        # Single prices only, matching what to_numeric makes of the CSV's "40-60" ranges
+        df['price_numeric'] = df['price_min'].where(df['price_min'] == df['price_max'])
+        df['views_numeric'] = df['views']
+        df['latitude_numeric'] = df['latitude']
+        df['longitude_numeric'] = df['longitude']
+        df['event_types'] = df['event_types'].str.split(',')
+    elif parquet:
+        from columnar import read_dataframe
+        df = read_dataframe(parquet)  # Arrow-backed columns, event_types etc. are already lists
+        df = df[df['status'] != 'removed']
+
+        df['price_numeric'] = df['price_min'].where(df['price_min'] == df['price_max']).astype('float64')
+        df['views_numeric'] = df['views'].astype('float64')
+        df['latitude_numeric'] = df['latitude'].astype('float64')
+        df['longitude_numeric'] = df['longitude'].astype('float64')
     else:
-        price_ranges.append('Luxury (>100)')
-
-range_counts = pd.Series(price_ranges).value_counts()
-colors = ['#2ecc71', '#3498db', '#f39c12', '#e74c3c', '#9b59b6']
-bars = ax.bar(range(len(range_counts)), range_counts.values, color=colors, edgecolor='black', alpha=0.8)
-
-ax.set_xticks(range(len(range_counts)))
-ax.set_xticklabels(range_counts.index, rotation=45, ha='right')
-ax.set_ylabel('Number of Venues', fontsize=12, fontweight='bold')
-ax.set_title('Venues by Price Category', fontsize=14, fontweight='bold', pad=20)
-ax.grid(axis='y', alpha=0.3)
-
-# Add value labels on bars
-for bar in bars:
-    height = bar.get_height()
-    ax.text(bar.get_x() + bar.get_width()/2., height,
-            f'{int(height)}',
-            ha='center', va='bottom', fontweight='bold')
-
-plt.tight_layout()
-plt.savefig('charts/02_price_categories.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-# ============================================================================
-# Chart 3: Views Distribution (Top 20)
-# ============================================================================
-print("\n3. Creating views distribution chart...")
-fig, ax = plt.subplots(figsize=(14, 8))
-
-top_venues = df.nlargest(20, 'views_numeric')[['name', 'views_numeric', 'price_numeric']].copy()
-top_venues = top_venues.sort_values('views_numeric', ascending=True)
-
-bars = ax.barh(range(len(top_venues)), top_venues['views_numeric'], color='#e74c3c', edgecolor='black', alpha=0.7)
-
-# Color bars by price if available
-for i, (idx, row) in enumerate(top_venues.iterrows()):
-    if pd.notna(row['price_numeric']):
-        if row['price_numeric'] <= 50:
-            bars[i].set_color('#2ecc71')
-        elif row['price_numeric'] <= 80:
-            bars[i].set_color('#f39c12')
-        else:
-            bars[i].set_color('#e74c3c')
-
-ax.set_yticks(range(len(top_venues)))
-ax.set_yticklabels(top_venues['name'], fontsize=9)
-ax.set_xlabel('Number of Views', fontsize=12, fontweight='bold')
-ax.set_title('Top 20 Most Viewed Venues', fontsize=14, fontweight='bold', pad=20)
-ax.grid(axis='x', alpha=0.3)
-
-# Add legend
-from matplotlib.patches import Patch
-legend_elements = [Patch(facecolor='#2ecc71', label='Budget (≤50 AZN)'),
-                   Patch(facecolor='#f39c12', label='Mid-range (51-80 AZN)'),
-                   Patch(facecolor='#e74c3c', label='Premium (>80 AZN)')]
-ax.legend(handles=legend_elements, loc='lower right')
-
-plt.tight_layout()
-plt.savefig('charts/03_top_venues_by_views.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-# ============================================================================
-# Chart 4: Geographic Distribution (Scatter Map)
-# ============================================================================
-print("\n4. Creating geographic distribution map...")
-fig, ax = plt.subplots(figsize=(12, 10))
-
-# Filter valid coordinates
-geo_df = df[df['latitude_numeric'].notna() & df['longitude_numeric'].notna()].copy()
-
-# Create scatter plot colored by price
-scatter = ax.scatter(geo_df['longitude_numeric'], geo_df['latitude_numeric'],
-                     c=geo_df['price_numeric'], s=geo_df['views_numeric']/500,
-                     cmap='RdYlGn_r', alpha=0.6, edgecolors='black', linewidth=0.5)
-
-ax.set_xlabel('Longitude', fontsize=12, fontweight='bold')
-ax.set_ylabel('Latitude', fontsize=12, fontweight='bold')
-ax.set_title('Geographic Distribution of Venues in Baku', fontsize=14, fontweight='bold', pad=20)
-ax.grid(True, alpha=0.3)
-
-# Add colorbar
-cbar = plt.colorbar(scatter, ax=ax)
-cbar.set_label('Price (AZN)', fontsize=10, fontweight='bold')
-
-# Add legend for size
-sizes = [10000, 50000, 100000]
-labels = ['10K views', '50K views', '100K views']
-for size, label in zip(sizes, labels):
-    ax.scatter([], [], s=size/500, c='gray', alpha=0.6, edgecolors='black', label=label)
-ax.legend(scatterpoints=1, frameon=True, labelspacing=2, title='Popularity', loc='upper left')
-
-plt.tight_layout()
-plt.savefig('charts/04_geographic_distribution.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-# ============================================================================
-# Chart 5: Price vs Views Correlation
-# ============================================================================
-print("\n5. Creating price vs views correlation chart...")
-fig, ax = plt.subplots(figsize=(10, 6))
-
-# Filter data with both price and views
-corr_df = df[(df['price_numeric'].notna()) & (df['views_numeric'].notna())].copy()
-
-ax.scatter(corr_df['price_numeric'], corr_df['views_numeric'],
-           alpha=0.6, s=100, edgecolors='black', linewidth=0.5, color='#3498db')
-
-# Add trend line
-if len(corr_df) > 1:
-    z = np.polyfit(corr_df['price_numeric'], corr_df['views_numeric'], 1)
-    p = np.poly1d(z)
-    ax.plot(corr_df['price_numeric'].sort_values(), p(corr_df['price_numeric'].sort_values()),
-            "r--", alpha=0.8, linewidth=2, label=f'Trend line')
-
-ax.set_xlabel('Price per Person (AZN)', fontsize=12, fontweight='bold')
-ax.set_ylabel('Number of Views', fontsize=12, fontweight='bold')
-ax.set_title('Price vs Popularity (Views)', fontsize=14, fontweight='bold', pad=20)
-ax.grid(True, alpha=0.3)
-
-# Calculate correlation
-correlation = corr_df['price_numeric'].corr(corr_df['views_numeric'])
-ax.text(0.05, 0.95, f'Correlation: {correlation:.3f}', transform=ax.transAxes,
-        verticalalignment='top',
-        bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5),
-        fontsize=10)
-
-ax.legend()
-plt.tight_layout()
-plt.savefig('charts/05_price_vs_views.png', dpi=300, bbox_inches='tight')
-plt.close()
-print(f"   Correlation coefficient: {correlation:.3f}")
-
-# ============================================================================
-# Chart 6: Location Distribution
-# ============================================================================
-print("\n6. Creating location distribution chart...")
-fig, ax = plt.subplots(figsize=(12, 8))
-
-# Extract locations from location_short field
-locations = df['location_short'].dropna()
-location_counts = locations.value_counts().head(15)
-
-bars = ax.barh(range(len(location_counts)), location_counts.values,
-               color='#9b59b6', edgecolor='black', alpha=0.7)
-
-ax.set_yticks(range(len(location_counts)))
-ax.set_yticklabels(location_counts.index)
-ax.set_xlabel('Number of Venues', fontsize=12, fontweight='bold')
-ax.set_title('Top 15 Locations by Number of Venues', fontsize=14, fontweight='bold', pad=20)
-ax.grid(axis='x', alpha=0.3)
-
-# Add value labels
-for i, (bar, value) in enumerate(zip(bars, location_counts.values)):
-    ax.text(value, i, f' {value}', va='center', fontweight='bold')
-
-plt.tight_layout()
-plt.savefig('charts/06_location_distribution.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-# ============================================================================
-# Chart 7: Event Types Distribution
-# ============================================================================
-print("\n7. Creating event types distribution chart...")
-fig, ax = plt.subplots(figsize=(10, 6))
-
-# Parse event types
-all_events = []
-for events in df['event_types'].dropna():
-    event_list = [e.strip() for e in events.split(',')]
-    all_events.extend(event_list)
-
-event_counts = pd.Series(all_events).value_counts().head(8)
-
-bars = ax.bar(range(len(event_counts)), event_counts.values,
-              color='#e67e22', edgecolor='black', alpha=0.7)
-
-ax.set_xticks(range(len(event_counts)))
-ax.set_xticklabels(event_counts.index, rotation=45, ha='right')
-ax.set_ylabel('Number of Venues', fontsize=12, fontweight='bold')
-ax.set_title('Event Types Offered by Venues', fontsize=14, fontweight='bold', pad=20)
-ax.grid(axis='y', alpha=0.3)
-
-# Add value labels
-for bar in bars:
-    height = bar.get_height()
-    ax.text(bar.get_x() + bar.get_width()/2., height,
-            f'{int(height)}',
-            ha='center', va='bottom', fontweight='bold')
-
-plt.tight_layout()
-plt.savefig('charts/07_event_types.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-# ============================================================================
-# Chart 8: Data Completeness Overview
-# ============================================================================
-print("\n8. Creating data completeness chart...")
-fig, ax = plt.subplots(figsize=(12, 8))
-
-completeness = {}
-for col in ['name', 'phone', 'email', 'address', 'price_per_person', 'views',
-            'latitude', 'longitude', 'description', 'hall_names', 'gallery_images']:
-    if col in df.columns:
-        non_empty = df[col].notna().sum()
-        completeness[col.replace('_', ' ').title()] = (non_empty / len(df)) * 100
-
-completeness_df = pd.Series(completeness).sort_values(ascending=True)
-
-colors_map = ['#e74c3c' if x < 50 else '#f39c12' if x < 80 else '#2ecc71' for x in completeness_df.values]
-bars = ax.barh(range(len(completeness_df)), completeness_df.values, color=colors_map,
-               edgecolor='black', alpha=0.7)
-
-ax.set_yticks(range(len(completeness_df)))
-ax.set_yticklabels(completeness_df.index)
-ax.set_xlabel('Completeness (%)', fontsize=12, fontweight='bold')
-ax.set_xlim(0, 105)
-ax.set_title('Data Completeness by Field', fontsize=14, fontweight='bold', pad=20)
-ax.grid(axis='x', alpha=0.3)
-
-# Add percentage labels
-for i, (bar, value) in enumerate(zip(bars, completeness_df.values)):
-    ax.text(value + 1, i, f'{value:.1f}%', va='center', fontweight='bold')
-
-# Add legend
-from matplotlib.patches import Patch
-legend_elements = [Patch(facecolor='#e74c3c', label='<50% (Poor)'),
-                   Patch(facecolor='#f39c12', label='50-80% (Fair)'),
-                   Patch(facecolor='#2ecc71', label='>80% (Good)')]
-ax.legend(handles=legend_elements, loc='lower right')
-
-plt.tight_layout()
-plt.savefig('charts/08_data_completeness.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-# ============================================================================
-# Chart 9: Price by Location (Box Plot)
-# ============================================================================
-print("\n9. Creating price by location box plot...")
-
-# Get locations with at least 3 venues
-location_price_df = df[df['price_numeric'].notna() & df['location_short'].notna()].copy()
-location_counts = location_price_df['location_short'].value_counts()
-top_locations = location_counts[location_counts >= 3].index[:8]
-
-filtered_df = location_price_df[location_price_df['location_short'].isin(top_locations)]
-
-if len(filtered_df) > 0:
+        df = pd.read_csv(csv_path)
+        # Incremental crawls keep venues that left the site, marked as removed
+        if 'status' in df.columns:
+            df = df[df['status'] != 'removed']
+
+        # Data preprocessing
+        df['price_numeric'] = pd.to_numeric(df['price_per_person'], errors='coerce')
+        df['views_numeric'] = pd.to_numeric(df['views'], errors='coerce')
+        df['latitude_numeric'] = pd.to_numeric(df['latitude'], errors='coerce')
+        df['longitude_numeric'] = pd.to_numeric(df['longitude'], errors='coerce')
+        df['event_types'] = df['event_types'].str.split(',')
+
+    # Multi-category crawls mix in other verticals; files without the column are all venues
+    if 'category' in df.columns:
+        df = df[df['category'].isna() | (df['category'] == category)]
+    return df
+
+
+def save_chart(name):
+    """Save the current figure as chart `name`; render_chart moves it into charts/ once drawn"""
+    plt.savefig(rendering_path(name), dpi=300, bbox_inches='tight')
+
+
+def chart_price_distribution(df):
+    """Chart 1: Price Distribution"""
+    print("\n1. Creating price distribution chart...")
     fig, ax = plt.subplots(figsize=(12, 6))
 
-    # Create box plot
-    positions = []
-    data_to_plot = []
-    labels = []
-
-    for i, loc in enumerate(top_locations):
-        loc_data = filtered_df[filtered_df['location_short'] == loc]['price_numeric']
-        if len(loc_data) > 0:
-            data_to_plot.append(loc_data)
-            positions.append(i)
-            labels.append(f"{loc}\n(n={len(loc_data)})")
-
-    bp = ax.boxplot(data_to_plot, positions=positions, patch_artist=True,
-                    boxprops=dict(facecolor='#3498db', alpha=0.7),
-                    medianprops=dict(color='red', linewidth=2),
-                    whiskerprops=dict(linewidth=1.5),
-                    capprops=dict(linewidth=1.5))
-
-    ax.set_xticks(positions)
-    ax.set_xticklabels(labels, rotation=45, ha='right')
-    ax.set_ylabel('Price per Person (AZN)', fontsize=12, fontweight='bold')
-    ax.set_title('Price Distribution by Location', fontsize=14, fontweight='bold', pad=20)
+    prices = df['price_numeric'].dropna()
+    bins = [0, 40, 60, 80, 100, 120, 150]
+    ax.hist(prices, bins=bins, edgecolor='black', alpha=0.7, color='#3498db')
+
+    ax.set_xlabel('Price per Person (AZN)', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Number of Venues', fontsize=12, fontweight='bold')
+    ax.set_title('Price Distribution of Wedding Venues in Baku', fontsize=14, fontweight='bold', pad=20)
+    ax.grid(axis='y', alpha=0.3)
+
+    # Add statistics text
+    mean_price = prices.mean()
+    median_price = prices.median()
+    stats_text = f'Mean: {mean_price:.1f} AZN\nMedian: {median_price:.1f} AZN\nTotal venues: {len(prices)}'
+    ax.text(0.98, 0.97, stats_text, transform=ax.transAxes,
+            verticalalignment='top', horizontalalignment='right',
+            bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5),
+            fontsize=10)
+
+    plt.tight_layout()
+    save_chart('01_price_distribution')
+    plt.close()
+    print(f"   Mean price: {mean_price:.1f} AZN, Median: {median_price:.1f} AZN")
+
+
+def chart_price_categories(df):
+    """Chart 2: Price Range Categories"""
+    print("\n2. Creating price range categories chart...")
+    fig, ax = plt.subplots(figsize=(10, 6))
+
+    range_counts = analytics.price_category_counts(df['price_numeric'].dropna())
+    colors = ['#2ecc71', '#3498db', '#f39c12', '#e74c3c', '#9b59b6']
+    bars = ax.bar(range(len(range_counts)), range_counts.values, color=colors, edgecolor='black', alpha=0.8)
+
+    ax.set_xticks(range(len(range_counts)))
+    ax.set_xticklabels(range_counts.index, rotation=45, ha='right')
+    ax.set_ylabel('Number of Venues', fontsize=12, fontweight='bold')
+    ax.set_title('Venues by Price Category', fontsize=14, fontweight='bold', pad=20)
+    ax.grid(axis='y', alpha=0.3)
+
+    # Add value labels on bars
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height,
+                f'{int(height)}',
+                ha='center', va='bottom', fontweight='bold')
+
+    plt.tight_layout()
+    save_chart('02_price_categories')
+    plt.close()
+
+
+def chart_top_venues_by_views(df):
+    """Chart 3: Views Distribution (Top 20)"""
+    print("\n3. Creating views distribution chart...")
+    fig, ax = plt.subplots(figsize=(14, 8))
+
+    top_venues = df.nlargest(20, 'views_numeric')[['name', 'views_numeric', 'price_numeric']].copy()
+    top_venues = top_venues.sort_values('views_numeric', ascending=True)
+
+    bars = ax.barh(range(len(top_venues)), top_venues['views_numeric'], color='#e74c3c', edgecolor='black', alpha=0.7)
+
+    # Color bars by price if available
+    for bar, color in zip(bars, analytics.price_tier_colors(top_venues['price_numeric'])):
+        if color:
+            bar.set_color(color)
+
+    ax.set_yticks(range(len(top_venues)))
+    ax.set_yticklabels(top_venues['name'], fontsize=9)
+    ax.set_xlabel('Number of Views', fontsize=12, fontweight='bold')
+    ax.set_title('Top 20 Most Viewed Venues', fontsize=14, fontweight='bold', pad=20)
+    ax.grid(axis='x', alpha=0.3)
+
+    # Add legend
+    from matplotlib.patches import Patch
+    legend_elements = [Patch(facecolor='#2ecc71', label='Budget (≤50 AZN)'),
+                       Patch(facecolor='#f39c12', label='Mid-range (51-80 AZN)'),
+                       Patch(facecolor='#e74c3c', label='Premium (>80 AZN)')]
+    ax.legend(handles=legend_elements, loc='lower right')
+
+    plt.tight_layout()
+    save_chart('03_top_venues_by_views')
+    plt.close()
+
+
+def chart_geographic_distribution(df):
+    """Chart 4: Geographic Distribution (Scatter Map)"""
+    print("\n4. Creating geographic distribution map...")
+    fig, ax = plt.subplots(figsize=(12, 10))
+
+    # Real map pins only; the site's placeholder pin would stack every unmapped venue on one dot
+    geo_df = df[geo.valid_coordinates(df)].copy()
+    unmapped = len(df) - len(geo_df)
+
+    # Create scatter plot colored by price
+    scatter = ax.scatter(geo_df['longitude_numeric'], geo_df['latitude_numeric'],
+                         c=geo_df['price_numeric'], s=geo_df['views_numeric']/500,
+                         cmap='RdYlGn_r', alpha=0.6, edgecolors='black', linewidth=0.5)
+
+    ax.set_xlabel('Longitude', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Latitude', fontsize=12, fontweight='bold')
+    ax.set_title('Geographic Distribution of Venues in Baku', fontsize=14, fontweight='bold', pad=20)
+    ax.grid(True, alpha=0.3)
+    if unmapped:
+        ax.text(0.99, 0.01, f'{unmapped} of {len(df)} venues without a real map pin are not shown',
+                transform=ax.transAxes, ha='right', va='bottom', fontsize=9, style='italic')
+
+    # Add colorbar
+    cbar = plt.colorbar(scatter, ax=ax)
+    cbar.set_label('Price (AZN)', fontsize=10, fontweight='bold')
+
+    # Add legend for size
+    sizes = [10000, 50000, 100000]
+    labels = ['10K views', '50K views', '100K views']
+    for size, label in zip(sizes, labels):
+        ax.scatter([], [], s=size/500, c='gray', alpha=0.6, edgecolors='black', label=label)
+    ax.legend(scatterpoints=1, frameon=True, labelspacing=2, title='Popularity', loc='upper left')
+
+    plt.tight_layout()
+    save_chart('04_geographic_distribution')
+    plt.close()
+
+
+def chart_price_vs_views(df):
+    """Chart 5: Price vs Views Correlation"""
+    print("\n5. Creating price vs views correlation chart...")
+    fig, ax = plt.subplots(figsize=(10, 6))
+
+    # Filter data with both price and views
+    corr_df = df[(df['price_numeric'].notna()) & (df['views_numeric'].notna())].copy()
+
+    ax.scatter(corr_df['price_numeric'], corr_df['views_numeric'],
+               alpha=0.6, s=100, edgecolors='black', linewidth=0.5, color='#3498db')
+
+    # Add trend line
+    if len(corr_df) > 1:
+        z = np.polyfit(corr_df['price_numeric'], corr_df['views_numeric'], 1)
+        p = np.poly1d(z)
+        ax.plot(corr_df['price_numeric'].sort_values(), p(corr_df['price_numeric'].sort_values()),
+                "r--", alpha=0.8, linewidth=2, label=f'Trend line')
+
+    ax.set_xlabel('Price per Person (AZN)', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Number of Views', fontsize=12, fontweight='bold')
+    ax.set_title('Price vs Popularity (Views)', fontsize=14, fontweight='bold', pad=20)
+    ax.grid(True, alpha=0.3)
+
+    # Calculate correlation
+    correlation = corr_df['price_numeric'].corr(corr_df['views_numeric'])
+    ax.text(0.05, 0.95, f'Correlation: {correlation:.3f}', transform=ax.transAxes,
+            verticalalignment='top',
+            bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5),
+            fontsize=10)
+
+    ax.legend()
+    plt.tight_layout()
+    save_chart('05_price_vs_views')
+    plt.close()
+    print(f"   Correlation coefficient: {correlation:.3f}")
+
+
+def chart_location_distribution(df):
+    """Chart 6: Location Distribution"""
+    print("\n6. Creating location distribution chart...")
+    fig, ax = plt.subplots(figsize=(12, 8))
+
+    # Extract locations from location_short field
+    location_counts = analytics.location_counts(df).head(15)
+
+    bars = ax.barh(range(len(location_counts)), location_counts.values,
+                   color='#9b59b6', edgecolor='black', alpha=0.7)
+
+    ax.set_yticks(range(len(location_counts)))
+    ax.set_yticklabels(location_counts.index)
+    ax.set_xlabel('Number of Venues', fontsize=12, fontweight='bold')
+    ax.set_title('Top 15 Locations by Number of Venues', fontsize=14, fontweight='bold', pad=20)
+    ax.grid(axis='x', alpha=0.3)
+
+    # Add value labels
+    for i, (bar, value) in enumerate(zip(bars, location_counts.values)):
+        ax.text(value, i, f' {value}', va='center', fontweight='bold')
+
+    plt.tight_layout()
+    save_chart('06_location_distribution')
+    plt.close()
+
+
+def chart_event_types(df):
+    """Chart 7: Event Types Distribution"""
+    print("\n7. Creating event types distribution chart...")
+    fig, ax = plt.subplots(figsize=(10, 6))
+
+    # event_types is a list column (see load_venues)
+    event_counts = analytics.event_type_counts(df).head(8)
+
+    bars = ax.bar(range(len(event_counts)), event_counts.values,
+                  color='#e67e22', edgecolor='black', alpha=0.7)
+
+    ax.set_xticks(range(len(event_counts)))
+    ax.set_xticklabels(event_counts.index, rotation=45, ha='right')
+    ax.set_ylabel('Number of Venues', fontsize=12, fontweight='bold')
+    ax.set_title('Event Types Offered by Venues', fontsize=14, fontweight='bold', pad=20)
+    ax.grid(axis='y', alpha=0.3)
+
+    # Add value labels
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height,
+                f'{int(height)}',
+                ha='center', va='bottom', fontweight='bold')
+
+    plt.tight_layout()
+    save_chart('07_event_types')
+    plt.close()
+
+
+def chart_data_completeness(df):
+    """Chart 8: Data Completeness Overview"""
+    print("\n8. Creating data completeness chart...")
+    fig, ax = plt.subplots(figsize=(12, 8))
+
+    completeness_df = analytics.completeness(df).sort_values(ascending=True)
+    completeness_df.index = completeness_df.index.str.replace('_', ' ').str.title()
+
+    colors_map = ['#e74c3c' if x < 50 else '#f39c12' if x < 80 else '#2ecc71' for x in completeness_df.values]
+    bars = ax.barh(range(len(completeness_df)), completeness_df.values, color=colors_map,
+                   edgecolor='black', alpha=0.7)
+
+    ax.set_yticks(range(len(completeness_df)))
+    ax.set_yticklabels(completeness_df.index)
+    ax.set_xlabel('Completeness (%)', fontsize=12, fontweight='bold')
+    ax.set_xlim(0, 105)
+    ax.set_title('Data Completeness by Field', fontsize=14, fontweight='bold', pad=20)
+    ax.grid(axis='x', alpha=0.3)
+
+    # Add percentage labels
+    for i, (bar, value) in enumerate(zip(bars, completeness_df.values)):
+        ax.text(value + 1, i, f'{value:.1f}%', va='center', fontweight='bold')
+
+    # Add legend
+    from matplotlib.patches import Patch
+    legend_elements = [Patch(facecolor='#e74c3c', label='<50% (Poor)'),
+                       Patch(facecolor='#f39c12', label='50-80% (Fair)'),
+                       Patch(facecolor='#2ecc71', label='>80% (Good)')]
+    ax.legend(handles=legend_elements, loc='lower right')
+
+    plt.tight_layout()
+    save_chart('08_data_completeness')
+    plt.close()
+
+
+def chart_price_by_location(df):
+    """Chart 9: Price by Location (Box Plot)"""
+    print("\n9. Creating price by location box plot...")
+
+    # Get locations with at least 3 venues
+    location_prices = analytics.location_prices(df, min_venues=3, top=8)
+
+    if location_prices:
+        fig, ax = plt.subplots(figsize=(12, 6))
+
+        # Create box plot
+        positions = list(range(len(location_prices)))
+        data_to_plot = [loc_data for _, loc_data in location_prices]
+        labels = [f"{loc}\n(n={len(loc_data)})" for loc, loc_data in location_prices]
+
+        bp = ax.boxplot(data_to_plot, positions=positions, patch_artist=True,
+                        boxprops=dict(facecolor='#3498db', alpha=0.7),
+                        medianprops=dict(color='red', linewidth=2),
+                        whiskerprops=dict(linewidth=1.5),
+                        capprops=dict(linewidth=1.5))
+
+        ax.set_xticks(positions)
+        ax.set_xticklabels(labels, rotation=45, ha='right')
+        ax.set_ylabel('Price per Person (AZN)', fontsize=12, fontweight='bold')
+        ax.set_title('Price Distribution by Location', fontsize=14, fontweight='bold', pad=20)
+        ax.grid(axis='y', alpha=0.3)
+
+        plt.tight_layout()
+        save_chart('09_price_by_location')
+        plt.close()
+    else:
+        print("   Insufficient data for location-based price analysis")
+
+
+def chart_popularity_distribution(df):
+    """Chart 10: Popularity Distribution (Views)"""
+    print("\n10. Creating popularity distribution chart...")
+    fig, ax = plt.subplots(figsize=(10, 6))
+
+    hist_data = analytics.popularity_counts(df['views_numeric'].dropna())
+
+    colors_views = ['#ecf0f1', '#bdc3c7', '#95a5a6', '#7f8c8d', '#34495e']
+    bars = ax.bar(range(len(hist_data)), hist_data.values, color=colors_views,
+                  edgecolor='black', alpha=0.8)
+
+    ax.set_xticks(range(len(hist_data)))
+    ax.set_xticklabels(hist_data.index, rotation=45, ha='right')
+    ax.set_ylabel('Number of Venues', fontsize=12, fontweight='bold')
+    ax.set_title('Venue Popularity Distribution', fontsize=14, fontweight='bold', pad=20)
     ax.grid(axis='y', alpha=0.3)
 
+    # Add value labels
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height,
+                f'{int(height)}',
+                ha='center', va='bottom', fontweight='bold')
+
     plt.tight_layout()
-    plt.savefig('charts/09_price_by_location.png', dpi=300, bbox_inches='tight')
+    save_chart('10_popularity_distribution')
     plt.close()
-else:
-    print("   Insufficient data for location-based price analysis")
-
-# ============================================================================
-# Chart 10: Popularity Distribution (Views)
-# ============================================================================
-print("\n10. Creating popularity distribution chart...")
-fig, ax = plt.subplots(figsize=(10, 6))
-
-views = df['views_numeric'].dropna()
-bins = [0, 10000, 25000, 50000, 100000, 200000]
-labels_views = ['<10K', '10K-25K', '25K-50K', '50K-100K', '>100K']
-
-hist_data = pd.cut(views, bins=bins, labels=labels_views).value_counts().sort_index()
-
-colors_views = ['#ecf0f1', '#bdc3c7', '#95a5a6', '#7f8c8d', '#34495e']
-bars = ax.bar(range(len(hist_data)), hist_data.values, color=colors_views,
-              edgecolor='black', alpha=0.8)
-
-ax.set_xticks(range(len(hist_data)))
-ax.set_xticklabels(hist_data.index, rotation=45, ha='right')
-ax.set_ylabel('Number of Venues', fontsize=12, fontweight='bold')
-ax.set_title('Venue Popularity Distribution', fontsize=14, fontweight='bold', pad=20)
-ax.grid(axis='y', alpha=0.3)
-
-# Add value labels
-for bar in bars:
-    height = bar.get_height()
-    ax.text(bar.get_x() + bar.get_width()/2., height,
-            f'{int(height)}',
-            ha='center', va='bottom', fontweight='bold')
-
-plt.tight_layout()
-plt.savefig('charts/10_popularity_distribution.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-print("\n" + "="*60)
-print("All charts created successfully!")
-print("Charts saved in 'charts/' directory")
-print("="*60)
-
-# Generate summary statistics for README
-print("\nSUMMARY STATISTICS:")
-print(f"Total venues analyzed: {len(df)}")
-print(f"Price range: {prices.min():.0f} - {prices.max():.0f} AZN")
-print(f"Average price: {mean_price:.1f} AZN")
-print(f"Most common price range: {range_counts.index[0]}")
-print(f"Views range: {views.min():.0f} - {views.max():.0f}")
-print(f"Average views: {views.mean():.0f}")
-print(f"Most popular location: {location_counts.index[0]}")
+
+
+# Output file name (without .png) -> (chart function, DataFrame columns it reads), in rendering order.
+# The columns are hashed to decide whether a cached PNG is still current, so keep them complete.
+CHARTS = {
+    '01_price_distribution': (chart_price_distribution, ['price_numeric']),
+    '02_price_categories': (chart_price_categories, ['price_numeric']),
+    '03_top_venues_by_views': (chart_top_venues_by_views, ['name', 'views_numeric', 'price_numeric']),
+    '04_geographic_distribution': (chart_geographic_distribution,
+                                   ['latitude_numeric', 'longitude_numeric', 'price_numeric', 'views_numeric']),
+    '05_price_vs_views': (chart_price_vs_views, ['price_numeric', 'views_numeric']),
+    '06_location_distribution': (chart_location_distribution, ['location_short']),
+    '07_event_types': (chart_event_types, ['event_types']),
+    '08_data_completeness': (chart_data_completeness,
+                             ['name', 'phone', 'email', 'address', 'price_per_person', 'views', 'latitude',
+                              'longitude', 'description', 'hall_names', 'gallery_images']),
+    '09_price_by_location': (chart_price_by_location, ['price_numeric', 'location_short']),
+    '10_popularity_distribution': (chart_popularity_distribution, ['views_numeric']),
+}
+
+CHART_DIR = 'charts'
+MANIFEST_PATH = os.path.join(CHART_DIR, 'manifest.json')
+
+# Set in each pool worker so the DataFrame is handed over once, not once per chart
+worker_df = None
+
+
+def init_worker(df):
+    global worker_df
+    worker_df = df
+
+
+def chart_path(name):
+    return os.path.join(CHART_DIR, f'{name}.png')
+
+
+def rendering_path(name):
+    """Where a chart is drawn before render_chart moves it into place"""
+    return os.path.join(CHART_DIR, f'{name}.tmp.png')
+
+
+def render_chart(name, df=None):
+    """Render one chart and return (name, seconds).
+
+    The previous PNG is only replaced once the chart has returned, so one that raises keeps
+    its last good image; one that returns without drawing anything (e.g. too little data)
+    has its PNG removed.
+    """
+    start = time.perf_counter()
+    chart, _ = CHARTS[name]
+    try:
+        chart(worker_df if df is None else df)
+    except Exception:
+        plt.close('all')
+        if os.path.exists(rendering_path(name)):
+            os.remove(rendering_path(name))
+        raise
+    if os.path.exists(rendering_path(name)):
+        os.replace(rendering_path(name), chart_path(name))
+    elif os.path.exists(chart_path(name)):
+        os.remove(chart_path(name))
+    return name, time.perf_counter() - start
+
+
+def render_charts(df, names, workers=None):
+    """Render the named charts, in a process pool unless workers is 1; returns {name: seconds}"""
+    os.makedirs(CHART_DIR, exist_ok=True)
+    if not names:
+        return {}
+    workers = min(workers or os.cpu_count() or 1, len(names))
+    if workers <= 1:
+        return dict(render_chart(name, df) for name in names)
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(df,)) as executor:
+        return dict(executor.map(render_chart, names))
+
+
+def chart_hash(df, name):
+    """SHA-256 of a chart's input columns plus its rendering code (figure size, dpi, colors live there)
+    and the analytics and geo modules it aggregates with"""
+    chart, columns = CHARTS[name]
+    digest = hashlib.sha256(inspect.getsource(chart).encode('utf-8'))
+    for module in (analytics, geo):
+        digest.update(inspect.getsource(module).encode('utf-8'))
+    for column in columns:
+        values = df[column].reset_index(drop=True) if column in df.columns else pd.Series(dtype=object)
+        try:
+            hashed = pd.util.hash_pandas_object(values, index=False)
+        except TypeError:
+            # List columns: hash each item together with the row it came from
+            hashed = pd.util.hash_pandas_object(values.explode(), index=True)
+        digest.update(column.encode('utf-8'))
+        digest.update(hashed.to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def load_manifest():
+    try:
+        with open(MANIFEST_PATH, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_manifest(manifest):
+    with open(MANIFEST_PATH, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+def stale_charts(df, names, manifest, force=False):
+    """Split names into charts to render and charts whose cached PNG still matches; returns (stale, hashes)"""
+    hashes = {name: chart_hash(df, name) for name in names}
+    stale = [name for name in names
+             if force or manifest.get(name) != hashes[name]
+             or not os.path.exists(chart_path(name))]
+    return stale, hashes
+
+
+def select_charts(only):
+    """Resolve --only values ('7', '07' or '07_event_types') to chart names"""
+    if not only:
+        return list(CHARTS)
+    names = []
+    for value in only:
+        matches = [name for name in CHARTS if value in (name, name[:2], name[:2].lstrip('0'))]
+        if not matches:
+            raise ValueError(f"Unknown chart: {value} (choose from {', '.join(CHARTS)})")
+        names.extend(matches)
+    return list(dict.fromkeys(names))
+
+
+def print_summary(df):
+    """Summary statistics for the README"""
+    stats = analytics.venue_aggregates(df)
+    prices, views = stats['prices'], stats['views']
+
+    print("\nSUMMARY STATISTICS:")
+    print(f"Total venues analyzed: {len(df)}")
+    print(f"Price range: {prices['min']:.0f} - {prices['max']:.0f} AZN")
+    print(f"Average price: {prices['mean']:.1f} AZN")
+    print(f"Most common price range: {stats['price_categories'].index[0]}")
+    print(f"Views range: {views['min']:.0f} - {views['max']:.0f}")
+    print(f"Average views: {views['mean']:.0f}")
+    print(f"Most popular location: {stats['priced_locations'].index[0]}")
+    coordinates = geo.coordinate_report(df)
+    print(f"Venues with a real map pin: {coordinates['ok'] + coordinates['duplicate']} "
+          f"({coordinates['placeholder']} placeholder, {coordinates['duplicate']} sharing a pin, "
+          f"{coordinates['missing']} missing, {coordinates['out_of_area']} outside Baku)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create market analysis charts from the venue dataset")
+    parser.add_argument('--db', metavar='PATH', default=None,
+                        help='Read typed venues from this SQLite database instead of the CSV')
+    parser.add_argument('--parquet', metavar='PATH', default=None,
+                        help='Read typed venues from a Parquet export (scraper_final.py --parquet) instead of the CSV')
+    parser.add_argument('--category', default='saray-restoranlar',
+                        help='Chart this shadliq.az category of a multi-category crawl (default: saray-restoranlar)')
+    parser.add_argument('--only', nargs='+', metavar='CHART', default=None,
+                        help='Only render these charts, by number or name (e.g. --only 4 07_event_types)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Processes rendering charts in parallel (default: CPU count, 1 renders serially)')
+    parser.add_argument('--force', action='store_true',
+                        help=f'Re-render charts even if their inputs match {MANIFEST_PATH}')
+    args = parser.parse_args()
+
+    try:
+        names = select_charts(args.only)
+    except ValueError as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+    df = load_venues(db=args.db, parquet=args.parquet, category=args.category)
+    load_seconds = time.perf_counter() - start
+
+    print("Creating charts...")
+    print(f"Total venues: {len(df)}")
+    print(f"Venues with price: {df['price_numeric'].notna().sum()}")
+    print(f"Venues with views: {df['views_numeric'].notna().sum()}")
+
+    manifest = load_manifest()
+    stale, hashes = stale_charts(df, names, manifest, force=args.force)
+    for name in names:
+        if name not in stale:
+            print(f"\n{name}: inputs unchanged, keeping cached chart")
+    timings = render_charts(df, stale, workers=args.workers)
+    # Charts that render nothing (e.g. too little data) are dropped so they are retried next run
+    for name in timings:
+        if os.path.exists(chart_path(name)):
+            manifest[name] = hashes[name]
+        else:
+            manifest.pop(name, None)
+    save_manifest(manifest)
+
+    print("\n" + "="*60)
+    print("All charts created successfully!")
+    print("Charts saved in 'charts/' directory")
+    print("="*60)
+
+    print(f"\nRender time per chart (load: {load_seconds:.2f}s, {len(names) - len(stale)} cached):")
+    for name, seconds in timings.items():
+        print(f"  - {name}: {seconds:.2f}s")
+    print(f"Total wall-clock time: {time.perf_counter() - start:.2f}s")
+
+    print_summary(df)
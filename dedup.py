@@ -0,0 +1,222 @@
+import argparse
+import json
+import re
+import zlib
+from collections import defaultdict
+from dataclasses import fields
+
+import numpy as np
+
+from venue import PHONE_RE
+
+# Fields whose words are shingled into the MinHash token set, besides the phone numbers
+TEXT_FIELDS = ['name', 'address', 'description']
+
+# Azerbaijani letters folded to ASCII, so "Bayıl" and "Bayil" or "Əliyev" and "Eliyev" match
+LETTER_FOLD = str.maketrans('əıöüşçğƏIİÖÜŞÇĞ', 'eiouscgeiiouscg')
+
+WORD_RE = re.compile(r'[^\W_]+')
+
+MERSENNE_PRIME = (1 << 31) - 1
+NUM_PERM = 126
+# 42 bands of 3 rows: a pair at 0.5 Jaccard shares a bucket 99.6% of the time, at 0.2 29%
+BANDS = 42
+
+
+def normalize_text(text):
+    return (text or '').translate(LETTER_FOLD).lower()
+
+
+def phone_tokens(venue):
+    """Phone numbers of a Venue and in its description as digits without the prefix, so
+    055-277-50-50 and +994 55 277 50 50 are the same token"""
+    text = f"{', '.join(venue.phones)}\n{venue.description}"
+    return {'tel:' + ''.join(parts) for parts in PHONE_RE.findall(text)}
+
+
+def venue_tokens(venue):
+    """Character trigrams of every word of the text fields plus phone tokens.
+
+    Trigrams rather than whole words, because Azerbaijani suffixes make the same name
+    different words ("Saray", "Sarayı").
+    """
+    tokens = phone_tokens(venue)
+    for field in TEXT_FIELDS:
+        for word in WORD_RE.findall(normalize_text(getattr(venue, field))):
+            if word.isdigit():
+                tokens.add(word)  # House and km numbers stay whole
+                continue
+            padded = f" {word} "
+            tokens.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return tokens
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+class MinHasher:
+    """MinHash signatures of token sets with NUM_PERM universal hash functions (a*x + b) mod p.
+
+    Tokens are hashed with crc32 rather than hash(), so signatures are the same in every
+    process and run.
+    """
+
+    def __init__(self, num_perm=NUM_PERM, seed=1):
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+
+    def signature(self, tokens):
+        values = np.fromiter((zlib.crc32(token.encode()) & MERSENNE_PRIME for token in tokens),
+                             dtype=np.uint64, count=len(tokens))
+        # a and x are below 2**31, so a * x + b fits in 64 bits
+        return ((np.outer(values, self.a) + self.b) % MERSENNE_PRIME).min(axis=0)
+
+
+class VenueDeduplicator:
+    """Finds the same venue listed under several URLs and merges the Venue records.
+
+    Each venue becomes a set of name/address/description trigrams and phone tokens.
+    Very common tokens (the "restoran"/"sarayı" trigrams, the description's call-us
+    banner) are dropped first, since they say nothing about which venue a row is. A
+    MinHash signature per row is cut into BANDS bands; rows sharing any band bucket are
+    candidate pairs, so the work grows with the number of rows rather than with every
+    pair of them. Candidates from the same category whose exact token Jaccard reaches
+    `threshold`, and that do not list entirely different phone numbers, are joined into
+    groups, and each group keeps a listed record (the one with the most filled fields),
+    with its empty fields filled in from the rest.
+    """
+
+    def __init__(self, threshold=0.5, num_perm=NUM_PERM, bands=BANDS, max_df=0.05):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.max_df = max_df  # Tokens in more than this share of rows are ignored
+        self.hasher = MinHasher(num_perm)
+        self.candidate_pairs = 0
+
+    def token_sets(self, venues):
+        token_sets = [venue_tokens(venue) for venue in venues]
+        document_frequency = defaultdict(int)
+        for tokens in token_sets:
+            for token in tokens:
+                document_frequency[token] += 1
+        limit = max(2, self.max_df * len(token_sets))
+        common = {token for token, count in document_frequency.items() if count > limit}
+        return [tokens - common for tokens in token_sets]
+
+    def candidates(self, token_sets):
+        """Pairs (i, j), i < j, of rows that share at least one LSH band bucket"""
+        buckets = defaultdict(list)
+        for i, tokens in enumerate(token_sets):
+            if not tokens:
+                continue
+            signature = self.hasher.signature(tokens)
+            for band in range(self.bands):
+                rows = signature[band * self.rows_per_band:(band + 1) * self.rows_per_band]
+                buckets[(band, rows.tobytes())].append(i)
+        pairs = set()
+        for members in buckets.values():
+            for x in range(len(members)):
+                for y in range(x + 1, len(members)):
+                    pairs.add((members[x], members[y]))
+        return pairs
+
+    def find_groups(self, venues):
+        """Groups of rows that are the same venue, each a list of (position, best similarity)"""
+        token_sets = self.token_sets(venues)
+        pairs = self.candidates(token_sets)
+        self.candidate_pairs = len(pairs)
+
+        parent = list(range(len(venues)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        phones = [phone_tokens(venue) for venue in venues]
+        similarity = {}
+        for i, j in sorted(pairs):
+            if venues[i].category != venues[j].category:
+                continue  # A hall and a dress shop of one owner share a phone and address
+            if phones[i] and phones[j] and not phones[i] & phones[j]:
+                continue  # Separate halls at one address list their own numbers
+            score = jaccard(token_sets[i], token_sets[j])
+            if score >= self.threshold:
+                for k in (i, j):
+                    similarity[k] = max(similarity.get(k, 0.0), score)
+                parent[find(j)] = find(i)
+
+        groups = defaultdict(list)
+        for i in similarity:
+            groups[find(i)].append((i, similarity[i]))
+        return [members for members in groups.values() if len(members) > 1]
+
+    @staticmethod
+    def filled_fields(venue):
+        return sum(1 for field in fields(venue) if getattr(venue, field.name) not in (None, '', ()))
+
+    def merge_map(self, venues):
+        """[{'canonical': url, 'duplicates': [{'url', 'similarity'}]}] for every group found.
+        The canonical row is an active one if any (an --incremental crawl still holds the removed
+        rows of old slugs), then the one with the most filled fields, the earliest on a tie."""
+        merges = []
+        for members in self.find_groups(venues):
+            canonical = max(members, key=lambda m: (venues[m[0]].status == 'active',
+                                                    self.filled_fields(venues[m[0]]), -m[0]))[0]
+            merges.append({
+                'canonical': venues[canonical].url,
+                'duplicates': [{'url': venues[i].url, 'similarity': round(score, 3)}
+                               for i, score in sorted(members) if i != canonical],
+            })
+        return merges
+
+    def merge(self, venues, map_path=None):
+        """Venues with duplicates folded into their canonical record, in the original order.
+        Writes the merge map to map_path when given."""
+        merges = self.merge_map(venues)
+        by_url = {venue.url: venue for venue in venues}
+        dropped = set()
+        for group in merges:
+            canonical = by_url[group['canonical']]
+            for duplicate in group['duplicates']:
+                canonical.fill_from(by_url[duplicate['url']])
+                dropped.add(duplicate['url'])
+
+        self.print_summary(len(venues), merges)
+        if map_path:
+            with open(map_path, 'w', encoding='utf-8') as f:
+                json.dump(merges, f, ensure_ascii=False, indent=2)
+            print(f"Merge map written to {map_path}")
+        return [venue for venue in venues if venue.url not in dropped]
+
+    def print_summary(self, num_venues, merges):
+        num_duplicates = sum(len(group['duplicates']) for group in merges)
+        all_pairs = num_venues * (num_venues - 1) // 2
+        print(f"\nDeduplication: {num_venues} venues, {self.candidate_pairs} LSH candidate pairs "
+              f"(of {all_pairs} possible), {num_duplicates} duplicates in {len(merges)} groups")
+        for group in merges:
+            print(f"  - {group['canonical']}")
+            for duplicate in group['duplicates']:
+                print(f"      = {duplicate['url']} ({duplicate['similarity']:.2f})")
+
+
+if __name__ == "__main__":
+    from venue import read_csv
+
+    parser = argparse.ArgumentParser(description="Find venues listed under several URLs in a scraped CSV")
+    parser.add_argument('--csv', default='shadliq_venues_complete.csv',
+                        help='Venue CSV written by scraper_final.py (default: shadliq_venues_complete.csv)')
+    parser.add_argument('--threshold', type=float, default=0.5,
+                        help='Token Jaccard similarity at which two rows are the same venue (default: 0.5)')
+    parser.add_argument('--out', metavar='PATH', default='shadliq_merge_map.json',
+                        help='Where to write the merge map (default: shadliq_merge_map.json)')
+    args = parser.parse_args()
+
+    deduplicator = VenueDeduplicator(threshold=args.threshold)
+    deduplicator.merge(list(read_csv(args.csv)), args.out)
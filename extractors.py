@@ -0,0 +1,226 @@
+import re
+from functools import cached_property
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+# Patterns shared by the BeautifulSoup extractors below and fast_parser, compiled once at import
+LISTING_PRICE_RE = re.compile(r'(\d+(?:-\d+)?)')
+# Page links in a category's listing pager, filled in with the category slug; matched on
+# the raw bytes so it works with either parser
+PAGER_HREF_PATTERN = rb'/%s/(\d+)/'
+TEL_HREF_RE = re.compile(r'tel:')
+MAILTO_HREF_RE = re.compile(r'mailto:')
+VIEWS_LABEL_RE = re.compile(r'Müştəri\s+Baxış\s+Sayı.*')
+PHONE_NUMBER_RE = re.compile(r'(\+?994|0)[-\s]?\d{2}[-\s]?\d{3}[-\s]?\d{2}[-\s]?\d{2}')
+LATITUDE_RE = re.compile(r"'latitude'\s*:\s*'([^']+)'")
+LONGITUDE_RE = re.compile(r"'longitude'\s*:\s*'([^']+)'")
+HALLS_RE = re.compile(r'ZALLAR[:\s]*([^\n]+(?:\n[^\n]+){0,3})', re.MULTILINE)
+HALLS_END_RE = re.compile(r'TƏDBİRLƏR.*')
+DOTS_RE = re.compile(r'\.+')
+DESCRIPTION_SKIP_RE = re.compile(r'(Müştəri|Baxış|tel:|@)')
+CONTENT_CLASS_RE = re.compile('single-detail|content|description')
+SERVICE_CLASS_RE = re.compile('service|amenity|feature')
+GALLERY_CLASS_RE = re.compile('gallery|carousel')
+UPLOAD_SRC_RE = re.compile('upload')
+
+EVENT_KEYWORDS = ['Toy', 'Nişan', 'Xına', 'Ad günü', 'wedding', 'engagement']
+# One alternation with a named group per keyword, so a single scan finds them all
+EVENTS_RE = re.compile('|'.join(f'(?P<event{i}>{keyword})' for i, keyword in enumerate(EVENT_KEYWORDS)),
+                       re.IGNORECASE)
+
+
+def match_events(text):
+    """Event keywords present in text, in one pass instead of one search per keyword"""
+    found = set()
+    for match in EVENTS_RE.finditer(text):
+        found.add(EVENT_KEYWORDS[int(match.lastgroup[5:])])
+        if len(found) == len(EVENT_KEYWORDS):
+            break
+    return ', '.join(sorted(found))
+
+
+def clean_phone_href(href):
+    phone = href.replace('tel:', '').strip()
+    return phone if phone and len(phone) > 5 else ''
+
+
+def clean_email_href(href):
+    email = href.replace('mailto:', '').replace('/cdn-cgi/l/email-protection#', '').strip()
+    return email if email and '@' in email else ''
+
+
+def clean_address(text):
+    """Remove the views counter and phone numbers from the map marker paragraph"""
+    address = VIEWS_LABEL_RE.sub('', text).strip()
+    return PHONE_NUMBER_RE.sub('', address).strip()
+
+
+def extract_coordinates(script_text):
+    fields = {}
+    lat_match = LATITUDE_RE.search(script_text)
+    lon_match = LONGITUDE_RE.search(script_text)
+    if lat_match:
+        fields['latitude'] = lat_match.group(1)
+    if lon_match:
+        fields['longitude'] = lon_match.group(1)
+    return fields
+
+
+def extract_halls(page_text):
+    hall_match = HALLS_RE.search(page_text)
+    if not hall_match:
+        return ''
+    halls = hall_match.group(1).strip()
+    halls = HALLS_END_RE.sub('', halls).strip()
+    halls = DOTS_RE.sub(', ', halls).strip()
+    return halls[:200]
+
+
+def full_image_url(base_url, src):
+    """Absolute URL of the full-size image behind a gallery thumbnail"""
+    return urljoin(base_url, src).replace('/thumbs/', '/').replace('-270.jpg', '-1200.jpg')
+
+
+class DetailPage:
+    """A parsed venue detail page handed to each field extractor"""
+
+    def __init__(self, content, base_url):
+        self.soup = BeautifulSoup(content, 'html.parser')
+        self.base_url = base_url
+
+    @cached_property
+    def text(self):
+        """Whole-page text, built on first use and shared by the extractors that scan it"""
+        return self.soup.get_text()
+
+
+def text_of(element):
+    return element.get_text(strip=True) if element else ''
+
+
+def extract_name(page):
+    return {'name': text_of(page.soup.find('h1'))}
+
+
+def extract_phone(page):
+    phones = {clean_phone_href(a.get('href', '')) for a in page.soup.find_all('a', href=TEL_HREF_RE)}
+    phones.discard('')
+    return {'phone': ', '.join(sorted(phones))}
+
+
+def extract_email(page):
+    emails = {clean_email_href(a.get('href', '')) for a in page.soup.find_all('a', href=MAILTO_HREF_RE)}
+    emails.discard('')
+    return {'email': ', '.join(sorted(emails))}
+
+
+def extract_address(page):
+    marker = page.soup.find('i', class_='fa-map-marker')
+    if marker and marker.parent:
+        return {'address': clean_address(marker.parent.get_text(strip=True))}
+    return {}
+
+
+def extract_coordinates_script(page):
+    for script in page.soup.find_all('script'):
+        if script.string and 'ae_globals' in script.string:
+            return extract_coordinates(script.string)
+    return {}
+
+
+def extract_views(page):
+    for p in page.soup.find_all('p'):
+        p_text = p.get_text()
+        if 'Müştəri' in p_text and 'Baxış' in p_text:
+            strong = p.find('strong')
+            return {'views': text_of(strong)} if strong else {}
+    return {}
+
+
+def extract_hall_names(page):
+    return {'hall_names': extract_halls(page.text)}
+
+
+def extract_event_types(page):
+    return {'event_types': match_events(page.text)}
+
+
+def extract_meta_description(page):
+    meta_desc = page.soup.find('meta', {'name': 'description'})
+    if meta_desc:
+        return {'meta_description': meta_desc.get('content', '')[:500]}
+    return {}
+
+
+def extract_description(page):
+    content_div = page.soup.find('div', class_=CONTENT_CLASS_RE)
+    if not content_div:
+        return {}
+    desc_parts = []
+    for p in content_div.find_all('p', limit=5):
+        text = text_of(p)
+        if text and len(text) > 20 and not DESCRIPTION_SKIP_RE.search(text):
+            desc_parts.append(text)
+    return {'description': ' | '.join(desc_parts[:3])[:500]}
+
+
+def extract_services(page):
+    services = []
+    for ul in page.soup.find_all('ul', class_=SERVICE_CLASS_RE)[:2]:
+        for item in ul.find_all('li')[:10]:
+            text = text_of(item)
+            if text and len(text) < 100:
+                services.append(text)
+    return {'services': '; '.join(services[:15])}
+
+
+def extract_gallery_images(page):
+    images = []
+    gallery = page.soup.find(['div', 'section'], class_=GALLERY_CLASS_RE)
+    if gallery:
+        for img in gallery.find_all('img', src=True)[:15]:
+            src = img.get('src', '')
+            if src and 'upload' in src:
+                images.append(full_image_url(page.base_url, src))
+
+    if not images:
+        for img in page.soup.find_all('img', src=UPLOAD_SRC_RE)[:15]:
+            full_img_url = full_image_url(page.base_url, img.get('src', ''))
+            if full_img_url not in images:
+                images.append(full_img_url)
+
+    return {'gallery_images': '; '.join(dict.fromkeys(images))}
+
+
+# Detail page fields in extraction order: (timing step, extractor returning {field: value}).
+# To extract a new field, add its function here and its column to VENUE_FIELDS in scraper_final.
+DETAIL_EXTRACTORS = [
+    ('name', extract_name),
+    ('phone', extract_phone),
+    ('email', extract_email),
+    ('address', extract_address),
+    ('coordinates', extract_coordinates_script),
+    ('views', extract_views),
+    ('hall_names', extract_hall_names),
+    ('event_types', extract_event_types),
+    ('meta_description', extract_meta_description),
+    ('description', extract_description),
+    ('services', extract_services),
+    ('gallery_images', extract_gallery_images),
+]
+
+# Steps that only make sense on wedding venue pages; the other verticals share the rest of the layout
+VENUE_ONLY_STEPS = {'hall_names', 'event_types'}
+COMMON_EXTRACTORS = [(step, extractor) for step, extractor in DETAIL_EXTRACTORS if step not in VENUE_ONLY_STEPS]
+
+# shadliq.az verticals: listing URL slug -> detail extractors for its pages
+DEFAULT_CATEGORY = 'saray-restoranlar'
+CATEGORY_EXTRACTORS = {
+    'saray-restoranlar': DETAIL_EXTRACTORS,  # wedding palaces and restaurants
+    'gelinlikler': COMMON_EXTRACTORS,  # bridal dresses
+    'gozellik-salonlari': COMMON_EXTRACTORS,  # beauty salons
+    'toy-masini': COMMON_EXTRACTORS,  # wedding cars
+    'dekorasiya-dizayn': COMMON_EXTRACTORS,  # decoration and design
+    'reqs-qruplari': COMMON_EXTRACTORS,  # dance groups
+}
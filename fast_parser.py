@@ -0,0 +1,212 @@
+import re
+from itertools import islice
+
+import lxml.html
+from bs4 import SoupStrainer
+from bs4.dammit import UnicodeDammit
+
+from extractors import (CONTENT_CLASS_RE, DESCRIPTION_SKIP_RE, GALLERY_CLASS_RE, SERVICE_CLASS_RE,
+                        clean_address, clean_email_href, clean_phone_href, extract_coordinates,
+                        extract_halls, full_image_url, match_events)
+
+# Listing pages only need the venue cards, so skip building the rest of the tree
+LISTING_STRAINER = SoupStrainer('div', class_='block_similar')
+
+# BeautifulSoup's get_text() leaves out the contents of script, style and template tags
+PAGE_TEXT_XPATH = '//text()[not(parent::script or parent::style or parent::template)]'
+ELEMENT_TEXT_XPATH = './/text()[not(parent::script or parent::style or parent::template)]'
+
+# lxml refuses str input that declares its encoding; the bytes are already decoded by then
+XML_DECLARATION_RE = re.compile(r'\A\s*<\?xml[^>]*\?>')
+
+
+def decode_html(content):
+    """Decode response bytes, falling back to charset detection for non-UTF-8 pages"""
+    if isinstance(content, str):
+        return content
+    try:
+        return content.decode('utf-8')
+    except UnicodeDecodeError:
+        return UnicodeDammit(content).unicode_markup
+
+
+def soup_string(s):
+    """BeautifulSoup stores whitespace-only strings as a single newline or space"""
+    if s.isspace():
+        return '\n' if '\n' in s else ' '
+    return s
+
+
+def element_text(element, strip=False):
+    """Equivalent of BeautifulSoup's Tag.get_text() / get_text(strip=True)"""
+    strings = element.xpath(ELEMENT_TEXT_XPATH)
+    if strip:
+        return ''.join(s.strip() for s in strings)
+    return ''.join(soup_string(s) for s in strings)
+
+
+def has_class(element, name):
+    return name in element.get('class', '').split()
+
+
+def no_lap(step):
+    pass
+
+
+def parse_venue_lxml(venue_data, content, base_url, lap=no_lap, steps=None, template=None):
+    """Fill venue_data from a detail page with one lxml parse and one tree walk.
+
+    Produces the same values as ShadliqScraperFinal.parse_venue_detail's
+    BeautifulSoup path: every element the field extractors need is picked up
+    in a single iteration, then each field is computed from those elements.
+    lap(step) is called after each step for per-field timing. `steps` is the set of
+    extractor steps the page's category uses (see CATEGORY_EXTRACTORS); the page text
+    scan for hall_names and event_types is skipped when neither is in it. With a
+    boilerplate.PageTemplate, the site-wide blocks it lists are removed before the walk.
+    """
+    html = XML_DECLARATION_RE.sub('', decode_html(content), count=1)
+    # An empty body gives the empty record, like the BeautifulSoup path, instead of "Document is empty"
+    root = lxml.html.fromstring(html) if html.strip() else lxml.html.Element('html')
+    lap('parse')
+    if template is not None:
+        template.strip_lxml(root)
+        lap('boilerplate')
+
+    h1 = None
+    phones = set()
+    emails = set()
+    map_marker = None
+    coords_script = None
+    views_p = None
+    meta_desc = None
+    content_div = None
+    service_lists = []
+    gallery = None
+    upload_imgs = []
+
+    for el in root.iter():
+        tag = el.tag
+        if not isinstance(tag, str):
+            continue  # comments and processing instructions
+
+        if tag == 'a':
+            href = el.get('href')
+            if href:
+                if 'tel:' in href:
+                    phones.add(clean_phone_href(href))
+                if 'mailto:' in href:
+                    emails.add(clean_email_href(href))
+        elif tag == 'p':
+            if views_p is None:
+                p_text = element_text(el)
+                if 'Müştəri' in p_text and 'Baxış' in p_text:
+                    views_p = el
+        elif tag == 'img':
+            src = el.get('src')
+            if src is not None and 'upload' in src:
+                upload_imgs.append(el)
+        elif tag == 'h1':
+            if h1 is None:
+                h1 = el
+        elif tag == 'i':
+            if map_marker is None and has_class(el, 'fa-map-marker'):
+                map_marker = el
+        elif tag == 'script':
+            if coords_script is None and el.text and 'ae_globals' in el.text:
+                coords_script = el.text
+        elif tag == 'meta':
+            if meta_desc is None and el.get('name') == 'description':
+                meta_desc = el
+        elif tag == 'ul':
+            if SERVICE_CLASS_RE.search(el.get('class', '')):
+                service_lists.append(el)
+
+        if tag == 'div' and content_div is None and CONTENT_CLASS_RE.search(el.get('class', '')):
+            content_div = el
+        if tag in ('div', 'section') and gallery is None and GALLERY_CLASS_RE.search(el.get('class', '')):
+            gallery = el
+    lap('tree_walk')
+
+    # 1. Name
+    if h1 is not None:
+        venue_data['name'] = element_text(h1, strip=True)
+    lap('name')
+
+    # 2-3. Phone and email
+    phones.discard('')
+    emails.discard('')
+    venue_data['phone'] = ', '.join(sorted(phones))
+    venue_data['email'] = ', '.join(sorted(emails))
+    lap('phone')
+
+    # 4. Address
+    if map_marker is not None and map_marker.getparent() is not None:
+        venue_data['address'] = clean_address(element_text(map_marker.getparent(), strip=True))
+    lap('address')
+
+    # 5. Coordinates
+    if coords_script:
+        venue_data.update(extract_coordinates(coords_script))
+    lap('coordinates')
+
+    # 6. Views
+    if views_p is not None:
+        strong = next(views_p.iter('strong'), None)
+        if strong is not None:
+            venue_data['views'] = element_text(strong, strip=True)
+    lap('views')
+
+    if steps is None or 'hall_names' in steps or 'event_types' in steps:
+        # 7. Hall names
+        page_text = ''.join(soup_string(s) for s in root.xpath(PAGE_TEXT_XPATH))
+        lap('page_text')
+        venue_data['hall_names'] = extract_halls(page_text)
+        lap('hall_names')
+
+        # 8. Event types
+        venue_data['event_types'] = match_events(page_text)
+        lap('event_types')
+
+    # 9. Meta description
+    if meta_desc is not None:
+        venue_data['meta_description'] = meta_desc.get('content', '')[:500]
+    lap('meta_description')
+
+    # 10. Main description
+    if content_div is not None:
+        desc_parts = []
+        for p in islice(content_div.iter('p'), 5):
+            text = element_text(p, strip=True)
+            if text and len(text) > 20 and not DESCRIPTION_SKIP_RE.search(text):
+                desc_parts.append(text)
+        venue_data['description'] = ' | '.join(desc_parts[:3])[:500]
+    lap('description')
+
+    # 11. Services
+    services = []
+    for ul in service_lists[:2]:
+        for item in islice(ul.iter('li'), 10):
+            text = element_text(item, strip=True)
+            if text and len(text) < 100:
+                services.append(text)
+    venue_data['services'] = '; '.join(services[:15])
+    lap('services')
+
+    # 12. Gallery images
+    images = []
+    if gallery is not None:
+        gallery_imgs = [img for img in gallery.iter('img') if img.get('src') is not None]
+        for img in gallery_imgs[:15]:
+            src = img.get('src', '')
+            if src and 'upload' in src:
+                images.append(full_image_url(base_url, src))
+
+    if not images:
+        for img in upload_imgs[:15]:
+            full_img_url = full_image_url(base_url, img.get('src', ''))
+            if full_img_url not in images:
+                images.append(full_img_url)
+
+    venue_data['gallery_images'] = '; '.join(list(dict.fromkeys(images)))
+    lap('gallery_images')
+    return venue_data
@@ -0,0 +1,42 @@
+import json
+import threading
+import zipfile
+
+
+class FixtureRecorder:
+    """Saves raw crawl responses into a compressed zip corpus for offline benchmarks.
+
+    Pages are stored as listing/NNNN.html and detail/NNNN.html, with a manifest.json
+    mapping each file back to its URL.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.zip = zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=9)
+        self.manifest = []
+        self.seen = set()
+        self.lock = threading.Lock()
+
+    def record(self, url, kind, content):
+        with self.lock:
+            if url in self.seen:
+                return
+            self.seen.add(url)
+            name = f"{kind}/{len(self.manifest):04d}.html"
+            self.zip.writestr(name, content)
+            self.manifest.append({'name': name, 'url': url, 'kind': kind})
+
+    def close(self):
+        with self.lock:
+            self.zip.writestr('manifest.json', json.dumps(self.manifest, indent=2))
+            self.zip.close()
+        print(f"Recorded {len(self.manifest)} pages to {self.path}")
+
+
+def load_corpus(path):
+    """Load a recorded corpus as {'listing': [(url, html), ...], 'detail': [(url, html), ...]}"""
+    corpus = {'listing': [], 'detail': []}
+    with zipfile.ZipFile(path) as zf:
+        for entry in json.loads(zf.read('manifest.json')):
+            corpus[entry['kind']].append((entry['url'], zf.read(entry['name'])))
+    return corpus
@@ -0,0 +1,208 @@
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from venue import read_csv
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ImageStore:
+    """Content-addressed image files: objects/ab/<sha256>, so identical images are stored once"""
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(os.path.join(root, 'objects'), exist_ok=True)
+
+    def path(self, sha256):
+        return os.path.join(self.root, 'objects', sha256[:2], sha256)
+
+    def has(self, sha256):
+        return os.path.exists(self.path(sha256))
+
+    def save_stream(self, chunks):
+        """Write chunks to the store while hashing them; returns (sha256, size, stored),
+        where stored is False if an identical image was already there"""
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+            sha256 = digest.hexdigest()
+            path = self.path(sha256)
+            if os.path.exists(path):
+                os.remove(tmp)
+                return sha256, size, False
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp, path)
+            return sha256, size, True
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+
+class GalleryDownloader:
+    """Downloads every venue's gallery_images into an ImageStore.
+
+    Each image URL is fetched once per run however many venues list it, with
+    If-None-Match / If-Modified-Since from the previous run's manifest so unchanged
+    images cost a 304. Bodies stream to disk through the scraper's Transport (shared
+    rate limit, retries) with `workers` downloads in flight. The manifest maps venue URL
+    to image hashes and image URL to hash, size and validators.
+    """
+
+    OUTCOMES = ['downloaded', 'duplicate_content', 'not_modified', 'failed']
+
+    def __init__(self, transport, root='gallery', workers=4):
+        self.transport = transport
+        self.store = ImageStore(root)
+        self.workers = max(1, workers)
+        self.manifest_path = os.path.join(root, 'manifest.json')
+        manifest = self.load_manifest()
+        self.images = manifest['images']  # image url -> {'sha256', 'bytes', 'etag', 'last_modified'}
+        self.venues = manifest['venues']  # venue url -> [sha256, ...]
+        self.lock = threading.Lock()
+        self.outcomes = dict.fromkeys(self.OUTCOMES, 0)
+        self.bytes_downloaded = 0
+        self.bytes_saved = {'shared_url': 0, 'duplicate_content': 0, 'not_modified': 0}
+        self.shared_urls = 0
+        self.elapsed = 0.0
+
+    def load_manifest(self):
+        try:
+            with open(self.manifest_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {'images': {}, 'venues': {}}
+
+    def save_manifest(self):
+        tmp = f"{self.manifest_path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'images': self.images, 'venues': self.venues}, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.manifest_path)
+
+    def count(self, outcome, saved=0, downloaded=0):
+        with self.lock:
+            self.outcomes[outcome] += 1
+            self.bytes_downloaded += downloaded
+            if saved:
+                self.bytes_saved[outcome] += saved
+
+    def fetch_image(self, image_url):
+        """Bring one image into the store; returns its manifest entry, or None if it failed"""
+        known = self.images.get(image_url)
+        headers = {}
+        if known and self.store.has(known['sha256']):
+            if known.get('etag'):
+                headers['If-None-Match'] = known['etag']
+            if known.get('last_modified'):
+                headers['If-Modified-Since'] = known['last_modified']
+
+        try:
+            response = self.transport.get(image_url, headers=headers, stream=True)
+            with response:
+                if response.status_code == 304 and headers:
+                    self.count('not_modified', saved=known['bytes'])
+                    return known
+                response.raise_for_status()
+                sha256, size, stored = self.store.save_stream(response.iter_content(CHUNK_SIZE))
+                wire_bytes = response.raw.tell()
+        except Exception as e:
+            print(f"    Error downloading image {image_url}: {e}")
+            self.count('failed')
+            return None
+
+        if stored:
+            self.count('downloaded', downloaded=wire_bytes)
+        else:
+            self.count('duplicate_content', saved=size, downloaded=wire_bytes)
+        return {'sha256': sha256, 'bytes': size, 'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified')}
+
+    def fetch_all(self, image_urls):
+        """Fetch image URLs with a bounded pool, yielding (url, entry) in input order"""
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            in_flight = deque()
+            for image_url in image_urls:
+                in_flight.append((image_url, executor.submit(self.fetch_image, image_url)))
+                if len(in_flight) >= self.workers * 2:
+                    image_url, future = in_flight.popleft()
+                    yield image_url, future.result()
+            while in_flight:
+                image_url, future = in_flight.popleft()
+                yield image_url, future.result()
+
+    def download(self, venues):
+        """Download the galleries (Venue.images) of Venue records"""
+        galleries = {venue.url: venue.images for venue in venues}
+        references = [image_url for urls in galleries.values() for image_url in urls]
+        unique_urls = list(dict.fromkeys(references))
+        self.shared_urls = len(references) - len(unique_urls)
+        print(f"\nDownloading {len(unique_urls)} gallery images for {len(galleries)} venues "
+              f"({self.shared_urls} more references to images another venue also lists) "
+              f"with {self.workers} worker(s)...")
+
+        start = time.perf_counter()
+        fetched = {}
+        for i, (image_url, entry) in enumerate(self.fetch_all(unique_urls), 1):
+            if entry:
+                fetched[image_url] = self.images[image_url] = entry
+            if i % 100 == 0:
+                print(f"  [{i}/{len(unique_urls)}] images")
+        self.elapsed = time.perf_counter() - start
+
+        # Every further venue listing an image saved its download
+        seen = set()
+        for image_url in references:
+            if image_url in seen and image_url in fetched:
+                self.bytes_saved['shared_url'] += fetched[image_url]['bytes']
+            seen.add(image_url)
+        # Venues point at the hashes of the images that made it; failed ones are retried next run
+        for venue_url, urls in galleries.items():
+            self.venues[venue_url] = [fetched[url]['sha256'] for url in urls if url in fetched]
+        self.save_manifest()
+        self.print_summary(len(unique_urls))
+
+    def print_summary(self, num_images):
+        rate = num_images / self.elapsed if self.elapsed else 0.0
+        mb_per_second = self.bytes_downloaded / 1e6 / self.elapsed if self.elapsed else 0.0
+        print(f"\nGallery: {num_images} images in {self.elapsed:.1f}s ({rate:.1f} images/sec, "
+              f"{mb_per_second:.2f} MB/s), {self.bytes_downloaded / 1e6:.1f} MB downloaded")
+        for outcome in self.OUTCOMES:
+            print(f"  - {outcome}: {self.outcomes[outcome]}")
+        print(f"  - bytes saved: {sum(self.bytes_saved.values()) / 1e6:.1f} MB "
+              f"({self.bytes_saved['shared_url'] / 1e6:.1f} MB by {self.shared_urls} shared URLs, "
+              f"{self.bytes_saved['duplicate_content'] / 1e6:.1f} MB of duplicate content not stored again, "
+              f"{self.bytes_saved['not_modified'] / 1e6:.1f} MB not modified)")
+        print(f"Manifest written to {self.manifest_path}")
+
+
+if __name__ == "__main__":
+    from scraper_final import TokenBucket
+    from transport import Transport
+
+    parser = argparse.ArgumentParser(description="Download venue gallery images into a content-addressed store")
+    parser.add_argument('--csv', default='shadliq_venues_complete.csv',
+                        help='Venue CSV written by scraper_final.py (default: shadliq_venues_complete.csv)')
+    parser.add_argument('--dir', default='gallery',
+                        help='Image store and manifest directory (default: gallery)')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Concurrent downloads (default: 4)')
+    parser.add_argument('--rps', type=float, default=0.66,
+                        help='Global request budget in requests per second (default: 0.66)')
+    args = parser.parse_args()
+
+    transport = Transport(pool_size=args.workers, rate_limiter=TokenBucket(args.rps))
+    GalleryDownloader(transport, args.dir, args.workers).download(read_csv(args.csv))
+    transport.stats.print_summary()
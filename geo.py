@@ -0,0 +1,223 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# Coordinates shadliq.az puts in ae_globals when a venue has no map pin (central Baku)
+PLACEHOLDER_COORDINATES = [(40.40926169999999, 49.86709240000005)]
+
+# Greater Baku and the Absheron peninsula; anything outside is a data error for this site
+BAKU_BOUNDS = {'lat': (40.0, 40.8), 'lon': (49.3, 50.6)}
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Coordinate quality flags, in the order they are checked
+COORDINATE_FLAGS = ['missing', 'placeholder', 'out_of_area', 'duplicate', 'ok']
+
+
+def coordinate_flags(lat, lon, placeholders=PLACEHOLDER_COORDINATES, bounds=BAKU_BOUNDS):
+    """Flag each coordinate pair as missing, placeholder, out_of_area, duplicate (shared by
+    another venue) or ok, vectorized over the arrays"""
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    missing = np.isnan(lat) | np.isnan(lon)
+    placeholder = np.zeros(len(lat), dtype=bool)
+    for placeholder_lat, placeholder_lon in placeholders:
+        placeholder |= np.isclose(lat, placeholder_lat, rtol=0, atol=1e-7) & \
+            np.isclose(lon, placeholder_lon, rtol=0, atol=1e-7)
+    out_of_area = ~missing & ((lat < bounds['lat'][0]) | (lat > bounds['lat'][1]) |
+                              (lon < bounds['lon'][0]) | (lon > bounds['lon'][1]))
+    # Rounded to ~1 m, so the same pin written with different float noise still matches
+    pins = pd.DataFrame({'lat': lat.round(5), 'lon': lon.round(5)})
+    duplicate = pins.duplicated(keep=False).to_numpy() & ~missing
+
+    conditions = [missing, placeholder, out_of_area, duplicate]
+    return np.select(conditions, COORDINATE_FLAGS[:-1], default='ok')
+
+
+def valid_coordinates(df):
+    """Boolean mask of rows in a load_venues frame whose coordinates can be mapped"""
+    flags = coordinate_flags(df['latitude_numeric'], df['longitude_numeric'])
+    return pd.Series(np.isin(flags, ['ok', 'duplicate']), index=df.index)
+
+
+def haversine_km(lat, lon, lats, lons):
+    """Great-circle distance in km from one point to arrays of points"""
+    lat, lon, lats, lons = (np.radians(value) for value in (lat, lon, lats, lons))
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class GridIndex:
+    """Uniform grid over lat/lon points for radius and nearest-N queries.
+
+    Points are projected onto a flat km plane around their mean latitude and bucketed
+    into square cells of cell_km. A query visits only the cells that can hold an
+    answer, widened by how much the projection can stretch distances over the indexed
+    latitudes (about 1% across Baku), and ranks those candidates by exact haversine
+    distance. Query results are positions into the input arrays.
+    """
+
+    def __init__(self, lat, lon, cell_km=0.5):
+        self.lat = np.asarray(lat, dtype=float)
+        self.lon = np.asarray(lon, dtype=float)
+        self.cell_km = cell_km
+        self.origin_lat = float(np.mean(self.lat)) if len(self.lat) else 0.0
+        self.km_per_lon = np.radians(1) * EARTH_RADIUS_KM * np.cos(np.radians(self.origin_lat))
+        self.km_per_lat = np.radians(1) * EARTH_RADIUS_KM
+        self.max_abs_lat = float(np.abs(self.lat).max()) if len(self.lat) else 0.0
+
+        cx, cy = self.cells(self.lat, self.lon)
+        self.min_cx, self.min_cy = (cx.min(), cy.min()) if len(cx) else (0, 0)
+        self.max_cx, self.max_cy = (cx.max(), cy.max()) if len(cx) else (0, 0)
+        self.width = self.max_cy - self.min_cy + 1
+        keys = self.key(cx, cy)
+        # Points sorted by cell; each occupied cell is a slice of self.order
+        self.order = np.argsort(keys, kind='stable')
+        self.cell_keys, cell_starts = np.unique(keys[self.order], return_index=True)
+        # Where each occupied cell's points start in self.order, plus the end of the last one
+        self.point_starts = np.append(cell_starts, len(self.order))
+
+    def cells(self, lat, lon):
+        x = np.asarray(lon, dtype=float) * self.km_per_lon
+        y = np.asarray(lat, dtype=float) * self.km_per_lat
+        return np.floor(x / self.cell_km).astype(np.int64), np.floor(y / self.cell_km).astype(np.int64)
+
+    def key(self, cx, cy):
+        return (cx - self.min_cx) * self.width + (cy - self.min_cy)
+
+    def stretch(self, lat):
+        """Upper bound on projected / true distance for queries from lat"""
+        worst_lat = np.radians(min(89.0, max(self.max_abs_lat, abs(lat))))
+        return np.cos(np.radians(self.origin_lat)) / np.cos(worst_lat) * 1.001
+
+    def __len__(self):
+        return len(self.lat)
+
+    def candidates(self, cx, cy, ring_min, ring_max):
+        """Point positions in the cells between two square rings around (cx, cy), inclusive.
+
+        Cells of one grid column have consecutive keys, so each column contributes one
+        or two slices of self.order rather than one per cell.
+        """
+        x0, x1 = max(cx - ring_max, self.min_cx), min(cx + ring_max, self.max_cx)
+        columns, lows, highs = [], [], []
+        for x in range(x0, x1 + 1):
+            if abs(x - cx) >= ring_min:
+                spans = [(cy - ring_max, cy + ring_max)]
+            else:
+                # Inside the inner ring only the top and bottom strips are new
+                spans = [(cy - ring_max, cy - ring_min), (cy + ring_min, cy + ring_max)]
+            for y0, y1 in spans:
+                y0, y1 = max(y0, self.min_cy), min(y1, self.max_cy)
+                if y0 <= y1:
+                    columns.append(x)
+                    lows.append(y0)
+                    highs.append(y1)
+        if not columns:
+            return np.empty(0, dtype=np.int64)
+        columns = np.array(columns)
+        first = np.searchsorted(self.cell_keys, self.key(columns, np.array(lows)))
+        last = np.searchsorted(self.cell_keys, self.key(columns, np.array(highs)), side='right')
+        starts, ends = self.point_starts[first], self.point_starts[last]
+        return np.concatenate([self.order[a:b] for a, b in zip(starts, ends) if b > a] or
+                              [np.empty(0, dtype=np.int64)])
+
+    def radius(self, lat, lon, km):
+        """(positions, distances in km) of points within km of (lat, lon), nearest first"""
+        cx, cy = (int(c) for c in self.cells(lat, lon))
+        rings = int(np.ceil(km * self.stretch(lat) / self.cell_km))
+        found = self.candidates(cx, cy, 0, rings)
+        distances = haversine_km(lat, lon, self.lat[found], self.lon[found])
+        keep = distances <= km
+        found, distances = found[keep], distances[keep]
+        ranked = np.argsort(distances, kind='stable')
+        return found[ranked], distances[ranked]
+
+    def nearest(self, lat, lon, n=5):
+        """(positions, distances in km) of the n points nearest (lat, lon), nearest first"""
+        n = min(n, len(self))
+        if not n:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        cx, cy = (int(c) for c in self.cells(lat, lon))
+        # Rings needed before every point has been seen, from the query cell to the far corner
+        last_ring = max(abs(cx - self.min_cx), abs(cx - self.max_cx), abs(cy - self.min_cy), abs(cy - self.max_cy))
+        stretch = self.stretch(lat)
+        found = np.empty(0, dtype=np.int64)
+        distances = np.empty(0)
+        # Start at the first ring that reaches the grid, for query points outside it
+        ring = max(0, self.min_cx - cx, cx - self.max_cx, self.min_cy - cy, cy - self.max_cy)
+        while True:
+            new = self.candidates(cx, cy, ring, ring)
+            found = np.concatenate([found, new])
+            distances = np.concatenate([distances, haversine_km(lat, lon, self.lat[new], self.lon[new])])
+            # Anything in rings not yet visited is at least this far away
+            reach = ring * self.cell_km / stretch
+            if ring >= last_ring or np.count_nonzero(distances <= reach) >= n:
+                break
+            ring += 1
+        ranked = np.argsort(distances, kind='stable')[:n]
+        return found[ranked], distances[ranked]
+
+
+class VenueGeo:
+    """Spatial queries over a load_venues frame, indexing only venues with real coordinates"""
+
+    def __init__(self, df, cell_km=0.5):
+        self.df = df[valid_coordinates(df)]
+        self.index = GridIndex(self.df['latitude_numeric'], self.df['longitude_numeric'], cell_km)
+
+    def rows(self, positions, distances):
+        rows = self.df.iloc[positions].copy()
+        rows['distance_km'] = distances
+        return rows
+
+    def within(self, lat, lon, km, max_price=None):
+        """Venues within km of a point, nearest first, optionally at most max_price AZN per person"""
+        rows = self.rows(*self.index.radius(lat, lon, km))
+        if max_price is not None:
+            rows = rows[rows['price_numeric'] <= max_price]
+        return rows
+
+    def nearest(self, lat, lon, n=5):
+        return self.rows(*self.index.nearest(lat, lon, n))
+
+
+def coordinate_report(df):
+    """Venue count per coordinate flag, in COORDINATE_FLAGS order"""
+    flags = pd.Series(coordinate_flags(df['latitude_numeric'], df['longitude_numeric']))
+    return flags.value_counts().reindex(COORDINATE_FLAGS, fill_value=0)
+
+
+if __name__ == "__main__":
+    from create_charts import load_venues
+
+    parser = argparse.ArgumentParser(description="Coordinate checks and spatial queries over the venue dataset")
+    parser.add_argument('--db', metavar='PATH', default=None)
+    parser.add_argument('--parquet', metavar='PATH', default=None)
+    parser.add_argument('--category', default='saray-restoranlar')
+    parser.add_argument('--near', nargs=2, type=float, metavar=('LAT', 'LON'), default=None,
+                        help='Query point, e.g. --near 40.3777 49.8920')
+    parser.add_argument('--radius', type=float, default=None, help='Venues within this many km of --near')
+    parser.add_argument('--max-price', type=float, default=None, help='With --radius, at most this AZN per person')
+    parser.add_argument('--nearest', type=int, default=5, help='Without --radius, the N venues nearest --near')
+    args = parser.parse_args()
+
+    df = load_venues(db=args.db, parquet=args.parquet, category=args.category)
+    print(f"Coordinate quality for {len(df)} venues:")
+    for flag, count in coordinate_report(df).items():
+        print(f"  - {flag}: {count}")
+
+    if args.near:
+        geo = VenueGeo(df)
+        lat, lon = args.near
+        if args.radius is not None:
+            rows = geo.within(lat, lon, args.radius, args.max_price)
+            print(f"\n{len(rows)} venues within {args.radius} km"
+                  + (f" at most {args.max_price:.0f} AZN:" if args.max_price is not None else ":"))
+        else:
+            rows = geo.nearest(lat, lon, args.nearest)
+            print(f"\n{len(rows)} nearest venues:")
+        for _, row in rows.iterrows():
+            price = f"{row['price_numeric']:.0f} AZN" if pd.notna(row['price_numeric']) else 'no price'
+            print(f"  - {row['name']}: {row['distance_km']:.2f} km, {price}")
@@ -0,0 +1,135 @@
+import json
+import sqlite3
+import threading
+import time
+
+
+class HttpCache:
+    """Persistent conditional-GET cache keyed by URL, stored in a SQLite file.
+
+    Each entry keeps the response body with its ETag/Last-Modified validators and,
+    once the page has been parsed, the extracted venue row. Entries younger than
+    `ttl` seconds are served without any request; older ones are revalidated with
+    If-None-Match/If-Modified-Since. The store is capped at `max_bytes` of bodies,
+    evicting least recently used entries first.
+    """
+
+    def __init__(self, path='.http_cache.sqlite', max_bytes=200 * 1024 * 1024, ttl=0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                row TEXT
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)')
+        self.conn.commit()
+        self.stats = {'fresh': 0, 'not_modified': 0, 'fetched': 0, 'evicted': 0}
+
+    def fresh_body(self, url):
+        """Body of an entry still within its TTL, or None if it must be (re)fetched"""
+        if not self.ttl:
+            return None
+        with self.lock:
+            entry = self.conn.execute(
+                'SELECT body, fetched_at FROM responses WHERE url = ?', (url,)).fetchone()
+            if entry is None or time.time() - entry[1] > self.ttl:
+                return None
+            self.conn.execute('UPDATE responses SET last_access = ? WHERE url = ?', (time.time(), url))
+            self.conn.commit()
+            self.stats['fresh'] += 1
+            return entry[0]
+
+    def validators(self, url):
+        """Conditional request headers for a cached URL"""
+        with self.lock:
+            entry = self.conn.execute(
+                'SELECT etag, last_modified FROM responses WHERE url = ?', (url,)).fetchone()
+        headers = {}
+        if entry:
+            if entry[0]:
+                headers['If-None-Match'] = entry[0]
+            if entry[1]:
+                headers['If-Modified-Since'] = entry[1]
+        return headers
+
+    def replay(self, url):
+        """Stored body for a URL the server answered with 304 Not Modified"""
+        with self.lock:
+            entry = self.conn.execute('SELECT body FROM responses WHERE url = ?', (url,)).fetchone()
+            if entry is None:
+                return None
+            now = time.time()
+            # A successful revalidation restarts the TTL
+            self.conn.execute('UPDATE responses SET fetched_at = ?, last_access = ? WHERE url = ?',
+                              (now, now, url))
+            self.conn.commit()
+            self.stats['not_modified'] += 1
+            return entry[0]
+
+    def store(self, url, body, headers):
+        """Save a fresh 200 response, dropping any row parsed from the old body"""
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        now = time.time()
+        with self.lock:
+            self.conn.execute('''
+                INSERT OR REPLACE INTO responses (url, etag, last_modified, body, size, fetched_at, last_access, row)
+                VALUES (?, ?, ?, ?, ?, ?, ?, NULL)
+            ''', (url, etag, last_modified, body, len(body), now, now))
+            self.stats['fetched'] += 1
+            self._evict()
+            self.conn.commit()
+
+    def get_row(self, url, version=''):
+        """Venue row previously extracted from the cached body, if any, as long as it was
+        extracted the same way (see put_row)"""
+        with self.lock:
+            entry = self.conn.execute('SELECT row FROM responses WHERE url = ?', (url,)).fetchone()
+        if entry and entry[0]:
+            stored = json.loads(entry[0])
+            if stored.get('version') == version and 'row' in stored:
+                return stored['row']
+        return None
+
+    def put_row(self, url, venue_data, version=''):
+        """Attach the extracted venue row to the cached body. `version` names the page
+        template it was extracted with; a row from another template is parsed again."""
+        with self.lock:
+            self.conn.execute('UPDATE responses SET row = ? WHERE url = ?',
+                              (json.dumps({'version': version, 'row': venue_data}, ensure_ascii=False), url))
+            self.conn.commit()
+
+    def _evict(self):
+        """Drop least recently used entries until the store fits in max_bytes"""
+        total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for url, size in self.conn.execute(
+                'SELECT url, size FROM responses ORDER BY last_access').fetchall():
+            self.conn.execute('DELETE FROM responses WHERE url = ?', (url,))
+            self.stats['evicted'] += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def print_summary(self):
+        print("\nHTTP cache:")
+        print(f"  - Served fresh (within TTL): {self.stats['fresh']}")
+        print(f"  - Not modified (304): {self.stats['not_modified']}")
+        print(f"  - Downloaded: {self.stats['fetched']}")
+        print(f"  - Evicted: {self.stats['evicted']}")
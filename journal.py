@@ -0,0 +1,108 @@
+import json
+import threading
+
+
+class CrawlJournal:
+    """Append-only JSONL log of listing pages and completed venues, used to resume a crawl.
+
+    Every line is one entry: {"type": "listing", "page", "urls", "listing_data"} once a
+    listing page is parsed, or {"type": "venue", "row"} once a venue is extracted (with
+    "failed": true if its page could not be fetched). The last entry for a URL wins.
+    Lines are flushed as they are written, so a crash loses at most the venue in flight.
+    """
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.lock = threading.Lock()
+        self.pages = {}  # page_num -> venue URLs, from a previous run
+        self.listing_data = {}
+        self.completed = set()  # URLs of venues done on a previous run; rows stay on disk
+        if resume:
+            good_bytes = self._load()
+            self.file = open(path, 'a', encoding='utf-8')
+            # Drop a half-written line left by a crash so new entries start on a fresh line
+            self.file.truncate(good_bytes)
+        else:
+            self.file = open(path, 'w', encoding='utf-8')
+
+    def _entries(self):
+        """Yield (entry, end offset) for each complete line, stopping at a truncated tail"""
+        offset = 0
+        try:
+            with open(self.path, 'rb') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        return
+                    if not line.endswith(b'\n'):
+                        return
+                    offset += len(line)
+                    yield entry, offset
+        except FileNotFoundError:
+            return
+
+    def _load(self):
+        good_bytes = 0
+        for entry, good_bytes in self._entries():
+            if entry['type'] == 'listing':
+                self.pages[entry['page']] = entry['urls']
+                self.listing_data.update(entry['listing_data'])
+            elif entry.get('failed'):
+                self.completed.discard(entry['row']['url'])
+            else:
+                self.completed.add(entry['row']['url'])
+        print(f"Resuming from {self.path}: {len(self.pages)} listing pages, "
+              f"{len(self.completed)} venues already done")
+        return good_bytes
+
+    def _append(self, entry):
+        with self.lock:
+            self.file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self.file.flush()
+
+    def record_listing(self, page_num, urls, listing_data):
+        self._append({'type': 'listing', 'page': page_num, 'urls': urls, 'listing_data': listing_data})
+
+    def record_venue(self, venue_data, failed=False):
+        """Log an extracted venue; failed ones keep their empty row but are retried on resume"""
+        entry = {'type': 'venue', 'row': venue_data}
+        if failed:
+            entry['failed'] = True
+        self._append(entry)
+
+    def completed_venues(self):
+        """Yield the rows of venues done on a previous run, read back one at a time.
+
+        A venue re-scraped after a resume is journaled again; the first pass finds the line
+        of each URL's last good row, so only line numbers are held, not the rows themselves.
+        """
+        with self.lock:
+            self.file.flush()
+        last = {}
+        for line, (entry, _) in enumerate(self._entries()):
+            if entry['type'] == 'venue' and not entry.get('failed') and entry['row']['url'] in self.completed:
+                last[entry['row']['url']] = line
+        for line, (entry, _) in enumerate(self._entries()):
+            if entry['type'] == 'venue' and last.get(entry['row']['url']) == line:
+                yield entry['row']
+
+    def ordered_venues(self):
+        """Rebuild every journaled venue in listing order with one pass over the journal"""
+        with self.lock:
+            self.file.flush()
+        pages = {}
+        rows = {}
+        for entry, _ in self._entries():
+            if entry['type'] == 'listing':
+                pages[entry['page']] = entry['urls']
+            else:
+                rows[entry['row']['url']] = entry['row']
+
+        ordered_urls = dict.fromkeys(url for page_num in sorted(pages) for url in pages[page_num])
+        venues = [rows.pop(url) for url in ordered_urls if url in rows]
+        return venues + list(rows.values())
+
+    def close(self):
+        with self.lock:
+            self.file.close()
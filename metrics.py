@@ -0,0 +1,227 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+# Upper bounds in seconds, shared by every latency histogram so runs are comparable
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Where a request's time goes, in order: waiting for the rate limiter, resolving the host,
+# opening the connection (plus TLS), waiting for the response headers, reading the body
+REQUEST_PHASES = ['rate_limit', 'dns', 'connect', 'ttfb', 'download']
+
+TIMELINE_WINDOW = 10  # Seconds per timeline entry in the JSON report
+
+METRIC_PREFIX = 'shadliq_crawl'
+
+
+class Histogram:
+    """Prometheus-style histogram: counts per bucket plus sum and count"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """[(upper bound, observations <= bound)] ending with +Inf"""
+        total = 0
+        result = []
+        for bound, count in zip(list(self.buckets) + [float('inf')], self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def quantile(self, q):
+        """Estimate a quantile by interpolating within its bucket, like histogram_quantile()"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        lower, below = 0.0, 0
+        for bound, total in self.cumulative():
+            if total >= rank:
+                if bound == float('inf'):
+                    return lower
+                in_bucket = total - below
+                return lower + (bound - lower) * (rank - below) / in_bucket if in_bucket else bound
+            lower, below = bound, total
+        return lower
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else None,
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99),
+        }
+
+
+class CrawlMetrics:
+    """Timings and throughput for one crawl, shared by all workers, transports and categories.
+
+    Histograms are keyed by (metric, label value): request phase, parse time per page
+    kind and extraction time per field. Counters cover pages, bytes and response
+    statuses; queue gauges keep the last and the largest depth seen. Everything can be
+    written as a Prometheus text file (for node_exporter's textfile collector) and as a
+    JSON run report.
+    """
+
+    HISTOGRAMS = {
+        'request_phase_seconds': ('phase', 'Time per HTTP request phase'),
+        'parse_seconds': ('kind', 'HTML parse and extraction time per page'),
+        'field_seconds': ('field', 'Extraction time per venue field and page'),
+    }
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.histograms = defaultdict(Histogram)  # (metric, label value) -> Histogram
+        self.pages = defaultdict(int)  # kind -> pages fetched or replayed from the cache
+        self.responses = defaultdict(int)  # HTTP status -> responses
+        self.wire_bytes = 0  # As transferred, i.e. compressed
+        self.body_bytes = 0  # After decompression
+        self.queue_depth = {}  # queue -> current depth
+        self.max_queue_depth = defaultdict(int)
+        self.timeline = defaultdict(lambda: {'pages': 0, 'ttfb_sum': 0.0, 'responses': 0})
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def observe(self, metric, label, seconds):
+        with self.lock:
+            self.histograms[metric, label].observe(seconds)
+
+    def record_response(self, status, phases, wire_bytes, body_bytes):
+        """One HTTP response; phases maps REQUEST_PHASES names to seconds"""
+        with self.lock:
+            for phase, seconds in phases.items():
+                self.histograms['request_phase_seconds', phase].observe(seconds)
+            self.responses[status] += 1
+            self.wire_bytes += wire_bytes
+            self.body_bytes += body_bytes
+            window = self.timeline[int(self.elapsed() // TIMELINE_WINDOW)]
+            window['responses'] += 1
+            window['ttfb_sum'] += phases.get('ttfb', 0.0)
+
+    def record_page(self, kind):
+        with self.lock:
+            self.pages[kind] += 1
+            self.timeline[int(self.elapsed() // TIMELINE_WINDOW)]['pages'] += 1
+
+    def set_queue_depth(self, queue, depth):
+        with self.lock:
+            self.queue_depth[queue] = depth
+            self.max_queue_depth[queue] = max(self.max_queue_depth[queue], depth)
+
+    def report(self):
+        """The run as a JSON-serialisable dict"""
+        with self.lock:
+            elapsed = self.elapsed()
+            histograms = defaultdict(dict)
+            for (metric, label), histogram in sorted(self.histograms.items()):
+                histograms[metric][label] = histogram.summary()
+            timeline = [{
+                'start_seconds': window * TIMELINE_WINDOW,
+                'pages': entry['pages'],
+                # The last window is still partial
+                'pages_per_second': entry['pages'] / max(1e-9, min(TIMELINE_WINDOW,
+                                                                   elapsed - window * TIMELINE_WINDOW)),
+                'mean_ttfb_seconds': entry['ttfb_sum'] / entry['responses'] if entry['responses'] else None,
+            } for window, entry in sorted(self.timeline.items())]
+            return {
+                'started_at': self.started_at,
+                'elapsed_seconds': elapsed,
+                'pages': dict(self.pages),
+                'pages_per_second': sum(self.pages.values()) / elapsed if elapsed else 0.0,
+                'responses': {str(status): count for status, count in sorted(self.responses.items())},
+                'wire_bytes': self.wire_bytes,
+                'body_bytes': self.body_bytes,
+                'queue_depth': {queue: {'last': depth, 'max': self.max_queue_depth[queue]}
+                                for queue, depth in self.queue_depth.items()},
+                'histograms': dict(histograms),
+                'timeline': timeline,
+            }
+
+    def prometheus_lines(self):
+        """The run in the Prometheus text exposition format"""
+        with self.lock:
+            elapsed = self.elapsed()
+            lines = []
+
+            def header(name, kind, help_text):
+                lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+                lines.append(f"# TYPE {METRIC_PREFIX}_{name} {kind}")
+
+            for metric, (label_name, help_text) in self.HISTOGRAMS.items():
+                labelled = sorted((label, h) for (name, label), h in self.histograms.items() if name == metric)
+                if not labelled:
+                    continue
+                header(metric, 'histogram', help_text)
+                for label, histogram in labelled:
+                    for bound, count in histogram.cumulative():
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append(f'{METRIC_PREFIX}_{metric}_bucket{{{label_name}="{label}",le="{le}"}} {count}')
+                    lines.append(f'{METRIC_PREFIX}_{metric}_sum{{{label_name}="{label}"}} {histogram.sum}')
+                    lines.append(f'{METRIC_PREFIX}_{metric}_count{{{label_name}="{label}"}} {histogram.count}')
+
+            header('pages_total', 'counter', 'Pages fetched or replayed from the cache')
+            for kind, count in sorted(self.pages.items()):
+                lines.append(f'{METRIC_PREFIX}_pages_total{{kind="{kind}"}} {count}')
+            header('responses_total', 'counter', 'HTTP responses by status code')
+            for status, count in sorted(self.responses.items()):
+                lines.append(f'{METRIC_PREFIX}_responses_total{{status="{status}"}} {count}')
+            header('bytes_total', 'counter', 'Response body bytes, on the wire and decompressed')
+            lines.append(f'{METRIC_PREFIX}_bytes_total{{encoding="wire"}} {self.wire_bytes}')
+            lines.append(f'{METRIC_PREFIX}_bytes_total{{encoding="decoded"}} {self.body_bytes}')
+            header('queue_depth', 'gauge', 'Last sampled depth of a crawl queue')
+            for queue, depth in sorted(self.queue_depth.items()):
+                lines.append(f'{METRIC_PREFIX}_queue_depth{{queue="{queue}"}} {depth}')
+            header('queue_depth_max', 'gauge', 'Largest sampled depth of a crawl queue')
+            for queue, depth in sorted(self.max_queue_depth.items()):
+                lines.append(f'{METRIC_PREFIX}_queue_depth_max{{queue="{queue}"}} {depth}')
+            header('pages_per_second', 'gauge', 'Pages per second over the whole run')
+            pages_per_second = sum(self.pages.values()) / elapsed if elapsed else 0.0
+            lines.append(f'{METRIC_PREFIX}_pages_per_second {pages_per_second}')
+            header('duration_seconds', 'gauge', 'Wall time of the run so far')
+            lines.append(f'{METRIC_PREFIX}_duration_seconds {elapsed}')
+            header('start_time_seconds', 'gauge', 'Unix time the run started')
+            lines.append(f'{METRIC_PREFIX}_start_time_seconds {self.started_at}')
+            return lines
+
+    def write_prometheus(self, filename):
+        """Write the Prometheus text file atomically, so a scraper never reads half of it"""
+        tmp = f"{filename}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(self.prometheus_lines()) + '\n')
+        os.replace(tmp, filename)
+        print(f"Metrics written to {filename}")
+
+    def write_json(self, filename):
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+        print(f"Run report written to {filename}")
+
+    def print_summary(self):
+        report = self.report()
+        phases = report['histograms'].get('request_phase_seconds', {})
+        print(f"\nCrawl metrics: {sum(report['pages'].values())} pages in {report['elapsed_seconds']:.1f}s "
+              f"({report['pages_per_second']:.2f} pages/sec), "
+              f"{report['wire_bytes'] / 1024:.0f} KB on the wire ({report['body_bytes'] / 1024:.0f} KB decoded)")
+        for phase in REQUEST_PHASES:
+            if phase in phases:
+                stats = phases[phase]
+                print(f"  - {phase:<10} total {stats['sum']:7.2f}s  mean {stats['mean'] * 1000:7.1f} ms  "
+                      f"p90 {stats['p90'] * 1000:7.1f} ms")
+        for kind, stats in report['histograms'].get('parse_seconds', {}).items():
+            print(f"  - parse {kind:<6} total {stats['sum']:5.2f}s  mean {stats['mean'] * 1000:7.1f} ms")
@@ -0,0 +1,154 @@
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from extractors import DEFAULT_CATEGORY
+
+
+def category_journal_path(path, category):
+    """Journal file for a category: the --journal path itself for saray-restoranlar, so
+    existing journals keep resuming, and e.g. shadliq_crawl_journal.gelinlikler.jsonl otherwise"""
+    if category == DEFAULT_CATEGORY:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{category}{ext}"
+
+
+class CrawlFrontier:
+    """Venue URLs claimed across all categories, so a venue listed in several is scraped once.
+
+    The category given first in --categories owns a venue listed under several, whichever
+    thread reaches it first: a later claim from an earlier category takes the venue over
+    and scrapes it with its own extractors, and the row the other category made is dropped.
+    """
+
+    def __init__(self, categories):
+        self.priority = {category: i for i, category in enumerate(categories)}
+        self.condition = threading.Condition()
+        self.owners = {}  # url -> category that scrapes it
+        self.claims = defaultdict(set)  # category -> URLs its listing pages list
+        self.listed = set()  # Categories that have found all their venue URLs
+
+    def claim(self, url, category):
+        """True if category should scrape url: nobody claimed it yet, or only categories after this one"""
+        with self.condition:
+            self.claims[category].add(url)
+            owner = self.owners.get(url)
+            if owner is None or self.priority[category] < self.priority[owner]:
+                self.owners[url] = category
+                return True
+            return owner == category
+
+    def claimed(self, urls, category):
+        """The URLs category should scrape, marking its listing done once urls runs out"""
+        try:
+            for url in urls:
+                if self.claim(url, category):
+                    yield url
+        finally:
+            self.finish_listing(category)
+
+    def finish_listing(self, category):
+        with self.condition:
+            self.listed.add(category)
+            self.condition.notify_all()
+
+    def settled(self, category):
+        """True once no category before this one can claim a venue any more"""
+        with self.condition:
+            return self.settled_locked(category)
+
+    def settled_locked(self, category):
+        return all(other in self.listed for other, i in self.priority.items() if i < self.priority[category])
+
+    def wait_settled(self, category):
+        with self.condition:
+            self.condition.wait_for(lambda: self.settled_locked(category))
+
+    def owns(self, url, category):
+        with self.condition:
+            return self.owners.get(url) == category
+
+    def listed_elsewhere(self, category):
+        """How many of the venues category lists are owned by another category"""
+        with self.condition:
+            return sum(self.owners[url] != category for url in self.claims[category])
+
+
+class MultiCategoryCrawler:
+    """Crawls several shadliq.az categories at once for a ShadliqScraperFinal.
+
+    Each category gets its own scraper (listing URLs, pager, extractors, journal) running
+    in its own thread, with --workers detail fetchers each. All of them draw from the
+    given scraper's rate limiter, so the politeness budget is global, and from one
+    CrawlFrontier that deduplicates venues across categories, giving each venue to the
+    first of its categories in the order they were passed. Rows end up in the given
+    scraper's venues, grouped by category in that order.
+    """
+
+    def __init__(self, scraper, categories, journals=None):
+        self.scraper = scraper
+        self.frontier = CrawlFrontier(categories)
+        journals = journals or {}
+        self.scrapers = {category: self.category_scraper(category, journals.get(category))
+                         for category in categories}
+        # Venues finished on a previous run count as listed by the category that journaled them
+        for category, category_scraper in self.scrapers.items():
+            if category_scraper.journal:
+                for url in category_scraper.journal.completed:
+                    self.frontier.claim(url, category)
+
+    def category_scraper(self, category, journal):
+        """A scraper for one category sharing the crawl-wide rate limiter, counters, sinks, cache and recorder"""
+        base = self.scraper
+        category_scraper = type(base)(workers=base.workers, base_url=base.base_url, cache=base.cache,
+                                      parser=base.parser, journal=journal,
+                                      max_pages=base.max_listing_pages, category=category,
+                                      retries=base.transport.retries, backoff=base.transport.backoff)
+        category_scraper.rate_limiter = base.rate_limiter
+        category_scraper.transport.rate_limiter = base.rate_limiter
+        category_scraper.transport.stats = base.transport.stats
+        category_scraper.metrics = base.metrics
+        category_scraper.transport.metrics = base.metrics
+        category_scraper.transport.scheduler = base.transport.scheduler
+        category_scraper.recorder = base.recorder
+        category_scraper.templates = base.templates
+        category_scraper.field_times = base.field_times
+        category_scraper.field_times_lock = base.field_times_lock
+        category_scraper.frontier = self.frontier
+        category_scraper.sinks = base.sinks
+        category_scraper.summary = base.summary
+        return category_scraper
+
+    def crawl_category(self, category_scraper):
+        try:
+            category_scraper.scrape_all()
+        except Exception as e:
+            print(f"Error crawling category {category_scraper.category}: {e}")
+        finally:
+            self.frontier.finish_listing(category_scraper.category)  # Never leave later categories waiting
+        return category_scraper
+
+    def scrape_all(self):
+        print(f"Starting multi-category crawl: {', '.join(self.scrapers)}")
+        print("=" * 60)
+
+        with ThreadPoolExecutor(max_workers=len(self.scrapers)) as executor:
+            list(executor.map(self.crawl_category, self.scrapers.values()))
+
+        for category, category_scraper in self.scrapers.items():
+            # Rows of venues an earlier category took over were scraped again there
+            category_scraper.venues = [venue for venue in category_scraper.venues
+                                       if self.frontier.owns(venue.url, category)]
+            self.scraper.venues.extend(category_scraper.venues)
+            self.scraper.venues_written += category_scraper.venues_written
+            self.scraper.failed_urls.update(category_scraper.failed_urls)
+
+        print("\n" + "=" * 60)
+        print("Multi-category crawl report:")
+        for category, category_scraper in self.scrapers.items():
+            print(f"  - {category}: {category_scraper.scraped_count()} venues, "
+                  f"{self.frontier.listed_elsewhere(category)} left to an earlier category")
+        print(f"Total venues scraped: {self.scraper.scraped_count()}")
+        print("=" * 60)
@@ -0,0 +1,119 @@
+import os
+import threading
+import time
+from urllib.parse import urljoin
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+from transport import RETRY_STATUSES, USER_AGENT
+
+ROBOTS_MAX_AGE = 24 * 3600  # Seconds a cached robots.txt is used before it is fetched again
+
+
+def load_robots(path, base_url, max_age=ROBOTS_MAX_AGE):
+    """robots.txt for base_url as a RobotFileParser, or None if there is none to be had.
+
+    The copy at path is used while it is fresher than max_age; otherwise the site's
+    robots.txt is fetched and saved there. A stale copy is still better than nothing
+    when the site cannot be reached.
+    """
+    fresh = os.path.exists(path) and time.time() - os.path.getmtime(path) < max_age
+    if not fresh:
+        try:
+            response = requests.get(urljoin(base_url, '/robots.txt'), headers={'User-Agent': USER_AGENT},
+                                    timeout=30)
+            if response.status_code == 200:
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(response.text)
+            elif response.status_code == 404:
+                print(f"No robots.txt on {base_url}")
+                return None
+        except Exception as e:
+            print(f"Could not fetch robots.txt: {e}")
+    if not os.path.exists(path):
+        return None
+
+    robots = RobotFileParser()
+    with open(path, encoding='utf-8') as f:
+        robots.parse(f.read().splitlines())
+    return robots
+
+
+def robots_max_rate(robots, user_agent=USER_AGENT):
+    """Requests per second allowed by Crawl-delay / Request-rate, or None if robots.txt sets neither"""
+    if robots is None:
+        return None
+    rates = []
+    delay = robots.crawl_delay(user_agent)
+    if delay:
+        rates.append(1 / float(delay))
+    request_rate = robots.request_rate(user_agent)
+    if request_rate and request_rate.seconds:
+        rates.append(request_rate.requests / request_rate.seconds)
+    return min(rates) if rates else None
+
+
+class AdaptiveScheduler:
+    """Steers a TokenBucket's rate between min_rate and max_rate from how the server responds.
+
+    Every response reports its time to first byte. While the smoothed latency stays
+    under target_latency the rate grows additively, by about `increase` requests/sec
+    each second; a 429, 5xx or connection error halves it, and latency above target
+    cuts it by a fifth. After a cut, further cuts wait until the requests sent at the
+    old rate have come back, so one slow burst is not punished repeatedly.
+    """
+
+    def __init__(self, bucket, max_rate, min_rate=0.1, target_latency=1.0, increase=0.1,
+                 error_decrease=0.5, latency_decrease=0.8, smoothing=0.2):
+        self.bucket = bucket
+        self.max_rate = max_rate
+        self.min_rate = min(min_rate, max_rate)
+        self.target_latency = target_latency
+        self.increase = increase
+        self.error_decrease = error_decrease
+        self.latency_decrease = latency_decrease
+        self.smoothing = smoothing  # Weight of the newest sample in the latency average
+        self.latency = None
+        self.last_decrease = 0.0
+        self.decreases = 0
+        self.lock = threading.Lock()
+        # --rps is where the crawl starts; an unlimited bucket starts at the ceiling
+        bucket.set_rate(min(max_rate, max(self.min_rate, bucket.rate or max_rate)))
+        self.lowest_rate = self.highest_rate = bucket.rate
+
+    def observe(self, latency=None, status=None):
+        """Feed one request's outcome: latency is None when the request failed outright"""
+        with self.lock:
+            now = time.monotonic()
+            rate = self.bucket.rate
+            if latency is not None:
+                self.latency = latency if self.latency is None else \
+                    self.latency + self.smoothing * (latency - self.latency)
+
+            error = latency is None or status in RETRY_STATUSES
+            if error or self.latency > self.target_latency:
+                # Requests already in flight went out at the old rate; let them drain first
+                if now - self.last_decrease < max(1.0, 2 * (self.latency or 0)):
+                    return
+                factor = self.error_decrease if error else self.latency_decrease
+                new_rate = max(self.min_rate, rate * factor)
+                self.last_decrease = now
+                self.decreases += 1
+                if error:
+                    reason = f"HTTP {status}" if status else 'connection error'
+                else:
+                    reason = f"latency {self.latency * 1000:.0f} ms"
+                print(f"    Slowing down to {new_rate:.2f} req/s ({reason})")
+            else:
+                new_rate = min(self.max_rate, rate + self.increase / rate)
+
+            self.bucket.set_rate(new_rate)
+            self.lowest_rate = min(self.lowest_rate, new_rate)
+            self.highest_rate = max(self.highest_rate, new_rate)
+
+    def print_summary(self):
+        latency = f"{self.latency * 1000:.0f} ms" if self.latency is not None else 'n/a'
+        print(f"\nAdaptive rate: ended at {self.bucket.rate:.2f} req/s "
+              f"(range {self.lowest_rate:.2f}-{self.highest_rate:.2f}, ceiling {self.max_rate:.2f}), "
+              f"{self.decreases} slowdowns, smoothed latency {latency}")
@@ -1,293 +1,578 @@
-import requests
 from bs4 import BeautifulSoup
 import csv
 import time
 import re
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlparse
 import json
+import argparse
+import asyncio
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from extractors import (CATEGORY_EXTRACTORS, DEFAULT_CATEGORY, LISTING_PRICE_RE, PAGER_HREF_PATTERN,
+                        DetailPage)
+from fast_parser import LISTING_STRAINER, parse_venue_lxml
+from metrics import CrawlMetrics
+from sinks import CsvSink, VenueSummary
+from transport import Transport
+from venue import Venue, read_csv
+
+# Links on listing pages that are site sections rather than venues
+EXCLUDED_URL_KEYWORDS = ['elaqe', 'videolar', 'meslehetler']
+# Category index and pager pages, e.g. /az/gelinlikler/ and /az/gelinlikler/2/, crawled
+# through their own listings (see multi_category.py) and never as detail pages. Matched as whole
+# paths, since venue slugs such as /az/leyla-gelinlikler can contain a category's name.
+CATEGORY_PAGE_RE = re.compile(r'/az/(?:%s)(?:/\d+)?/?' % '|'.join(map(re.escape, CATEGORY_EXTRACTORS)))
+
+# CSV column order; new_venue_record starts every row with these keys
+VENUE_FIELDS = [
+    'url', 'category', 'name', 'phone', 'email', 'address', 'location_short',
+    'latitude', 'longitude', 'price_per_person', 'views', 'description',
+    'hall_names', 'services', 'event_types', 'gallery_images', 'meta_description'
+]
+CSV_FIELDS = VENUE_FIELDS + ['status']
+
+
+class TokenBucket:
+    """Thread-safe token bucket shared by all workers to cap requests per second"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate  # tokens added per second; None or 0 disables limiting
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def set_rate(self, rate):
+        """Change the rate, crediting tokens earned so far at the old one"""
+        with self.lock:
+            now = time.monotonic()
+            if self.rate:
+                self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+            self.rate = rate
+
+    def try_acquire(self):
+        """Consume a token if one is available; otherwise return seconds to wait"""
+        if not self.rate:
+            return 0
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        """Block until a token is available, then consume it"""
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Coroutine version of acquire for the asyncio engine"""
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
 
 class ShadliqScraperFinal:
-    def __init__(self):
-        self.base_url = "https://shadliq.az"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
-        self.venues = []
+    def __init__(self, workers=1, requests_per_second=0.66, base_url="https://shadliq.az", cache=None,
+                 parser='bs4', journal=None, max_pages=None, category=DEFAULT_CATEGORY, retries=3, backoff=1.0):
+        self.base_url = base_url
+        self.category = category  # Listing slug, one of CATEGORY_EXTRACTORS
+        self.extractors = CATEGORY_EXTRACTORS[category]
+        self.pager_href_re = re.compile(PAGER_HREF_PATTERN % re.escape(category).encode())
+        self.parser = parser  # 'bs4' (html.parser) or 'lxml' (fast_parser)
+        self.cache = cache  # Optional HttpCache for conditional GETs across runs
+        self.workers = max(1, workers)
+        # One politeness budget for the whole crawl, shared across worker threads
+        self.rate_limiter = TokenBucket(requests_per_second)
+        # Request phases, parse times, bytes and queue depths for --metrics / --report
+        self.metrics = CrawlMetrics()
+        # Keep-alive pool with one connection per worker, compression and retries
+        self.transport = Transport(pool_size=self.workers, rate_limiter=self.rate_limiter,
+                                   retries=retries, backoff=backoff, metrics=self.metrics)
+        self.session = self.transport.session
+        self.recorder = None  # Optional FixtureRecorder that saves raw responses
+        self.templates = None  # Optional boilerplate.TemplateCache of learned page templates
+        self.template = None  # This category's PageTemplate; None scans whole pages
+        self.prefetched = {}  # url -> (content, unchanged) fetched early, e.g. to learn the template
+        self.field_times = defaultdict(float)  # Seconds spent per extraction step
+        self.field_times_lock = threading.Lock()
+        self.max_listing_pages = max_pages  # None: follow the pager until the last page
+        self.last_listing_page = None  # Highest page number seen in the pager so far
+        self.venues = []  # venue.Venue records
+        # With sinks (--stream), finished rows are written out instead of kept in self.venues
+        self.sinks = []
+        self.held = []  # Streamed rows waiting for their frontier ownership to settle
+        self.summary = VenueSummary()
+        self.venues_written = 0
         self.listing_data = {}  # Store price and location from listing pages
+        self.failed_urls = set()  # Pages that could not be fetched or parsed this run
+        self.journal = journal  # Optional CrawlJournal for checkpointing and --resume
+        self.frontier = None  # CrawlFrontier shared with other categories' scrapers, if any
+        if journal:
+            self.listing_data.update(journal.listing_data)
+
+    def record(self, url, kind, content):
+        """Pass a fetched page to the fixture recorder when --record is on"""
+        if self.recorder:
+            self.recorder.record(url, kind, content)
+
+    def fetch(self, url, kind='detail'):
+        """GET a page through the transport (rate limited, retried on transient errors).
+
+        Returns (content, unchanged), where unchanged is True if the body was
+        replayed from the HTTP cache because the page has not changed.
+        """
+        prefetched = self.prefetched.pop(url, None)
+        if prefetched:
+            return prefetched
+        self.metrics.record_page(kind)
+        if self.cache:
+            content = self.cache.fresh_body(url)
+            if content is not None:
+                self.record(url, kind, content)
+                return content, True
+
+        headers = self.cache.validators(url) if self.cache else {}
+        response = self.transport.get(url, headers=headers)
+        if response.status_code == 304 and self.cache:
+            content = self.cache.replay(url)
+            if content is not None:
+                self.record(url, kind, content)
+                return content, True
+            # Entry was evicted after the validators were read; fetch unconditionally
+            response = self.transport.get(url)
+        response.raise_for_status()
+
+        if self.cache:
+            self.cache.store(url, response.content, response.headers)
+        self.record(url, kind, response.content)
+        return response.content, False
+
+    def field_lap(self):
+        """Return a lap(step) callable that charges the time since the previous lap to step"""
+        last = time.perf_counter()
+
+        def lap(step):
+            nonlocal last
+            now = time.perf_counter()
+            with self.field_times_lock:
+                self.field_times[step] += now - last
+            self.metrics.observe('field_seconds', step, now - last)
+            last = now
+
+        return lap
+
+    def listing_url(self, page_num):
+        """URL of a listing page of this scraper's category"""
+        return f"{self.base_url}/az/{self.category}/{page_num}/"
+
+    def parse_listing_page(self, content):
+        """Parse listing page HTML into venue URLs, recording price and location in listing_data"""
+        start = time.perf_counter()
+        if self.parser == 'lxml':
+            soup = BeautifulSoup(content, 'lxml', parse_only=LISTING_STRAINER)
+        else:
+            soup = BeautifulSoup(content, 'html.parser')
+
+        venue_links = []
+
+        # Find venue cards using the correct selector
+        venue_blocks = soup.find_all('div', class_='block_similar')
+
+        for block in venue_blocks:
+            # Find the main link (in block_title)
+            block_title = block.find('div', class_='block_title')
+            if not block_title:
+                continue
+
+            link = block_title.find('a', href=True)
+            if not link:
+                continue
+
+            href = link.get('href', '')
+
+            # Filter for venue detail pages
+            if '/az/' in href and href.count('/') >= 3:
+                full_url = urljoin(self.base_url, href)
+
+                # Exclude non-venue pages
+                if (any(keyword in full_url for keyword in EXCLUDED_URL_KEYWORDS) or
+                        CATEGORY_PAGE_RE.fullmatch(urlparse(full_url).path)):
+                    continue
+
+                if full_url.startswith(self.base_url) and full_url not in venue_links:
+                    venue_links.append(full_url)
+
+                    # Extract price from address-place paragraph
+                    price_p = block_title.find('p', class_='address-place')
+                    price = ''
+                    if price_p:
+                        price_text = price_p.get_text(strip=True)
+                        # Extract just the number(s)
+                        price_match = LISTING_PRICE_RE.search(price_text)
+                        if price_match:
+                            price = price_match.group(1)
+
+                    # Extract location from map marker paragraph
+                    location = ''
+                    map_marker = block_title.find('i', class_='fa-map-marker')
+                    if map_marker and map_marker.parent:
+                        location = map_marker.parent.get_text(strip=True)
+
+                    # Store this info
+                    self.listing_data[full_url] = {
+                        'listing_price': price,
+                        'listing_location': location
+                    }
+
+        pager_pages = [int(page) for page in self.pager_href_re.findall(content)]
+        if pager_pages:
+            self.last_listing_page = max(pager_pages + [self.last_listing_page or 0])
+        soup.decompose()  # Break the tree's reference cycles so it is freed right away
+
+        # Remove duplicates while preserving order
+        venue_links = list(dict.fromkeys(venue_links))
+        self.metrics.observe('parse_seconds', 'listing', time.perf_counter() - start)
+        return venue_links
 
     def scrape_listing_page(self, page_num):
         """Scrape a listing page to get venue URLs and basic info (price, location)"""
-        url = f"{self.base_url}/az/saray-restoranlar/{page_num}/"
+        url = self.listing_url(page_num)
         print(f"Scraping listing page {page_num}: {url}")
 
         try:
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-
-            venue_links = []
-
-            # Find venue cards using the correct selector
-            venue_blocks = soup.find_all('div', class_='block_similar')
-
-            for block in venue_blocks:
-                # Find the main link (in block_title)
-                block_title = block.find('div', class_='block_title')
-                if not block_title:
-                    continue
-
-                link = block_title.find('a', href=True)
-                if not link:
-                    continue
-
-                href = link.get('href', '')
-
-                # Filter for venue detail pages
-                if '/az/' in href and href.count('/') >= 3:
-                    full_url = urljoin(self.base_url, href)
-
-                    # Exclude non-venue pages
-                    excluded_keywords = ['elaqe', 'videolar', 'meslehetler', 'gelinlikler',
-                                        'gozellik-salonlari', 'toy-masini', 'dekorasiya-dizayn',
-                                        'reqs-qruplari', 'saray-restoranlar']
-
-                    if any(keyword in full_url for keyword in excluded_keywords):
-                        continue
-
-                    if full_url.startswith(self.base_url) and full_url not in venue_links:
-                        venue_links.append(full_url)
-
-                        # Extract price from address-place paragraph
-                        price_p = block_title.find('p', class_='address-place')
-                        price = ''
-                        if price_p:
-                            price_text = price_p.get_text(strip=True)
-                            # Extract just the number(s)
-                            price_match = re.search(r'(\d+(?:-\d+)?)', price_text)
-                            if price_match:
-                                price = price_match.group(1)
-
-                        # Extract location from map marker paragraph
-                        location = ''
-                        map_marker = block_title.find('i', class_='fa-map-marker')
-                        if map_marker and map_marker.parent:
-                            location = map_marker.parent.get_text(strip=True)
-
-                        # Store this info
-                        self.listing_data[full_url] = {
-                            'listing_price': price,
-                            'listing_location': location
-                        }
-
-            # Remove duplicates while preserving order
-            venue_links = list(dict.fromkeys(venue_links))
+            content, _ = self.fetch(url, kind='listing')
+            venue_links = self.parse_listing_page(content)
 
             print(f"  Found {len(venue_links)} venue links on page {page_num}")
             return venue_links
 
         except Exception as e:
             print(f"  Error scraping listing page {page_num}: {e}")
+            self.failed_urls.add(url)
             return []
 
+    def listing_page_urls(self, page_num):
+        """Venue URLs of a listing page, taken from the journal when resuming"""
+        if self.journal and page_num in self.journal.pages:
+            return self.journal.pages[page_num]
+        venue_urls = self.scrape_listing_page(page_num)
+        if self.journal and self.listing_url(page_num) not in self.failed_urls:
+            self.journal.record_listing(page_num, venue_urls,
+                                        {url: self.listing_data[url] for url in venue_urls})
+        return venue_urls
+
+    def keep_venue(self, venue_data):
+        """Keep a finished row as a Venue: write it to the sinks when streaming, else collect it in self.venues"""
+        venue = Venue.from_row(venue_data)
+        if not self.sinks:
+            self.venues.append(venue)
+            return
+        self.held.append(venue)
+        # Until earlier categories have listed all their venues, one of them may still take this one over
+        if not self.frontier or self.frontier.settled(self.category):
+            self.write_venues()
+
+    def write_venues(self):
+        """Stream the held rows to the sinks, leaving out venues another category owns"""
+        for venue in self.held:
+            if self.frontier and not self.frontier.owns(venue.url, self.category):
+                continue
+            row = venue.to_row()
+            self.summary.add(row)
+            for sink in self.sinks:
+                sink.write(row)
+            self.venues_written += 1
+            self.listing_data.pop(venue.url, None)
+        self.held = []
+
+    def stream_journaled_venues(self):
+        """When streaming a resumed crawl, write the venues finished on earlier runs first"""
+        if self.sinks and self.journal:
+            for venue_data in self.journal.completed_venues():
+                self.keep_venue(venue_data)
+
+    def scraped_count(self):
+        return self.venues_written if self.sinks else len(self.venues)
+
+    def journal_venue(self, venue_data):
+        if self.journal:
+            self.journal.record_venue(venue_data, failed=venue_data['url'] in self.failed_urls)
+
     def extract_text_safe(self, element, default=""):
         """Safely extract text from an element"""
         if element:
             return element.get_text(strip=True)
         return default
 
-    def scrape_venue_detail(self, url):
-        """Scrape detailed information from a venue page"""
-        print(f"  Scraping venue: {url}")
-
-        venue_data = {
-            'url': url,
-            'name': '',
-            'phone': '',
-            'email': '',
-            'address': '',
-            'latitude': '',
-            'longitude': '',
-            'price_per_person': '',
-            'location_short': '',
-            'views': '',
-            'description': '',
-            'hall_names': '',
-            'services': '',
-            'event_types': '',
-            'gallery_images': '',
-            'meta_description': ''
-        }
+    def new_venue_record(self, url):
+        """Empty venue row, pre-filled with price and location from the listing page"""
+        venue_data = dict.fromkeys(VENUE_FIELDS, '')
+        venue_data['url'] = url
+        venue_data['category'] = self.category
 
         # Get price and location from listing page data
         if url in self.listing_data:
             venue_data['price_per_person'] = self.listing_data[url]['listing_price']
             venue_data['location_short'] = self.listing_data[url]['listing_location']
+        return venue_data
+
+    def parse_venue_detail(self, url, content):
+        """Parse venue page HTML into a venue row using the category's extractor table"""
+        start = time.perf_counter()
+        venue_data = self.new_venue_record(url)
+        lap = self.field_lap()
+        if self.parser == 'lxml':
+            steps = {step for step, _ in self.extractors}
+            venue_data = parse_venue_lxml(venue_data, content, self.base_url, lap, steps, self.template)
+        else:
+            page = DetailPage(content, self.base_url)
+            lap('parse')
+            if self.template:
+                self.template.strip_soup(page.soup)
+                lap('boilerplate')
+            for step, extractor in self.extractors:
+                venue_data.update(extractor(page))
+                lap(step)
+            page.soup.decompose()
+
+        self.metrics.observe('parse_seconds', 'detail', time.perf_counter() - start)
+        return venue_data
+
+    def extract_venue(self, url, content, unchanged=False):
+        """Parse a venue page, reusing the cached row when the page is unchanged"""
+        if unchanged and self.cache:
+            venue_data = self.cache.get_row(url, self.template_version())
+            if venue_data is not None:
+                # Listing price and location can change without the detail page changing
+                listing_fields = self.new_venue_record(url)
+                venue_data['price_per_person'] = listing_fields['price_per_person']
+                venue_data['location_short'] = listing_fields['location_short']
+                return venue_data
+
+        venue_data = self.parse_venue_detail(url, content)
+        if self.cache:
+            self.cache.put_row(url, venue_data, self.template_version())
+        return venue_data
+
+    def template_version(self):
+        return self.template.version if self.template else ''
+
+    def ensure_template(self):
+        """Load this category's page template, or learn it from the first venues of listing
+        page 1. The sample pages are kept in self.prefetched, so the crawl does not fetch
+        them a second time."""
+        if self.templates is None or self.template is not None:
+            return
+        self.template = self.templates.get(self.category)
+        if self.template:
+            print(f"Using the cached page template for {self.category} "
+                  f"({len(self.template.blocks)} boilerplate blocks)")
+            return
 
+        from boilerplate import TEMPLATE_SAMPLE_PAGES, learn_template
+        print(f"Learning the page template for {self.category}...")
+        listing_url = self.listing_url(1)
         try:
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-
-            # 1. Extract venue name from H1
-            h1 = soup.find('h1')
-            if h1:
-                venue_data['name'] = self.extract_text_safe(h1)
-
-            # 2. Extract phone
-            phone_links = soup.find_all('a', href=re.compile(r'tel:'))
-            phones = set()
-            for link in phone_links:
-                phone = link.get('href', '').replace('tel:', '').strip()
-                if phone and len(phone) > 5:
-                    phones.add(phone)
-            venue_data['phone'] = ', '.join(sorted(phones))
-
-            # 3. Extract email
-            email_links = soup.find_all('a', href=re.compile(r'mailto:'))
-            emails = set()
-            for link in email_links:
-                email = link.get('href', '').replace('mailto:', '').replace('/cdn-cgi/l/email-protection#', '').strip()
-                if email and '@' in email:
-                    emails.add(email)
-            venue_data['email'] = ', '.join(sorted(emails))
-
-            # 4. Extract address - look for map marker icon
-            address_p = soup.find('i', class_='fa-map-marker')
-            if address_p and address_p.parent:
-                parent_text = address_p.parent.get_text(strip=True)
-                # Clean up: remove views count and phone numbers
-                address = re.sub(r'Müştəri\s+Baxış\s+Sayı.*', '', parent_text).strip()
-                address = re.sub(r'(\+?994|0)[-\s]?\d{2}[-\s]?\d{3}[-\s]?\d{2}[-\s]?\d{2}', '', address).strip()
-                venue_data['address'] = address
-
-            # 5. Extract coordinates from JavaScript
-            for script in soup.find_all('script'):
-                if script.string and 'ae_globals' in script.string:
-                    lat_match = re.search(r"'latitude'\s*:\s*'([^']+)'", script.string)
-                    lon_match = re.search(r"'longitude'\s*:\s*'([^']+)'", script.string)
-                    if lat_match:
-                        venue_data['latitude'] = lat_match.group(1)
-                    if lon_match:
-                        venue_data['longitude'] = lon_match.group(1)
-                    break
-
-            # 6. Extract views - look for strong tag with number
-            for p in soup.find_all('p'):
-                p_text = p.get_text()
-                if 'Müştəri' in p_text and 'Baxış' in p_text:
-                    strong = p.find('strong')
-                    if strong:
-                        venue_data['views'] = self.extract_text_safe(strong)
-                    break
-
-            # 7. Extract hall names
-            page_text = soup.get_text()
-            hall_pattern = r'ZALLAR[:\s]*([^\n]+(?:\n[^\n]+){0,3})'
-            hall_match = re.search(hall_pattern, page_text, re.MULTILINE)
-            if hall_match:
-                halls = hall_match.group(1).strip()
-                halls = re.sub(r'TƏDBİRLƏR.*', '', halls).strip()
-                halls = re.sub(r'\.+', ', ', halls).strip()
-                venue_data['hall_names'] = halls[:200]
-
-            # 8. Extract event types
-            events = set()
-            event_keywords = ['Toy', 'Nişan', 'Xına', 'Ad günü', 'wedding', 'engagement']
-            for keyword in event_keywords:
-                if re.search(keyword, page_text, re.IGNORECASE):
-                    events.add(keyword)
-            venue_data['event_types'] = ', '.join(sorted(events))
-
-            # 9. Extract meta description
-            meta_desc = soup.find('meta', {'name': 'description'})
-            if meta_desc:
-                venue_data['meta_description'] = meta_desc.get('content', '')[:500]
-
-            # 10. Extract main description
-            content_div = soup.find('div', class_=re.compile('single-detail|content|description'))
-            if content_div:
-                paragraphs = content_div.find_all('p', limit=5)
-                desc_parts = []
-                for p in paragraphs:
-                    text = self.extract_text_safe(p)
-                    if text and len(text) > 20 and not re.search(r'(Müştəri|Baxış|tel:|@)', text):
-                        desc_parts.append(text)
-                venue_data['description'] = ' | '.join(desc_parts[:3])[:500]
-
-            # 11. Extract services/amenities
-            services = []
-            service_lists = soup.find_all('ul', class_=re.compile('service|amenity|feature'))
-            for ul in service_lists[:2]:
-                items = ul.find_all('li')
-                for item in items[:10]:
-                    text = self.extract_text_safe(item)
-                    if text and len(text) < 100:
-                        services.append(text)
-            venue_data['services'] = '; '.join(services[:15])
-
-            # 12. Extract gallery images
-            images = []
-            gallery = soup.find(['div', 'section'], class_=re.compile('gallery|carousel'))
-            if gallery:
-                imgs = gallery.find_all('img', src=True)
-                for img in imgs[:15]:
-                    src = img.get('src', '')
-                    if src and 'upload' in src:
-                        full_img_url = urljoin(self.base_url, src)
-                        full_img_url = full_img_url.replace('/thumbs/', '/').replace('-270.jpg', '-1200.jpg')
-                        images.append(full_img_url)
-
-            if not images:
-                imgs = soup.find_all('img', src=re.compile('upload'))
-                for img in imgs[:15]:
-                    src = img.get('src', '')
-                    full_img_url = urljoin(self.base_url, src)
-                    full_img_url = full_img_url.replace('/thumbs/', '/').replace('-270.jpg', '-1200.jpg')
-                    if full_img_url not in images:
-                        images.append(full_img_url)
-
-            venue_data['gallery_images'] = '; '.join(list(dict.fromkeys(images)))
-
-            time.sleep(1.5)  # Be polite to the server
-            return venue_data
-
+            listing = self.fetch(listing_url, kind='listing')
+            self.prefetched[listing_url] = listing
+            sample_urls = self.parse_listing_page(listing[0])[:TEMPLATE_SAMPLE_PAGES]
         except Exception as e:
-            print(f"    Error scraping venue {url}: {e}")
-            return venue_data
+            print(f"  Could not fetch listing page 1 for the template: {e}")
+            return
+        pages = []
+        for url in sample_urls:
+            try:
+                self.prefetched[url] = self.fetch(url)
+                pages.append(self.prefetched[url][0])
+            except Exception as e:
+                print(f"  Could not fetch template sample {url}: {e}")
+
+        self.template = learn_template(pages)
+        if self.template is None:
+            print(f"  Only {len(pages)} sample pages; scanning whole pages")
+            return
+        self.templates.put(self.category, self.template)
+        print(f"  {len(self.template.blocks)} boilerplate blocks shared by the {self.template.pages} sample pages")
 
-    def scrape_all(self):
-        """Main method to scrape all pages and venues"""
-        print("Starting final scraper with listing page data extraction...")
-        print("=" * 60)
+    def scrape_venue_detail(self, url):
+        """Scrape detailed information from a venue page"""
+        print(f"  Scraping venue: {url}")
 
-        # Step 1: Scrape all listing pages (1-5) to get URLs AND prices
-        all_venue_urls = []
-        for page_num in range(1, 6):
-            venue_urls = self.scrape_listing_page(page_num)
-            all_venue_urls.extend(venue_urls)
-            time.sleep(2)
+        try:
+            content, unchanged = self.fetch(url)
+            return self.extract_venue(url, content, unchanged)
 
-        # Remove duplicates
-        all_venue_urls = list(dict.fromkeys(all_venue_urls))
+        except Exception as e:
+            print(f"    Error scraping venue {url}: {e}")
+            self.failed_urls.add(url)
+            return self.new_venue_record(url)
+
+    def scrape_details(self, urls):
+        """Scrape venue detail pages with a bounded worker pool, yielding rows in input order.
+
+        `urls` may be a generator: URLs are submitted as it produces them, with at most
+        two per worker in flight, so detail fetches overlap with listing discovery.
+        """
+        # Results are yielded in submission order, so the CSV stays deterministic
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            in_flight = deque()
+            for url in urls:
+                in_flight.append(executor.submit(self.scrape_venue_detail, url))
+                self.metrics.set_queue_depth('detail_in_flight', len(in_flight))
+                if len(in_flight) >= self.workers * 2:
+                    yield in_flight.popleft().result()
+            while in_flight:
+                yield in_flight.popleft().result()
+
+    def more_listing_pages(self, page_num, new_urls):
+        """Whether there is a listing page after page_num, given the new venue URLs it had"""
+        if self.max_listing_pages and page_num >= self.max_listing_pages:
+            return False
+        if self.last_listing_page:
+            return page_num < self.last_listing_page
+        # No pager: the first page without new venues is past the end
+        return bool(new_urls)
+
+    def iter_venue_urls(self):
+        """Yield unique venue URLs in listing order, fetching listing pages as they are needed"""
+        seen = set()
+        page_num = 1
+        while True:
+            new_urls = [url for url in self.listing_page_urls(page_num) if url not in seen]
+            seen.update(new_urls)
+            yield from new_urls
+            if not self.more_listing_pages(page_num, new_urls):
+                break
+            page_num += 1
+        print(f"Listing pages done: {page_num}, {len(seen)} unique venues")
+
+    def discover_venue_urls(self):
+        """Scrape all listing pages and return unique venue URLs in listing order"""
+        all_venue_urls = list(self.iter_venue_urls())
         print("\n" + "=" * 60)
         print(f"Total unique venues found: {len(all_venue_urls)}")
         print(f"Listing data collected for: {len(self.listing_data)} venues")
         print("=" * 60 + "\n")
+        return all_venue_urls
+
+    def load_previous(self, filename):
+        """Load rows of a previous run's CSV keyed by URL"""
+        try:
+            with open(filename, newline='', encoding='utf-8') as csvfile:
+                rows = {row['url']: row for row in csv.DictReader(csvfile)}
+            # CSVs written before the category column only held saray-restoranlar venues
+            for row in rows.values():
+                row.setdefault('category', DEFAULT_CATEGORY)
+            return rows
+        except FileNotFoundError:
+            print(f"No previous dataset at {filename}, every venue counts as new")
+            return {}
+
+    def scrape_incremental(self, previous_file):
+        """Re-scrape only new or changed venues and merge them with a previous run's CSV"""
+        print("Starting incremental scraper...")
+        print("=" * 60)
+        self.ensure_template()
+
+        previous_rows = self.load_previous(previous_file)
+        # Rows of other categories are carried over untouched
+        other_categories = [row for row in previous_rows.values() if row['category'] != self.category]
+        previous = {url: row for url, row in previous_rows.items() if row['category'] == self.category}
+        active = {url: row for url, row in previous.items() if row.get('status', 'active') != 'removed'}
+
+        all_venue_urls = self.discover_venue_urls()
+        if not all_venue_urls:
+            # An empty listing is far more likely a failed crawl than a wiped site
+            print("No venues found on listing pages, keeping previous dataset unchanged")
+            self.venues = [Venue.from_row(row) for row in previous_rows.values()]
+            return
+
+        added = [url for url in all_venue_urls if url not in active]
+        changed = []
+        for url in all_venue_urls:
+            if url in active:
+                listing = self.listing_data.get(url, {})
+                if (listing.get('listing_price', '') != active[url]['price_per_person'] or
+                        listing.get('listing_location', '') != active[url]['location_short']):
+                    changed.append(url)
+        current = set(all_venue_urls)
+        removed = [url for url in previous if url not in current]
+
+        to_fetch = [url for url in all_venue_urls if url not in active or url in changed]
+        print(f"Fetching details for {len(to_fetch)} of {len(all_venue_urls)} venues "
+              f"with {self.workers} worker(s)...")
+        fetched = {}
+        for i, venue_data in enumerate(self.scrape_details(to_fetch), 1):
+            print(f"[{i}/{len(to_fetch)}] done")
+            fetched[venue_data['url']] = venue_data
+
+        # Listing order first, then venues that disappeared from the site
+        rows = []
+        for url in all_venue_urls:
+            venue_data = fetched.get(url) or dict(active[url])
+            venue_data['status'] = 'active'
+            rows.append(venue_data)
+        for url in removed:
+            venue_data = dict(previous[url])
+            venue_data['status'] = 'removed'
+            rows.append(venue_data)
+        rows.extend(other_categories)
+        self.venues = [Venue.from_row(row) for row in rows]
 
-        # Step 2: Scrape each venue detail page
-        for i, url in enumerate(all_venue_urls, 1):
-            print(f"[{i}/{len(all_venue_urls)}]", end=" ")
-            venue_data = self.scrape_venue_detail(url)
-            self.venues.append(venue_data)
+        print("\n" + "=" * 60)
+        print("Incremental crawl report:")
+        print(f"  - Added: {len(added)}")
+        for url in added:
+            print(f"      + {url}")
+        print(f"  - Changed (listing price/location): {len(changed)}")
+        for url in changed:
+            print(f"      ~ {url}")
+        print(f"  - Removed: {len(removed)}")
+        for url in removed:
+            print(f"      - {url}")
+        print(f"  - Unchanged (carried forward): {len(all_venue_urls) - len(added) - len(changed)}")
+        print("=" * 60)
 
-            # Save progress every 10 venues
-            if i % 10 == 0:
-                self.save_to_csv('shadliq_venues_final_progress.csv')
-                print(f"  Progress saved ({i} venues scraped)")
+    def scrape_all(self):
+        """Main method to scrape all pages and venues"""
+        print("Starting final scraper with listing page data extraction...")
+        print("=" * 60)
+        self.ensure_template()
+
+        # Listing pages (URLs AND prices) are discovered lazily while the detail workers
+        # run, skipping venues already journaled
+        pending = self.iter_venue_urls()
+        if self.frontier:
+            # Venues also listed under a category given earlier in --categories are scraped there
+            pending = self.frontier.claimed(pending, self.category)
+        if self.journal:
+            pending = (url for url in pending if url not in self.journal.completed)
+        self.stream_journaled_venues()
+        print(f"Fetching details with {self.workers} worker(s) as venues are discovered...")
+        for i, venue_data in enumerate(self.scrape_details(pending), 1):
+            print(f"[{i}] done")
+            self.journal_venue(venue_data)
+            self.keep_venue(venue_data)
+        if self.held:
+            self.frontier.wait_settled(self.category)
+            self.write_venues()
+
+        if self.journal and not self.sinks:
+            self.venues = [Venue.from_row(row) for row in self.journal.ordered_venues()]
 
         print("\n" + "=" * 60)
-        print(f"Scraping completed! Total venues scraped: {len(self.venues)}")
+        print(f"Scraping completed! Total venues scraped: {self.scraped_count()}")
         print("=" * 60)
 
     def save_to_csv(self, filename='shadliq_venues_final.csv'):
@@ -298,32 +583,225 @@ class ShadliqScraperFinal:
 
         print(f"\nSaving data to {filename}...")
 
-        fieldnames = [
-            'url', 'name', 'phone', 'email', 'address', 'location_short',
-            'latitude', 'longitude', 'price_per_person', 'views', 'description',
-            'hall_names', 'services', 'event_types', 'gallery_images', 'meta_description'
-        ]
+        rows = [venue.to_row() for venue in self.venues]
+        with CsvSink(filename, CSV_FIELDS) as sink:
+            for venue_data in rows:
+                sink.write(venue_data)
 
-        with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(self.venues)
+        print(f"Data saved successfully! {len(rows)} venues written to {filename}")
+        self.print_summary(self.summary_counts(rows))
 
-        print(f"Data saved successfully! {len(self.venues)} venues written to {filename}")
+    def close_sinks(self):
+        """Finish a streamed crawl: close the sinks and print the summary counted along the way"""
+        for sink in self.sinks:
+            sink.close()
+            print(f"Data saved successfully! {sink.rows} venues streamed to {sink.filename}")
+        self.print_summary(self.summary.counts())
 
-        # Print summary statistics
+    @staticmethod
+    def print_summary(counts):
         print("\nData Summary:")
-        print(f"  - Total venues: {len(self.venues)}")
-        print(f"  - Venues with name: {sum(1 for v in self.venues if v.get('name'))}")
-        print(f"  - Venues with phone: {sum(1 for v in self.venues if v.get('phone'))}")
-        print(f"  - Venues with email: {sum(1 for v in self.venues if v.get('email'))}")
-        print(f"  - Venues with address: {sum(1 for v in self.venues if v.get('address'))}")
-        print(f"  - Venues with coordinates: {sum(1 for v in self.venues if v.get('latitude'))}")
-        print(f"  - Venues with price: {sum(1 for v in self.venues if v.get('price_per_person'))}")
-        print(f"  - Venues with views: {sum(1 for v in self.venues if v.get('views'))}")
-        print(f"  - Venues with gallery: {sum(1 for v in self.venues if v.get('gallery_images'))}")
+        for label, count in counts.items():
+            print(f"  - {label}: {count}")
+
+    def save_to_parquet(self, filename='shadliq_venues_complete.parquet'):
+        """Save scraped data to Parquet with a typed Arrow schema (see columnar.VENUE_SCHEMA)"""
+        if not self.venues:
+            print("No data to save!")
+            return
+        from columnar import write_parquet
+        print(f"\nSaving data to {filename}...")
+        write_parquet(self.venues, filename)
+
+    @staticmethod
+    def summary_counts(venues):
+        """Field-fill counts of raw rows, printed after saving and used by the parser benchmark"""
+        summary = VenueSummary()
+        for venue_data in venues:
+            summary.add(venue_data)
+        return summary.counts()
 
 if __name__ == "__main__":
-    scraper = ShadliqScraperFinal()
-    scraper.scrape_all()
-    scraper.save_to_csv('shadliq_venues_complete.csv')
+    parser = argparse.ArgumentParser(description="Scrape wedding venues from shadliq.az")
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of concurrent detail page fetchers (default: 1)')
+    parser.add_argument('--rps', type=float, default=0.66,
+                        help='Global request budget in requests per second, shared by all workers; '
+                             'the starting rate with --adaptive (default: 0.66)')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Adjust the request rate to the server: speed up while responses are fast, '
+                             'back off when latency or errors rise')
+    parser.add_argument('--max-rps', type=float, default=3.0,
+                        help='Ceiling for the --adaptive rate in requests per second (default: 3.0)')
+    parser.add_argument('--target-latency', type=float, default=1.0,
+                        help='Time to first byte in seconds above which --adaptive slows down (default: 1.0)')
+    parser.add_argument('--robots', metavar='PATH', default='shadliq_robots.txt',
+                        help='Cached copy of robots.txt, refreshed daily; its Crawl-delay and Request-rate '
+                             'cap the request rate (default: shadliq_robots.txt)')
+    parser.add_argument('--ignore-robots', action='store_true',
+                        help='Do not read robots.txt for a crawl delay')
+    parser.add_argument('--templates', metavar='PATH', default='shadliq_templates.json',
+                        help='Page templates learned per category from a few detail pages, refreshed weekly; '
+                             'blocks they share (site nav, slogan, footer) are cut out before fields are '
+                             'extracted (default: shadliq_templates.json)')
+    parser.add_argument('--no-templates', action='store_true',
+                        help='Extract fields from whole detail pages, site-wide blocks included')
+    parser.add_argument('--retries', type=int, default=3,
+                        help='Retries per URL on connection errors, 429 and 5xx (default: 3)')
+    parser.add_argument('--backoff', type=float, default=1.0,
+                        help='Seconds before the first retry, doubled for each further one, with jitter '
+                             '(default: 1.0); a longer Retry-After from the server wins')
+    parser.add_argument('--cache', metavar='PATH', default=None,
+                        help='Enable the conditional-GET HTTP cache stored in this SQLite file')
+    parser.add_argument('--cache-ttl', type=float, default=0,
+                        help='Seconds a cached page is reused without revalidation (default: 0, always revalidate)')
+    parser.add_argument('--cache-max-mb', type=float, default=200,
+                        help='Maximum size of cached bodies before LRU eviction (default: 200)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only fetch new venues and venues whose listing price/location changed, '
+                             'merging them into the existing shadliq_venues_complete.csv')
+    parser.add_argument('--parser', choices=['bs4', 'lxml'], default='bs4',
+                        help='HTML parsing backend: BeautifulSoup html.parser or single-pass lxml (default: bs4)')
+    parser.add_argument('--record', metavar='ZIP', default=None,
+                        help='Save every fetched page to a compressed fixture corpus for benchmark_parsers.py')
+    parser.add_argument('--journal', metavar='PATH', default='shadliq_crawl_journal.jsonl',
+                        help='Append-only checkpoint journal of completed venues (default: shadliq_crawl_journal.jsonl)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue an interrupted crawl, skipping venues already in the journal')
+    parser.add_argument('--db', metavar='PATH', default=None,
+                        help='Also upsert the venues into this SQLite database (typed columns, crawl history)')
+    parser.add_argument('--history', metavar='PATH', default=None,
+                        help='Also append the changes in views, price and status since the last run to this '
+                             'snapshot store (see snapshots.py for time series and top view growth queries)')
+    parser.add_argument('--parquet', metavar='PATH', default=None,
+                        help='Also write the venues as Parquet with typed and list<string> columns')
+    parser.add_argument('--stream', action='store_true',
+                        help='Write each venue to shadliq_venues_complete.csv as soon as it is extracted instead '
+                             'of keeping all rows in memory; rows are in the order they finish')
+    parser.add_argument('--jsonl', metavar='PATH', default=None,
+                        help='With --stream, also stream the venues to this JSON Lines file')
+    parser.add_argument('--gallery', metavar='DIR', default=None,
+                        help='After the crawl, download every gallery image into this content-addressed store '
+                             '(with manifest.json), skipping unchanged images with conditional GETs')
+    parser.add_argument('--dedup', metavar='PATH', default=None,
+                        help='Before saving, merge venues listed under several URLs (MinHash/LSH over name, address, '
+                             'phone and description) and write the merge map to this JSON file')
+    parser.add_argument('--max-pages', type=int, default=None,
+                        help='Stop after this many listing pages (default: follow the pager to the last page)')
+    parser.add_argument('--categories', nargs='+', choices=list(CATEGORY_EXTRACTORS) + ['all'],
+                        default=[DEFAULT_CATEGORY],
+                        help=f'shadliq.az categories to crawl concurrently under the one --rps budget, '
+                             f'or "all"; a venue listed under several goes to the first of them given '
+                             f'(default: {DEFAULT_CATEGORY})')
+    parser.add_argument('--metrics', metavar='PATH', default=None,
+                        help='Write crawl metrics (request phase, parse and field histograms, bytes, queue depths) '
+                             'as a Prometheus text file, e.g. for node_exporter\'s textfile collector')
+    parser.add_argument('--report', metavar='PATH', default=None,
+                        help='Write a JSON run report with the same metrics, percentiles and a pages/sec timeline')
+    parser.add_argument('--engine', choices=['sync', 'async'], default='sync',
+                        help='Crawl backend: threaded requests.Session or pipelined asyncio/aiohttp (default: sync)')
+    parser.add_argument('--per-host', type=int, default=None,
+                        help='Async engine only: max open connections to shadliq.az (default: --workers)')
+    args = parser.parse_args()
+    if args.incremental and args.engine == 'async':
+        parser.error('--incremental is only supported by the sync engine')
+    if args.incremental and args.resume:
+        parser.error('--resume cannot be combined with --incremental')
+    if args.stream and (args.incremental or args.db or args.parquet or args.dedup):
+        parser.error('--stream cannot be combined with --incremental, --db, --parquet or --dedup, which need every row')
+    if args.jsonl and not args.stream:
+        parser.error('--jsonl needs --stream')
+    categories = list(CATEGORY_EXTRACTORS) if 'all' in args.categories else list(dict.fromkeys(args.categories))
+    if len(categories) > 1 and (args.incremental or args.engine == 'async'):
+        parser.error('crawling several categories needs the sync engine without --incremental')
+
+    cache = None
+    if args.cache:
+        from http_cache import HttpCache
+        cache = HttpCache(args.cache, max_bytes=int(args.cache_max_mb * 1024 * 1024), ttl=args.cache_ttl)
+
+    # One journal per category, so each resumes independently
+    journals = {}
+    if not args.incremental:
+        from journal import CrawlJournal
+        from multi_category import category_journal_path
+        journals = {category: CrawlJournal(category_journal_path(args.journal, category), resume=args.resume)
+                    for category in categories}
+    journal = journals.get(categories[0]) if len(categories) == 1 else None
+
+    scraper = ShadliqScraperFinal(workers=args.workers, requests_per_second=args.rps, cache=cache,
+                                  parser=args.parser, journal=journal, max_pages=args.max_pages,
+                                  category=categories[0], retries=args.retries, backoff=args.backoff)
+    # robots.txt Crawl-delay / Request-rate is a hard ceiling, with or without --adaptive
+    robots_rate = None
+    if not args.ignore_robots:
+        from politeness import load_robots, robots_max_rate
+        robots_rate = robots_max_rate(load_robots(args.robots, scraper.base_url))
+        if robots_rate:
+            print(f"robots.txt allows at most {robots_rate:.2f} req/s")
+            if not args.rps or robots_rate < args.rps:
+                scraper.rate_limiter.set_rate(robots_rate)
+    if args.adaptive:
+        from politeness import AdaptiveScheduler
+        max_rate = min(args.max_rps, robots_rate) if robots_rate else args.max_rps
+        scraper.transport.scheduler = AdaptiveScheduler(scraper.rate_limiter, max_rate,
+                                                        target_latency=args.target_latency)
+    if not args.no_templates:
+        from boilerplate import TemplateCache
+        scraper.templates = TemplateCache(args.templates)
+    if args.stream:
+        scraper.sinks.append(CsvSink('shadliq_venues_complete.csv', CSV_FIELDS))
+        if args.jsonl:
+            from sinks import JsonlSink
+            scraper.sinks.append(JsonlSink(args.jsonl))
+    if args.record:
+        from fixtures import FixtureRecorder
+        scraper.recorder = FixtureRecorder(args.record)
+    if len(categories) > 1:
+        from multi_category import MultiCategoryCrawler
+        MultiCategoryCrawler(scraper, categories, journals).scrape_all()
+    elif args.engine == 'async':
+        from async_engine import AsyncCrawlEngine
+        AsyncCrawlEngine(scraper, per_host=args.per_host).scrape_all()
+    elif args.incremental:
+        scraper.scrape_incremental('shadliq_venues_complete.csv')
+    else:
+        scraper.scrape_all()
+    if args.dedup and scraper.venues:
+        from dedup import VenueDeduplicator
+        scraper.venues = VenueDeduplicator().merge(scraper.venues, args.dedup)
+    if scraper.sinks:
+        scraper.close_sinks()
+    else:
+        scraper.save_to_csv('shadliq_venues_complete.csv')
+    if args.db and scraper.venues:
+        from storage import VenueStore
+        store = VenueStore(args.db)
+        store.save(scraper.venues)
+        store.close()
+    if args.history and (scraper.sinks or scraper.venues):
+        from snapshots import SnapshotStore
+        history = SnapshotStore(args.history)
+        history.record(list(read_csv('shadliq_venues_complete.csv')) if scraper.sinks else scraper.venues)
+        history.close()
+    if args.parquet:
+        scraper.save_to_parquet(args.parquet)
+    if args.gallery:
+        from gallery import GalleryDownloader
+        venues = read_csv('shadliq_venues_complete.csv') if scraper.sinks else scraper.venues
+        GalleryDownloader(scraper.transport, args.gallery, args.workers).download(venues)
+    scraper.transport.stats.print_summary()
+    if scraper.transport.scheduler:
+        scraper.transport.scheduler.print_summary()
+    scraper.metrics.print_summary()
+    if args.metrics:
+        scraper.metrics.write_prometheus(args.metrics)
+    if args.report:
+        scraper.metrics.write_json(args.report)
+    if cache:
+        cache.print_summary()
+        cache.close()
+    if scraper.recorder:
+        scraper.recorder.close()
+    for category_journal in journals.values():
+        category_journal.close()
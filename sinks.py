@@ -0,0 +1,94 @@
+import csv
+import json
+import threading
+
+# (label, field) pairs of the field-fill summary printed after saving
+SUMMARY_FIELDS = [
+    ('Venues with name', 'name'),
+    ('Venues with phone', 'phone'),
+    ('Venues with email', 'email'),
+    ('Venues with address', 'address'),
+    ('Venues with coordinates', 'latitude'),
+    ('Venues with price', 'price_per_person'),
+    ('Venues with views', 'views'),
+    ('Venues with gallery', 'gallery_images'),
+]
+
+
+class VenueSummary:
+    """Field-fill counts for the save summary, updated one row at a time"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.total = 0
+        self.filled = dict.fromkeys((field for _, field in SUMMARY_FIELDS), 0)
+
+    def add(self, venue_data):
+        with self.lock:
+            self.total += 1
+            for field in self.filled:
+                if venue_data.get(field):
+                    self.filled[field] += 1
+
+    def counts(self):
+        counts = {'Total venues': self.total}
+        counts.update((label, self.filled[field]) for label, field in SUMMARY_FIELDS)
+        return counts
+
+
+class VenueSink:
+    """Destination that receives venue rows one at a time as they are extracted.
+
+    Subclasses open their file in open_file and serialise a row in write_row; write
+    is thread-safe, so the workers of every category can share one sink.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.lock = threading.Lock()
+        self.rows = 0
+        self.file = self.open_file(filename)
+
+    def open_file(self, filename):
+        return open(filename, 'w', newline='', encoding='utf-8')
+
+    def write_row(self, venue_data):
+        raise NotImplementedError
+
+    def write(self, venue_data):
+        with self.lock:
+            self.write_row(venue_data)
+            self.rows += 1
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CsvSink(VenueSink):
+    """CSV with the given columns; rows without a status come from a fresh crawl, so they are active"""
+
+    def __init__(self, filename, fieldnames):
+        super().__init__(filename)
+        self.writer = csv.DictWriter(self.file, fieldnames=fieldnames, restval='', extrasaction='ignore')
+        self.writer.writeheader()
+
+    def write_row(self, venue_data):
+        row = dict(venue_data)
+        row.setdefault('status', 'active')
+        self.writer.writerow(row)
+
+
+class JsonlSink(VenueSink):
+    """One JSON object per line, with the same status default as the CSV"""
+
+    def write_row(self, venue_data):
+        row = dict(venue_data)
+        row.setdefault('status', 'active')
+        self.file.write(json.dumps(row, ensure_ascii=False) + '\n')
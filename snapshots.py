@@ -0,0 +1,318 @@
+import argparse
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS snapshot_crawls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    crawled_at TEXT NOT NULL,
+    venue_count INTEGER NOT NULL,
+    changed INTEGER NOT NULL
+);
+
+-- Latest values per venue, as stored codes, to compute the next deltas without decoding
+CREATE TABLE IF NOT EXISTS snapshot_venues (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    category TEXT,
+    last_crawl INTEGER NOT NULL,
+    last_views INTEGER NOT NULL,
+    last_price_min INTEGER NOT NULL,
+    last_price_max INTEGER NOT NULL,
+    last_status INTEGER NOT NULL
+);
+
+-- One row per venue per SEGMENT_CRAWLS crawls. Each numeric column is a stream of zigzag
+-- varint deltas with one entry per change record, so a crawl that changes nothing about
+-- a venue writes nothing
+CREATE TABLE IF NOT EXISTS snapshot_segments (
+    segment INTEGER NOT NULL,
+    venue_id INTEGER NOT NULL REFERENCES snapshot_venues (id),
+    points INTEGER NOT NULL,
+    crawls BLOB NOT NULL,
+    views BLOB NOT NULL,
+    price_min BLOB NOT NULL,
+    price_max BLOB NOT NULL,
+    status BLOB NOT NULL,
+    PRIMARY KEY (segment, venue_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_snapshot_segments_venue ON snapshot_segments (venue_id, segment);
+'''
+
+SERIES = ['crawls', 'views', 'price_min', 'price_max']
+SEGMENT_CRAWLS = 32  # Crawls per segment; every venue listed at a segment's first crawl gets a keyframe
+ACTIVE, REMOVED = 0, 1
+
+
+def encode_varints(values):
+    """LEB128 bytes of non-negative ints, 7 bits per byte with the high bit set on all but the last"""
+    out = bytearray()
+    for value in values:
+        while value >= 0x80:
+            out.append(value & 0x7f | 0x80)
+            value >>= 7
+        out.append(value)
+    return bytes(out)
+
+
+def decode_varints(data):
+    """Every varint in data as an int64 array, decoded with numpy in one pass"""
+    b = np.frombuffer(data, dtype=np.uint8)
+    if not len(b):
+        return np.zeros(0, dtype=np.int64)
+    ends = np.flatnonzero(b < 0x80)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    shifts = 7 * (np.arange(len(b)) - np.repeat(starts, ends - starts + 1))
+    return np.add.reduceat((b & 0x7f).astype(np.int64) << shifts, starts)
+
+
+def zigzag(n):
+    """Small negative and positive deltas both become small unsigned ints: 0, -1, 1, -2 -> 0, 1, 2, 3"""
+    return n * 2 if n >= 0 else -n * 2 - 1
+
+
+def unzigzag(array):
+    return (array >> 1) ^ -(array & 1)
+
+
+def views_code(views):
+    return 0 if views is None else views + 1  # 0 is "not shown on the page"
+
+
+def price_code(price):
+    return 0 if price is None else round(price * 100) + 1  # In qəpik, so 42.5 AZN survives
+
+
+def from_views_code(code):
+    return None if code == 0 else int(code) - 1
+
+
+def from_price_code(code):
+    return None if code == 0 else (int(code) - 1) / 100
+
+
+def segmented_cumsum(deltas, counts):
+    """Running sums restarting at every segment of `counts` items (one segment per venue)"""
+    totals = np.cumsum(deltas)
+    ends = np.cumsum(counts)
+    offsets = np.concatenate(([0], totals[ends[:-1] - 1])) if len(counts) else totals[:0]
+    return totals - np.repeat(offsets, counts)
+
+
+class SnapshotStore:
+    """History of every venue's views, price and status across crawls, stored as deltas.
+
+    scraper_final.py overwrites its CSV on every run; record() keeps what moved. Per venue
+    and per crawl a change record is appended only when views, price or status differ
+    from the last one: the crawl id, views and prices each go to their own stream as
+    zigzag varint deltas (usually one byte each), so a venue whose views rise by a few
+    dozen a day costs a few bytes a day and an untouched venue nothing.
+
+    The streams are cut into segments of SEGMENT_CRAWLS crawls, and the first record of a
+    venue in a segment holds absolute values (a keyframe, written at the segment's first
+    crawl even if nothing changed). The values at any crawl are then the last record at or
+    before it in that crawl's segment, so top_growth() decodes two segments, with numpy,
+    whatever the length of the history, and series() decodes one venue's segments.
+    """
+
+    def __init__(self, path='shadliq_history.sqlite'):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def record(self, venues, crawled_at=None):
+        """Append the changes in a crawl's Venue records. Venues of the crawled categories that
+        are missing from it are recorded as removed. Returns the crawl id."""
+        crawled_at = crawled_at or datetime.now(timezone.utc).isoformat(timespec='seconds')
+        last = {row[0]: row[1:] for row in self.conn.execute(
+            'SELECT url, id, category, last_crawl, last_views, last_price_min, last_price_max, last_status '
+            'FROM snapshot_venues')}
+
+        current = {}
+        for venue in venues:
+            status = REMOVED if venue.status == 'removed' else ACTIVE
+            current[venue.url] = (venue.category, views_code(venue.views), price_code(venue.price_min),
+                                  price_code(venue.price_max), status)
+        categories = {category for category, *_ in current.values()}
+        for url, (_, category, _, views, price_min, price_max, status) in last.items():
+            if url not in current and status == ACTIVE:
+                # Missing from a crawl of its category: removed. Another category's venue is
+                # carried as it is, which only writes a record when a new segment needs a keyframe
+                current[url] = (category, views, price_min, price_max,
+                                REMOVED if category in categories else ACTIVE)
+
+        with self.conn:
+            crawl_id = self.conn.execute(
+                'INSERT INTO snapshot_crawls (crawled_at, venue_count, changed) VALUES (?, ?, 0)',
+                (crawled_at, len(venues))).lastrowid
+            segment = (crawl_id - 1) // SEGMENT_CRAWLS
+            changes = []
+            for url, (category, views, price_min, price_max, status) in current.items():
+                if url not in last:
+                    venue_id = self.conn.execute(
+                        'INSERT INTO snapshot_venues (url, category, last_crawl, last_views, last_price_min, '
+                        'last_price_max, last_status) VALUES (?, ?, 0, 0, 0, 0, -1)', (url, category)).lastrowid
+                    last[url] = (venue_id, category, 0, 0, 0, 0, -1)  # Status -1: never recorded
+                venue_id, _, last_crawl, last_views, last_price_min, last_price_max, last_status = last[url]
+                if (last_crawl - 1) // SEGMENT_CRAWLS != segment:
+                    if status != ACTIVE and last_status != ACTIVE:
+                        continue  # Still delisted: no keyframe, so it reads as not listed
+                    # First record of the segment: deltas from zero, i.e. absolute values
+                    last_crawl, last_views, last_price_min, last_price_max = segment * SEGMENT_CRAWLS, 0, 0, 0
+                elif (views, price_min, price_max, status) == (last_views, last_price_min, last_price_max, last_status):
+                    continue
+                changes.append({
+                    'segment': segment, 'venue_id': venue_id, 'category': category,
+                    'crawls': encode_varints([crawl_id - last_crawl]),
+                    'views': encode_varints([zigzag(views - last_views)]),
+                    'price_min': encode_varints([zigzag(price_min - last_price_min)]),
+                    'price_max': encode_varints([zigzag(price_max - last_price_max)]),
+                    'status': bytes([status]),
+                    'crawl_id': crawl_id, 'last_views': views, 'last_price_min': price_min,
+                    'last_price_max': price_max, 'last_status': status,
+                })
+            # || yields TEXT even for two blobs, so the result is cast back to the raw bytes
+            appends = ', '.join(f'{column} = CAST({column} || excluded.{column} AS BLOB)'
+                                for column in SERIES + ['status'])
+            self.conn.executemany(f'''
+                INSERT INTO snapshot_segments (segment, venue_id, points, crawls, views, price_min, price_max, status)
+                VALUES (:segment, :venue_id, 1, :crawls, :views, :price_min, :price_max, :status)
+                ON CONFLICT (segment, venue_id) DO UPDATE SET points = points + 1, {appends}
+            ''', changes)
+            self.conn.executemany('''
+                UPDATE snapshot_venues SET category = :category, last_crawl = :crawl_id, last_views = :last_views,
+                    last_price_min = :last_price_min, last_price_max = :last_price_max, last_status = :last_status
+                WHERE id = :venue_id
+            ''', changes)
+            self.conn.execute('UPDATE snapshot_crawls SET changed = ? WHERE id = ?', (len(changes), crawl_id))
+        print(f"Recorded crawl #{crawl_id} in {self.path}: {len(changes)} of {len(current)} venues written")
+        return crawl_id
+
+    def crawls(self):
+        """[(crawl id, crawled_at)] in order"""
+        return self.conn.execute('SELECT id, crawled_at FROM snapshot_crawls ORDER BY id').fetchall()
+
+    def crawl_at(self, when):
+        """Id of the last crawl at or before `when` (ISO timestamp), or None"""
+        row = self.conn.execute('SELECT MAX(id) FROM snapshot_crawls WHERE crawled_at <= ?', (when,)).fetchone()
+        return row[0]
+
+    @staticmethod
+    def decode_segments(rows, columns):
+        """Decode segment rows (points, crawls, the `columns` blobs, status, segment):
+        (counts, crawl ids, {column: absolute codes}, statuses), restarting at every row"""
+        points, crawls, *blobs, status, segments = list(zip(*rows))[:len(columns) + 4]
+        counts = np.array(points)
+        base = np.repeat(np.array(segments) * SEGMENT_CRAWLS, counts)
+        crawl_ids = base + segmented_cumsum(decode_varints(b''.join(crawls)), counts)
+        values = {column: segmented_cumsum(unzigzag(decode_varints(b''.join(data))), counts)
+                  for column, data in zip(columns, blobs)}
+        statuses = np.frombuffer(b''.join(status), dtype=np.uint8)
+        return counts, crawl_ids, values, statuses
+
+    def series(self, url):
+        """Views, price and status of one venue at every crawl since it was first seen:
+        [{'crawled_at', 'views', 'price_min', 'price_max', 'status'}], with status 'removed'
+        for the crawls it was not listed in"""
+        columns = ['views', 'price_min', 'price_max']
+        rows = self.conn.execute(f'''
+            SELECT points, crawls, {", ".join(columns)}, status, segment FROM snapshot_segments
+            WHERE venue_id = (SELECT id FROM snapshot_venues WHERE url = ?) ORDER BY segment
+        ''', (url,)).fetchall()
+        if not rows:
+            return []
+        _, crawl_ids, values, statuses = self.decode_segments(rows, columns)
+        crawls = self.conn.execute('SELECT id, crawled_at FROM snapshot_crawls WHERE id >= ? ORDER BY id',
+                                   (int(crawl_ids[0]),)).fetchall()
+        ids = np.array([crawl_id for crawl_id, _ in crawls])
+        # Record in force at each crawl; a crawl whose segment has no record was not listed
+        records = np.searchsorted(crawl_ids, ids, side='right') - 1
+        same_segment = (crawl_ids[records] - 1) // SEGMENT_CRAWLS == (ids - 1) // SEGMENT_CRAWLS
+        listed = same_segment & (statuses[records] == ACTIVE)
+        return [{'crawled_at': crawled_at, 'views': from_views_code(values['views'][i]),
+                 'price_min': from_price_code(values['price_min'][i]),
+                 'price_max': from_price_code(values['price_max'][i]),
+                 'status': 'active' if is_listed else 'removed'}
+                for (_, crawled_at), i, is_listed in zip(crawls, records, listed)]
+
+    def views_at(self, crawl_id):
+        """(venue ids, views) of every venue listed at a crawl, from its segment alone"""
+        rows = self.conn.execute('''
+            SELECT points, crawls, views, status, segment, venue_id FROM snapshot_segments
+            WHERE segment = ? ORDER BY venue_id
+        ''', ((crawl_id - 1) // SEGMENT_CRAWLS,)).fetchall()
+        if not rows:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        venue_ids = np.array([row[5] for row in rows])
+        counts, crawl_ids, values, statuses = self.decode_segments(rows, ['views'])
+        # Crawl ids rise within a row, so row * stride + crawl id sorts the whole segment
+        stride = max(int(crawl_ids.max()), crawl_id) + 1
+        keys = np.repeat(np.arange(len(rows)), counts) * stride + crawl_ids
+        found = np.searchsorted(keys, np.arange(len(rows)) * stride + crawl_id, side='right') - 1
+        # Before a row's first record the search lands in the previous row, or at -1 for the first row
+        recorded = found >= np.cumsum(counts) - counts
+        positions = np.maximum(found, 0)  # Only to index safely; `recorded` decides
+        views = values['views'][positions] - 1  # -1: no views on the page
+        listed = recorded & (statuses[positions] == ACTIVE) & (views >= 0)
+        return venue_ids[listed], views[listed]
+
+    def top_growth(self, n=10, start=None, end=None):
+        """The n venues whose views grew most between the crawls at `start` and `end` (ISO
+        timestamps; default first and latest crawl), among venues listed with views at both:
+        [{'url', 'views_start', 'views_end', 'growth'}], ties by URL"""
+        crawls = self.crawls()
+        if not crawls:
+            return []
+        # A window starting before the first crawl is measured from the first crawl
+        start_crawl = (self.crawl_at(start) if start else None) or crawls[0][0]
+        end_crawl = self.crawl_at(end) if end else crawls[-1][0]
+        if end_crawl is None:
+            return []
+        start_ids, views_start = self.views_at(start_crawl)
+        end_ids, views_end = self.views_at(end_crawl)
+        venue_ids, in_start, in_end = np.intersect1d(start_ids, end_ids, assume_unique=True, return_indices=True)
+        growth = views_end[in_end] - views_start[in_start]
+        if not len(growth):
+            return []
+        # Only venues reaching the n-th largest growth can be in the top n; ties are then ordered by URL
+        cutoff = np.sort(growth)[-min(n, len(growth))]
+        candidates = np.flatnonzero(growth >= cutoff)
+        ids = [int(venue_ids[i]) for i in candidates]
+        urls = dict(self.conn.execute(f'SELECT id, url FROM snapshot_venues WHERE id IN ({", ".join("?" * len(ids))})',
+                                      ids))
+        ranked = sorted(candidates, key=lambda i: (-growth[i], urls[venue_ids[i]]))[:n]
+        return [{'url': urls[venue_ids[i]], 'views_start': int(views_start[in_start[i]]),
+                 'views_end': int(views_end[in_end[i]]), 'growth': int(growth[i])} for i in ranked]
+
+    def close(self):
+        self.conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the views and price history recorded with --history")
+    parser.add_argument('--db', default='shadliq_history.sqlite',
+                        help='Snapshot store written by scraper_final.py --history (default: shadliq_history.sqlite)')
+    parser.add_argument('--url', default=None, help='Print the time series of this venue')
+    parser.add_argument('--top', type=int, default=10, help='Venues to list by view growth (default: 10)')
+    parser.add_argument('--days', type=int, default=30,
+                        help='Growth window ending at the latest crawl, in days (default: 30)')
+    args = parser.parse_args()
+
+    from venue import format_price
+
+    store = SnapshotStore(args.db)
+    if args.url:
+        for point in store.series(args.url):
+            print(f"{point['crawled_at']}  views={point['views']}  "
+                  f"price={format_price(point['price_min'], point['price_max'])}  {point['status']}")
+    else:
+        crawls = store.crawls()
+        if crawls:
+            end = crawls[-1][1]
+            start = (datetime.fromisoformat(end) - timedelta(days=args.days)).isoformat(timespec='seconds')
+            print(f"Top {args.top} venues by view growth from {start} to {end}:")
+            for rank, venue in enumerate(store.top_growth(args.top, start, end), 1):
+                print(f"  {rank:>3}. +{venue['growth']:<7} {venue['views_start']} -> {venue['views_end']}  {venue['url']}")
+    store.close()
@@ -0,0 +1,147 @@
+import sqlite3
+from datetime import datetime, timezone
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS venues (
+    url TEXT PRIMARY KEY,
+    category TEXT,
+    name TEXT,
+    phone TEXT,
+    email TEXT,
+    address TEXT,
+    location_short TEXT,
+    latitude REAL,
+    longitude REAL,
+    price_per_person TEXT,
+    price_min REAL,
+    price_max REAL,
+    views INTEGER,
+    description TEXT,
+    hall_names TEXT,
+    services TEXT,
+    event_types TEXT,
+    gallery_images TEXT,
+    meta_description TEXT,
+    status TEXT NOT NULL DEFAULT 'active',
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_venues_category ON venues (category);
+CREATE INDEX IF NOT EXISTS idx_venues_location ON venues (location_short);
+CREATE INDEX IF NOT EXISTS idx_venues_price ON venues (price_min, price_max);
+CREATE INDEX IF NOT EXISTS idx_venues_views ON venues (views);
+
+CREATE TABLE IF NOT EXISTS crawls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    crawled_at TEXT NOT NULL,
+    venue_count INTEGER NOT NULL
+);
+
+-- One row per venue per crawl, for tracking views and prices over time
+CREATE TABLE IF NOT EXISTS crawl_history (
+    crawl_id INTEGER NOT NULL REFERENCES crawls (id),
+    url TEXT NOT NULL,
+    crawled_at TEXT NOT NULL,
+    status TEXT NOT NULL,
+    price_min REAL,
+    price_max REAL,
+    views INTEGER,
+    PRIMARY KEY (crawl_id, url)
+);
+CREATE INDEX IF NOT EXISTS idx_crawl_history_url ON crawl_history (url, crawled_at);
+'''
+
+TEXT_COLUMNS = ['category', 'name', 'phone', 'email', 'address', 'location_short', 'price_per_person',
+                'description', 'hall_names', 'services', 'event_types', 'gallery_images',
+                'meta_description']
+
+
+class VenueStore:
+    """SQLite storage for the venue dataset with typed, indexed columns and crawl history"""
+
+    def __init__(self, path='shadliq_venues.sqlite'):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.migrate()
+        self.conn.executescript(SCHEMA)
+
+    def migrate(self):
+        """Add columns introduced after a database was created"""
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(venues)')}
+        if columns and 'category' not in columns:
+            # Databases from before multi-category crawls only hold saray-restoranlar venues
+            with self.conn:
+                self.conn.execute("ALTER TABLE venues ADD COLUMN category TEXT DEFAULT 'saray-restoranlar'")
+
+    def typed_row(self, venue):
+        """Table row of a venue.Venue: its typed fields as they are, the rest as the CSV's text"""
+        text = venue.to_row()
+        row = {column: text[column] or None for column in TEXT_COLUMNS}
+        row.update({
+            'url': venue.url,
+            'latitude': venue.latitude,
+            'longitude': venue.longitude,
+            'price_min': venue.price_min,
+            'price_max': venue.price_max,
+            'views': venue.views,
+            'status': venue.status,
+        })
+        return row
+
+    def save(self, venues):
+        """Upsert Venue records by URL and record this crawl as a snapshot in crawl_history.
+
+        Active venues of the crawled categories that are missing from this crawl are marked
+        'removed', as the CSV's incremental merge does, so status means the same in both.
+        """
+        crawled_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        rows = [self.typed_row(venue_data) for venue_data in venues]
+        for row in rows:
+            row['crawled_at'] = crawled_at
+
+        columns = ['url'] + TEXT_COLUMNS + ['latitude', 'longitude', 'price_min', 'price_max', 'views', 'status']
+        updates = ', '.join(f'{column} = excluded.{column}' for column in columns[1:])
+        with self.conn:
+            crawl_id = self.conn.execute('INSERT INTO crawls (crawled_at, venue_count) VALUES (?, ?)',
+                                         (crawled_at, len(rows))).lastrowid
+            for row in rows:
+                row['crawl_id'] = crawl_id
+            self.conn.executemany(f'''
+                INSERT INTO venues ({', '.join(columns)}, first_seen, last_seen)
+                VALUES ({', '.join(':' + column for column in columns)}, :crawled_at, :crawled_at)
+                ON CONFLICT (url) DO UPDATE SET {updates}, last_seen = excluded.last_seen
+            ''', rows)
+            self.conn.executemany('''
+                INSERT INTO crawl_history (crawl_id, url, crawled_at, status, price_min, price_max, views)
+                VALUES (:crawl_id, :url, :crawled_at, :status, :price_min, :price_max, :views)
+            ''', rows)
+            removed = self.mark_removed(crawl_id, crawled_at, rows)
+        print(f"Saved {len(rows)} venues to {self.path} (crawl #{crawl_id}, {removed} no longer listed)")
+        return crawl_id
+
+    def mark_removed(self, crawl_id, crawled_at, rows):
+        """Set status 'removed' on active venues of the crawled categories that this crawl did not
+        list, with a crawl_history row for the change; returns how many there were"""
+        categories = {row['category'] for row in rows}
+        seen = {row['url'] for row in rows}
+        missing = [(url,) for (url,) in self.conn.execute(
+            f"SELECT url FROM venues WHERE status = 'active' AND category IN ({', '.join('?' * len(categories))})",
+            sorted(categories)) if url not in seen]
+        self.conn.executemany("UPDATE venues SET status = 'removed' WHERE url = ?", missing)
+        self.conn.executemany('''
+            INSERT INTO crawl_history (crawl_id, url, crawled_at, status, price_min, price_max, views)
+            SELECT ?, url, ?, status, price_min, price_max, views FROM venues WHERE url = ?
+        ''', [(crawl_id, crawled_at, url) for (url,) in missing])
+        return len(missing)
+
+    def query(self, sql, params=()):
+        """Run an ad-hoc query, e.g. store.query('SELECT name FROM venues WHERE price_max <= ?', (60,))"""
+        return self.conn.execute(sql, params).fetchall()
+
+    def dataframe(self, where="status = 'active'", params=()):
+        """Typed venue rows as a pandas DataFrame, filtered in SQL"""
+        import pandas as pd
+        return pd.read_sql_query(f'SELECT * FROM venues WHERE {where}', self.conn, params=params)
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,51 @@
+from dedup import VenueDeduplicator
+from venue import Venue
+
+
+def venue(url, **fields):
+    defaults = dict(category='saray-restoranlar', name='Royal Palace Şadlıq Sarayı', phones=('055 277 50 50',),
+                    address='Bakı şəhəri, Nərimanov rayonu, Təbriz küçəsi 12',
+                    description='Royal Palace 500 nəfərlik iki zalı ilə toy və nişanlar üçün.')
+    defaults.update(fields)
+    return Venue(url=url, **defaults)
+
+
+def test_merge_fills_the_canonical_row_from_its_duplicates():
+    venues = [venue('a', views=120), venue('b', emails=('info@royal.az',)),
+              venue('c', name='Nur Restoranı', phones=('012 444 11 22',), address='Xətai rayonu',
+                    description='Nur kiçik məclislər üçün ailəvi restorandır.')]
+    merged = VenueDeduplicator().merge(venues)
+    assert [v.url for v in merged] == ['a', 'c']
+    assert merged[0].emails == ('info@royal.az',) and merged[0].views == 120
+
+
+def test_merge_keeps_the_active_row_over_a_fuller_removed_one():
+    removed = venue('old', status='removed', views=900, emails=('info@royal.az',), hall_names='Böyük zal')
+    merged = VenueDeduplicator().merge([removed, venue('new')])
+    assert [(v.url, v.status) for v in merged] == [('new', 'active')]
+    assert merged[0].views == 900
+
+
+def test_merge_leaves_venues_of_other_categories_alone():
+    venues = [venue('hall'), venue('dresses', category='gelinlikler')]
+    assert [v.url for v in VenueDeduplicator().merge(venues)] == ['hall', 'dresses']
+
+
+def test_lsh_pairs_near_duplicates_and_skips_unrelated_venues():
+    venues = [venue('a'), venue('b', name='Royal Palace Şadlıq Sarayı MMC'),
+              venue('c', name='Nur Restoranı', phones=('012 444 11 22',), address='Xətai rayonu',
+                    description='Nur kiçik məclislər üçün ailəvi restorandır.'),
+              venue('d', name='Gülüstan Sarayı', phones=('050 100 20 30',), address='Yasamal rayonu',
+                    description='Gülüstan böyük ziyafətlər üçün möhtəşəm salon.')]
+    deduplicator = VenueDeduplicator()
+    pairs = deduplicator.candidates(deduplicator.token_sets(venues))
+    assert (0, 1) in pairs and not pairs & {(0, 2), (0, 3), (2, 3)}
+    groups = deduplicator.find_groups(venues)
+    assert [sorted(i for i, _ in members) for members in groups] == [[0, 1]]
+
+
+def test_fill_from_only_fills_empty_fields():
+    canonical = venue('a', views=100, emails=())
+    canonical.fill_from(venue('b', views=900, emails=('info@royal.az',), hall_names='Böyük zal'))
+    assert (canonical.url, canonical.views, canonical.emails, canonical.hall_names) == \
+        ('a', 100, ('info@royal.az',), 'Böyük zal')
@@ -0,0 +1,28 @@
+import numpy as np
+
+from snapshots import SnapshotStore, decode_varints, encode_varints, unzigzag, zigzag
+from venue import Venue
+
+
+def test_zigzag_varints_round_trip_negative_zero_and_large_deltas():
+    deltas = [0, -1, 1, -2, 63, -64, 64, 300, -300, 2 ** 40, -(2 ** 40)]
+    data = encode_varints(zigzag(delta) for delta in deltas)
+    assert [zigzag(delta) for delta in deltas[:4]] == [0, 1, 2, 3]
+    assert len(encode_varints([zigzag(-64)])) == 1
+    assert unzigzag(decode_varints(data)).tolist() == deltas
+    assert decode_varints(b'').dtype == np.int64
+
+
+def test_series_survives_falling_and_unchanged_values():
+    store = SnapshotStore(':memory:')
+    # Views fall and rise again, the price drops, and some crawls change only one field
+    crawls = [(500, 40.0, 60.0), (480, 40.0, 60.0), (480, 35.5, 60.0), (None, 35.5, 60.0), (0, 35.5, 35.5),
+              (0, 35.5, 35.5), (1000, 25.0, 25.0)]
+    for day, (views, price_min, price_max) in enumerate(crawls, 1):
+        store.record([Venue(url='a', views=views, price_min=price_min, price_max=price_max)],
+                     f"2025-01-{day:02d}T06:00:00")
+    assert [(p['views'], p['price_min'], p['price_max'], p['status']) for p in store.series('a')] == \
+        [crawl + ('active',) for crawl in crawls]
+    growth = store.top_growth(1, '2025-01-01T06:00:00', '2025-01-02T06:00:00')
+    assert [(v['url'], v['growth']) for v in growth] == [('a', -20)]
+    store.close()
@@ -0,0 +1,26 @@
+from storage import VenueStore
+from venue import Venue
+
+
+def venue(url, category='saray-restoranlar', views=100):
+    return Venue(url=url, category=category, views=views)
+
+
+def test_save_marks_venues_missing_from_a_later_crawl_removed():
+    store = VenueStore(':memory:')
+    store.save([venue('a'), venue('b'), venue('g', category='gelinlikler')])
+    crawl_id = store.save([venue('a', views=120)])
+
+    statuses = dict(store.query('SELECT url, status FROM venues'))
+    # 'g' belongs to a category this crawl did not cover, so it stays active
+    assert statuses == {'a': 'active', 'b': 'removed', 'g': 'active'}
+    assert list(store.dataframe()['url']) == ['a', 'g']
+    assert store.query('SELECT url, status, views FROM crawl_history WHERE crawl_id = ? ORDER BY url',
+                       (crawl_id,)) == [('a', 'active', 120), ('b', 'removed', 100)]
+
+    # Listed again: active once more, and not marked removed a second time while missing
+    store.save([venue('a'), venue('b')])
+    store.save([venue('a')])
+    store.save([venue('a')])
+    assert store.query("SELECT COUNT(*) FROM crawl_history WHERE url = 'b' AND status = 'removed'") == [(2,)]
+    store.close()
@@ -0,0 +1,237 @@
+import random
+import socket
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+from urllib3.util.request import ACCEPT_ENCODING  # gzip, deflate, plus br when brotli is installed
+
+from metrics import CrawlMetrics
+
+# Responses worth another attempt: rate limited or a transient server error
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RETRY_EXCEPTIONS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+              '(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
+
+
+def retry_after_seconds(value):
+    """Parse a Retry-After header given in seconds or as an HTTP date; None if absent or invalid"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+# DNS and connect time of the connection opened by this thread's current request, if any
+connection_timing = threading.local()
+
+
+class TimedConnectionMixin:
+    """Resolves the host itself before connecting, so DNS and connect time are measured apart.
+
+    Like urllib3's create_connection, every address the lookup returns is tried in turn, so
+    a host whose first record is unreachable (say IPv6 without an IPv6 route) still connects.
+    """
+
+    def _new_conn(self):
+        host = self._dns_host
+        start = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(host.strip('[]'), self.port, allowed_gai_family(), socket.SOCK_STREAM)
+        except OSError:
+            addresses = []  # Let urllib3 fail the lookup with its usual error
+        self._resolve_seconds = time.perf_counter() - start
+        if not addresses:
+            return super()._new_conn()
+
+        error = None
+        try:
+            for *_, sockaddr in dict.fromkeys(addresses):
+                self._dns_host = sockaddr[0]
+                try:
+                    return super()._new_conn()
+                except (ConnectTimeoutError, NewConnectionError) as e:
+                    error = e
+            raise error
+        finally:
+            self._dns_host = host
+            error = None  # Break the reference cycle through the traceback, as create_connection does
+
+    def connect(self):
+        self._resolve_seconds = 0.0
+        start = time.perf_counter()
+        super().connect()
+        elapsed = time.perf_counter() - start
+        connection_timing.phases = {'dns': self._resolve_seconds, 'connect': elapsed - self._resolve_seconds}
+
+
+class TimedHTTPConnection(TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections report DNS and connect time through connection_timing"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': TimedHTTPConnectionPool,
+                                                   'https': TimedHTTPSConnectionPool}
+
+
+class TransportStats:
+    """Retry and failure counters, shared by every transport of a crawl"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.retried_urls = set()
+        self.failed_urls = set()
+
+    def record_request(self):
+        with self.lock:
+            self.requests += 1
+
+    def record_retry(self, url):
+        with self.lock:
+            self.retries += 1
+            self.retried_urls.add(url)
+
+    def record_failure(self, url):
+        with self.lock:
+            self.failed_urls.add(url)
+
+    def print_summary(self):
+        recovered = len(self.retried_urls - self.failed_urls)
+        print(f"\nTransport: {self.requests} requests, {self.retries} retries, "
+              f"{len(self.retried_urls)} URLs retried ({recovered} recovered), "
+              f"{len(self.failed_urls)} URLs failed")
+        for url in sorted(self.failed_urls):
+            print(f"  - failed: {url}")
+
+
+class Transport:
+    """HTTP layer for the scraper: a keep-alive requests.Session with a pool sized for the
+    workers, compressed responses, and retries with exponential backoff and jitter on
+    connection errors, 429 and 5xx (honouring Retry-After). Every attempt waits for the
+    shared rate limiter, so retries spend the same politeness budget as first tries.
+    Each response's phase timings and sizes go to a CrawlMetrics, and its latency to the
+    optional AdaptiveScheduler (politeness.py) that steers the rate limiter.
+    """
+
+    def __init__(self, pool_size=1, rate_limiter=None, retries=3, backoff=1.0, max_backoff=60.0, stats=None,
+                 metrics=None):
+        self.rate_limiter = rate_limiter
+        self.retries = retries
+        self.backoff = backoff  # seconds before the first retry, doubled for each one after
+        self.max_backoff = max_backoff
+        self.stats = stats or TransportStats()
+        self.metrics = metrics or CrawlMetrics()
+        self.scheduler = None
+        self.session = requests.Session()
+        # One connection per worker, kept alive between requests
+        adapter = TimedHTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'User-Agent': USER_AGENT,
+            'Accept-Encoding': ACCEPT_ENCODING,
+            'Connection': 'keep-alive',
+        })
+
+    def retry_delay(self, attempt, retry_after=None):
+        """Seconds to wait before retry number attempt + 1"""
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+        # Jitter spreads out workers that failed together, so they do not retry in lockstep
+        delay = delay / 2 + random.uniform(0, delay / 2)
+        server_delay = retry_after_seconds(retry_after)
+        if server_delay is not None:
+            delay = max(delay, min(server_delay, self.max_backoff))
+        return delay
+
+    def get(self, url, headers=None, timeout=30, stream=False):
+        """GET url, retrying transient failures; raises once the retries are used up.
+
+        Other error responses (e.g. 404) are returned as they are, for raise_for_status.
+        With stream=True the body is left unread for the caller to iterate and close.
+        """
+        for attempt in range(self.retries + 1):
+            start = time.perf_counter()
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            self.stats.record_request()
+            retry_after = None
+            try:
+                response = self.timed_get(url, headers, timeout, start, stream)
+            except RETRY_EXCEPTIONS as e:
+                error, reason = e, type(e).__name__
+                if self.scheduler:
+                    self.scheduler.observe()
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    if response.status_code >= 400:
+                        self.stats.record_failure(url)  # e.g. 404: retrying will not help
+                    return response
+                error, reason = requests.HTTPError(f"{response.status_code} for url: {url}",
+                                                   response=response), f"HTTP {response.status_code}"
+                retry_after = response.headers.get('Retry-After')
+                response.close()
+
+            if attempt == self.retries:
+                break
+            delay = self.retry_delay(attempt, retry_after)
+            self.stats.record_retry(url)
+            print(f"    {reason} from {url}, retry {attempt + 1}/{self.retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+        self.stats.record_failure(url)
+        raise error
+
+    def timed_get(self, url, headers, timeout, start, stream=False):
+        """One GET recording its phases from start (before the rate limiter).
+
+        The body is read too unless stream is set; streamed bodies are the caller's to time and count.
+        """
+        connection_timing.phases = {}
+        sent = time.perf_counter()
+        response = self.session.get(url, headers=headers, timeout=timeout, stream=True)
+        first_byte = time.perf_counter()
+
+        phases = dict(connection_timing.phases)
+        phases['rate_limit'] = sent - start
+        phases['ttfb'] = first_byte - sent - sum(phases.get(phase, 0.0) for phase in ('dns', 'connect'))
+        wire_bytes = body_bytes = 0
+        if not stream:
+            body_bytes = len(response.content)  # Reads the body and returns the connection to the pool
+            phases['download'] = time.perf_counter() - first_byte
+            wire_bytes = response.raw.tell()
+        self.metrics.record_response(response.status_code, phases, wire_bytes, body_bytes)
+        if self.scheduler:
+            self.scheduler.observe(phases['ttfb'], response.status_code)
+        return response
@@ -0,0 +1,174 @@
+import csv
+import re
+import sys
+from dataclasses import dataclass, fields
+
+# Azerbaijani numbers: 0 or +994, a two-digit operator or area code, then 3-2-2 digits
+PHONE_RE = re.compile(r'(?:\+?994|(?<!\d)0)[\s-]?\(?(\d{2})\)?[\s-]?(\d{3})[\s-]?(\d{2})[\s-]?(\d{2})(?!\d)')
+
+# A listing price: '50' or a '40-60' range, in AZN per person
+PRICE_RANGE_RE = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*(?:-\s*(\d+(?:\.\d+)?))?\s*$')
+
+# Multi-valued fields of the raw rows (CSV, journal, sinks) and the separator they are joined with
+LIST_FIELDS = {
+    'phone': ', ',
+    'email': ', ',
+    'services': '; ',
+    'event_types': ', ',
+    'gallery_images': '; ',
+}
+
+
+def normalize_phone(text):
+    """A phone number in the site's own 055-209-08-07 form, whether it was written that way,
+    as +994 55 209 08 07 or as (055) 2090807; anything else is returned stripped"""
+    match = PHONE_RE.search(text or '')
+    if not match:
+        return (text or '').strip()
+    code, first, second, third = match.groups()
+    return f"0{code}-{first}-{second}-{third}"
+
+
+def split_items(value, separator, normalize=None):
+    """Unique non-empty items of a joined field, in order"""
+    items = (item.strip() for item in (value or '').split(separator))
+    if normalize:
+        items = (normalize(item) for item in items)
+    return tuple(dict.fromkeys(item for item in items if item))
+
+
+def intern_items(items):
+    """Event types and services come from a small vocabulary, so every venue can share one copy"""
+    return tuple(sys.intern(item) for item in items)
+
+
+def parse_price(text):
+    """Parse '50' or '40-60' into (min, max); anything else is (None, None)"""
+    match = PRICE_RANGE_RE.match(text or '')
+    if not match:
+        return None, None
+    low = float(match.group(1))
+    high = float(match.group(2)) if match.group(2) else low
+    return low, high
+
+
+def parse_int(text):
+    digits = re.sub(r'[^\d]', '', text or '')
+    return int(digits) if digits else None
+
+
+def parse_float(text):
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return None
+
+
+def format_number(value):
+    if value is None:
+        return ''
+    return str(int(value)) if float(value).is_integer() else str(value)
+
+
+def format_price(price_min, price_max):
+    """Back to the listing's '50' / '40-60' form"""
+    if price_min is None:
+        return ''
+    if price_max is None or price_max == price_min:
+        return format_number(price_min)
+    return f"{format_number(price_min)}-{format_number(price_max)}"
+
+
+@dataclass(slots=True)
+class Venue:
+    """One venue with typed fields, built once from an extracted row by from_row.
+
+    Phones are normalised to 055-209-08-07, multi-valued fields are tuples, and price,
+    views and coordinates are numbers, so storage, Parquet, dedup and the gallery
+    downloader use them as they are instead of parsing strings again. to_row turns a
+    record back into the raw string row written to CSV and JSONL.
+    """
+
+    url: str
+    category: str = ''
+    name: str = ''
+    phones: tuple = ()
+    emails: tuple = ()
+    address: str = ''
+    location_short: str = ''
+    latitude: float | None = None
+    longitude: float | None = None
+    price_min: float | None = None
+    price_max: float | None = None
+    views: int | None = None
+    description: str = ''
+    hall_names: str = ''
+    services: tuple = ()
+    event_types: tuple = ()
+    images: tuple = ()
+    meta_description: str = ''
+    status: str = 'active'
+
+    @classmethod
+    def from_row(cls, venue_data):
+        """Normalise a raw row of strings (extracted, journaled or read from the CSV)"""
+        price_min, price_max = parse_price(venue_data.get('price_per_person'))
+        phones = split_items(venue_data.get('phone'), LIST_FIELDS['phone'], normalize_phone)
+        return cls(
+            url=venue_data['url'],
+            category=sys.intern(venue_data.get('category') or ''),
+            name=venue_data.get('name') or '',
+            phones=tuple(sorted(phones)),
+            emails=split_items(venue_data.get('email'), LIST_FIELDS['email']),
+            address=venue_data.get('address') or '',
+            location_short=sys.intern(venue_data.get('location_short') or ''),
+            latitude=parse_float(venue_data.get('latitude')),
+            longitude=parse_float(venue_data.get('longitude')),
+            price_min=price_min,
+            price_max=price_max,
+            views=parse_int(venue_data.get('views')),
+            description=venue_data.get('description') or '',
+            hall_names=venue_data.get('hall_names') or '',
+            services=intern_items(split_items(venue_data.get('services'), LIST_FIELDS['services'])),
+            event_types=intern_items(split_items(venue_data.get('event_types'), LIST_FIELDS['event_types'])),
+            images=split_items(venue_data.get('gallery_images'), LIST_FIELDS['gallery_images']),
+            meta_description=venue_data.get('meta_description') or '',
+            status=sys.intern(venue_data.get('status') or 'active'),
+        )
+
+    def to_row(self):
+        """Raw row with the CSV columns, in CSV_FIELDS order"""
+        return {
+            'url': self.url,
+            'category': self.category,
+            'name': self.name,
+            'phone': LIST_FIELDS['phone'].join(self.phones),
+            'email': LIST_FIELDS['email'].join(self.emails),
+            'address': self.address,
+            'location_short': self.location_short,
+            'latitude': format_number(self.latitude),
+            'longitude': format_number(self.longitude),
+            'price_per_person': format_price(self.price_min, self.price_max),
+            'views': format_number(self.views),
+            'description': self.description,
+            'hall_names': self.hall_names,
+            'services': LIST_FIELDS['services'].join(self.services),
+            'event_types': LIST_FIELDS['event_types'].join(self.event_types),
+            'gallery_images': LIST_FIELDS['gallery_images'].join(self.images),
+            'meta_description': self.meta_description,
+            'status': self.status,
+        }
+
+    def fill_from(self, other):
+        """Copy every field that is empty here but set on other"""
+        for field in fields(self):
+            value = getattr(other, field.name)
+            if value not in (None, '', ()) and getattr(self, field.name) in (None, '', ()):
+                setattr(self, field.name, value)
+
+
+def read_csv(csv_path):
+    """Venue records from the scraper's CSV, read lazily"""
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            yield Venue.from_row(row)